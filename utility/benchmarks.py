@@ -0,0 +1,418 @@
+#!/usr/bin/env python3
+"""
+Synthetic benchmarks for the playlist utilities.
+
+Subcommands:
+  match   Compare the title containment matchers of enrich_spotify_ids.py
+          (reference scan vs. n-gram index vs. Aho-Corasick) and check they agree.
+  fuzzy   Time the NumPy n-gram scorer of enrich_spotify_ids.py --fuzzy on noisy
+          titles and count right/wrong picks (needs numpy).
+  table   Memory and scan time of the columnar CSV track table (track_table.py) vs.
+          the former one-dataclass-plus-raw-dict-per-row representation.
+  json    Load and pretty-dump a JSON file with json_codec/json_stream vs. the
+          stdlib, and check the output is identical.
+  jsonpath
+          Extract a dotted path (json_path.py) from a synthetic playlist export:
+          streamed from the file vs. loading it whole, time and peak memory.
+  reorder Plan and simulate yt-reorder-playlist.py moves for a shuffled playlist:
+          order-statistic tree vs. the former list scan, and check the plans agree.
+
+Prints a JSON report to stdout.
+"""
+
+import argparse
+import csv
+import io
+import json
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+
+def _words(rng: random.Random, n: int) -> List[str]:
+    alphabet = "abcdefghijklmnopqrstuvwxyz"
+    return ["".join(rng.choice(alphabet) for _ in range(rng.randint(2, 9))) for _ in range(n)]
+
+
+def _timed(fn: Callable[[], Any]) -> tuple:
+    t0 = time.perf_counter()
+    res = fn()
+    return res, time.perf_counter() - t0
+
+
+def bench_match(args: argparse.Namespace) -> Dict[str, Any]:
+    import enrich_spotify_ids as esi
+
+    rng = random.Random(args.seed)
+    vocab = _words(rng, args.vocab)
+
+    def phrase(lo: int, hi: int) -> str:
+        return " ".join(rng.choice(vocab) for _ in range(rng.randint(lo, hi)))
+
+    rows = esi.new_csv_table()
+    for i in range(args.rows):
+        esi.append_csv_row(rows, phrase(1, 4), phrase(1, 2), f"id{i}")
+    titles: List[str] = []
+    for _ in range(args.titles):
+        if rng.random() < args.hit_ratio:
+            r = rng.choice(rows)
+            titles.append(f"{r.artist_name} - {r.track_name} (Official Video)")
+        else:
+            titles.append(phrase(3, 7))
+
+    report: Dict[str, Any] = {"rows": len(rows), "titles": len(titles), "matchers": {}}
+    results: Dict[str, List[List[int]]] = {}
+    for name in ("index", "aho"):
+        matcher, build_s = _timed(lambda: esi.MATCHERS[name](rows))
+        res, match_s = _timed(lambda: [matcher.match(t) for t in titles])
+        results[name] = res
+        report["matchers"][name] = {"build_s": round(build_s, 3), "match_s": round(match_s, 3)}
+
+    # The linear scan is far too slow for the full set; time a sample and extrapolate.
+    sample = titles[: max(1, min(args.scan_sample, len(titles)))]
+    scanner = esi.MATCHERS["scan"](rows)
+    scan_res, scan_s = _timed(lambda: [scanner.match(t) for t in sample])
+    report["matchers"]["scan"] = {
+        "sampled_titles": len(sample),
+        "match_s": round(scan_s, 3),
+        "match_s_extrapolated": round(scan_s * len(titles) / len(sample), 1),
+    }
+    report["agree"] = all(results[name][: len(sample)] == scan_res for name in results) and (
+        results["index"] == results["aho"]
+    )
+    report["matched_titles"] = sum(1 for m in results["aho"] if m)
+    return report
+
+
+def bench_fuzzy(args: argparse.Namespace) -> Dict[str, Any]:
+    import enrich_spotify_ids as esi
+
+    rng = random.Random(args.seed)
+    vocab = _words(rng, args.vocab)
+
+    def phrase(lo: int, hi: int) -> str:
+        return " ".join(rng.choice(vocab) for _ in range(rng.randint(lo, hi)))
+
+    rows = esi.new_csv_table()
+    for i in range(args.rows):
+        esi.append_csv_row(rows, phrase(1, 4), phrase(1, 2), f"id{i}")
+    pending: Dict[str, List[int]] = {}
+    truth: Dict[str, int] = {}
+    for _ in range(args.titles):
+        i = rng.randrange(len(rows))
+        r = rows[i]
+        # Typo plus decoration, so the containment matchers miss it.
+        title = f"{r.artist_name} - {r.track_name}".replace("e", "3", 1) + " (Official Video)"
+        pending[title] = []
+        truth[title] = i
+
+    scorer, build_s = _timed(lambda: esi.FuzzyScorer(rows))
+    (picks, _), resolve_s = _timed(
+        lambda: esi.fuzzy_resolve(scorer, rows, pending, min_score=args.min_score, margin=args.margin)
+    )
+    return {
+        "rows": len(rows),
+        "titles": len(pending),
+        "build_s": round(build_s, 3),
+        "resolve_s": round(resolve_s, 3),
+        "picked": len(picks),
+        "right": sum(1 for t, i in picks.items() if truth[t] == i),
+        "wrong": sum(1 for t, i in picks.items() if truth[t] != i),
+    }
+
+
+_EXPORT_FIELDS = [
+    "Track URI", "Track Name", "Artist URI(s)", "Artist Name(s)", "Album URI", "Album Name",
+    "Album Artist URI(s)", "Album Artist Name(s)", "Album Release Date", "Album Image URL",
+    "Disc Number", "Track Number", "Track Duration (ms)", "Track Preview URL", "Explicit",
+    "Popularity", "ISRC", "Added By", "Added At",
+]
+
+
+@dataclass
+class _DictCsvRow:
+    """How enrich_spotify_ids.py held a CSV row before track_table.py."""
+
+    raw: Dict[str, str]
+    track_name: str
+    artist_name: str
+    spotify_id: str
+    isrc: str = ""
+    track_norm: str = field(init=False)
+    artist_norm: str = field(init=False)
+
+    def __post_init__(self) -> None:
+        from enrich_spotify_ids import _norm
+
+        self.track_norm = _norm(self.track_name)
+        self.artist_norm = _norm(self.artist_name)
+
+
+def bench_table(args: argparse.Namespace) -> Dict[str, Any]:
+    import enrich_spotify_ids as esi
+
+    rng = random.Random(args.seed)
+    vocab = _words(rng, args.vocab)
+
+    def phrase(lo: int, hi: int) -> str:
+        return " ".join(rng.choice(vocab) for _ in range(rng.randint(lo, hi)))
+
+    # Export-like rows: artists and albums repeat, as in real libraries. Both sides parse
+    # the same CSV text, so every value starts out as its own string object.
+    artists = [(phrase(1, 2), f"spotify:artist:{i:022d}") for i in range(max(1, args.rows // 20))]
+    albums = [(phrase(1, 4), f"spotify:album:{i:022d}", f"20{rng.randint(0, 24):02d}-01-01") for i in range(max(1, args.rows // 8))]
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(_EXPORT_FIELDS)
+    for i in range(args.rows):
+        artist, artist_uri = rng.choice(artists)
+        album, album_uri, date = rng.choice(albums)
+        writer.writerow(
+            [
+                f"spotify:track:{i:022d}", phrase(1, 4), artist_uri, artist, album_uri, album, artist_uri, artist,
+                date, f"https://i.scdn.co/image/{album_uri[-8:]}", "1", rng.randint(1, 14),
+                rng.randint(90000, 400000), "", rng.choice(["true", "false"]), rng.randint(0, 100),
+                f"USAB{i:08d}", "user", "2024-05-01T12:00:00Z",
+            ]
+        )
+    text = buf.getvalue()
+
+    def build_dicts() -> List[_DictCsvRow]:
+        return [
+            _DictCsvRow(
+                raw=r,
+                track_name=r["Track Name"],
+                artist_name=r["Artist Name(s)"].split(";", 1)[0],
+                spotify_id=r["Track URI"].split(":")[-1],
+                isrc=r["ISRC"],
+            )
+            for r in csv.DictReader(io.StringIO(text))
+        ]
+
+    def build_table() -> Any:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "export.csv"
+            path.write_text(text, encoding="utf-8")
+            return esi.load_csv_rows(path)[1]
+
+    report: Dict[str, Any] = {"rows": args.rows, "fields": len(_EXPORT_FIELDS)}
+    for name, build in (("dataclass", build_dicts), ("table", build_table)):
+        # Timed untraced; tracemalloc slows allocation down too much to time under it.
+        rows, build_s = _timed(build)
+        del rows
+        tracemalloc.start()
+        rows = build()
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        def attr_scan() -> int:
+            return sum(1 for r in rows if r.track_norm and r.artist_norm in r.track_norm)
+
+        _, attr_s = _timed(attr_scan)
+        report[name] = {"build_s": round(build_s, 3), "mib": round(current / 2**20, 1), "attr_scan_s": round(attr_s, 3)}
+        if name == "table":
+            _, col_s = _timed(
+                lambda: sum(1 for t, a in zip(rows.column("track_norm"), rows.column("artist_norm")) if t and a in t)
+            )
+            report[name]["column_scan_s"] = round(col_s, 3)
+            report[name]["interned_strings"] = len(rows.pool)
+            sample = build_dicts()[::997]
+            report["same_rows"] = all(rows[i * 997].raw == d.raw for i, d in enumerate(sample))
+        del rows
+    report["memory_ratio"] = round(report["dataclass"]["mib"] / max(report["table"]["mib"], 0.1), 1)
+    return report
+
+
+def bench_json(args: argparse.Namespace) -> Dict[str, Any]:
+    import io
+
+    import json_codec
+    import json_stream
+
+    path = Path(args.path)
+
+    def best(fn: Callable[[], Any]) -> float:
+        return min(_timed(fn)[1] for _ in range(args.repeat))
+
+    doc = json.loads(path.read_text(encoding="utf-8"))
+    expected = json.dumps(doc, ensure_ascii=False, indent=2)
+    streamed = io.StringIO()
+    json_stream.write_json_pretty(json_codec.load_path(path), streamed, before_item=lambda parent, item: None)
+    return {
+        "path": str(path),
+        "bytes": path.stat().st_size,
+        "backend": json_codec.BACKEND,
+        "load_s": {
+            "stdlib": round(best(lambda: json.loads(path.read_text(encoding="utf-8"))), 4),
+            "codec": round(best(lambda: json_codec.load_path(path)), 4),
+        },
+        "pretty_s": {
+            "stdlib": round(best(lambda: json.dumps(doc, ensure_ascii=False, indent=2)), 4),
+            "codec": round(best(lambda: json_stream.dumps_pretty(doc)), 4),
+            "codec_with_item_hook": round(
+                best(lambda: json_stream.write_json_pretty(doc, io.StringIO(), before_item=lambda parent, item: None)), 4
+            ),
+        },
+        "agree": json_stream.dumps_pretty(doc) == expected and streamed.getvalue() == expected,
+    }
+
+
+def _peak_mib(fn: Callable[[], Any]) -> float:
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1] / 2**20
+    finally:
+        tracemalloc.stop()
+
+
+def bench_jsonpath(args: argparse.Namespace) -> Dict[str, Any]:
+    import json_codec
+    from json_path import compile_path
+
+    rng = random.Random(args.seed)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "export.json"
+        items = [
+            {
+                "videoId": f"vid{i:08d}",
+                "title": " ".join(rng.choice(("night", "drive", "ocean", "Ümlaut", "\"live\"")) for _ in range(8)),
+                "thumbnails": {"default": f"https://i.ytimg.com/vi/{i}/default.jpg", "sizes": [120, 320, 480]},
+                "description": "x" * args.item_bytes,
+            }
+            for i in range(args.items)
+        ]
+        path.write_text(json.dumps({"user:demo": {"title": "demo", "items": items}}, ensure_ascii=False, indent=2))
+        del items
+        jp = compile_path("user:demo.items[].videoId")
+
+        def loaded() -> List[Any]:
+            return jp.find(json_codec.load_path(path))
+
+        def streamed() -> List[Any]:
+            return list(jp.iter_file(path))
+
+        want, t_loaded = _timed(loaded)
+        got, t_streamed = _timed(streamed)
+        return {
+            "items": args.items,
+            "bytes": path.stat().st_size,
+            "backend": json_codec.BACKEND,
+            "seconds": {"load_and_find": round(t_loaded, 3), "iter_file": round(t_streamed, 3)},
+            # Measured separately: tracemalloc slows allocation down too much to time under it.
+            "peak_mib": {"load_and_find": round(_peak_mib(loaded), 1), "iter_file": round(_peak_mib(streamed), 1)},
+            "agree": got == want,
+        }
+
+
+def _simulate_naive(current: List[Any], moves: List[tuple]) -> List[tuple]:
+    """How reorder_plan.simulate_and_render_plan worked before OrderTree: scan, pop, insert."""
+    work = list(current)
+    plan = []
+    for vid, target in moves:
+        from_idx = next((i for i, it in enumerate(work) if it.video_id == vid), -1)
+        if from_idx < 0:
+            continue
+        to_idx = max(0, min(target, len(work) - 1))
+        if from_idx == to_idx:
+            continue
+        it = work.pop(from_idx)
+        work.insert(to_idx, it)
+        plan.append((it, from_idx, to_idx))
+    return plan
+
+
+def bench_reorder(args: argparse.Namespace) -> Dict[str, Any]:
+    import reorder_plan
+
+    rng = random.Random(args.seed)
+    table = reorder_plan.new_playlist_table()
+    for i in range(args.items):
+        table.append(f"PLI{i:06d}", f"vid{i:08d}", i)
+    current = list(table)
+    desired = [it.video_id for it in current]
+    # Heavy shuffle: swap a share of random pairs.
+    for _ in range(int(args.items * args.shuffle / 2)):
+        a, b = rng.randrange(args.items), rng.randrange(args.items)
+        desired[a], desired[b] = desired[b], desired[a]
+
+    moves, plan_s = _timed(lambda: reorder_plan.plan_moves_minimal(current, desired))
+    tree_plan, tree_s = _timed(lambda: reorder_plan.simulate_and_render_plan(current, moves))
+    report: Dict[str, Any] = {
+        "items": args.items,
+        "moves": len(moves),
+        "plan_moves_s": round(plan_s, 3),
+        "simulate_s": {"tree": round(tree_s, 3)},
+    }
+    if args.items <= args.naive_max:
+        naive_plan, naive_s = _timed(lambda: _simulate_naive(current, moves))
+        report["simulate_s"]["naive"] = round(naive_s, 3)
+        report["agree"] = [(it.index, f, t) for it, f, t in naive_plan] == [(it.index, f, t) for it, f, t in tree_plan]
+    return report
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    p = argparse.ArgumentParser(description="Synthetic benchmarks for the playlist utilities.")
+    sub = p.add_subparsers(dest="cmd", required=True)
+
+    m = sub.add_parser("match", help="Title containment matchers of enrich_spotify_ids.py.")
+    m.add_argument("--rows", type=int, default=50000, help="Synthetic CSV rows (default 50000).")
+    m.add_argument("--titles", type=int, default=5000, help="Synthetic item titles (default 5000).")
+    m.add_argument("--vocab", type=int, default=20000, help="Distinct words (default 20000).")
+    m.add_argument("--hit-ratio", type=float, default=0.6, help="Share of titles built from a row (default 0.6).")
+    m.add_argument("--scan-sample", type=int, default=50, help="Titles timed with the linear scan (default 50).")
+    m.add_argument("--seed", type=int, default=1)
+    m.set_defaults(func=bench_match)
+
+    f = sub.add_parser("fuzzy", help="Fuzzy n-gram scorer of enrich_spotify_ids.py (needs numpy).")
+    f.add_argument("--rows", type=int, default=50000, help="Synthetic CSV rows (default 50000).")
+    f.add_argument("--titles", type=int, default=5000, help="Synthetic noisy titles (default 5000).")
+    f.add_argument("--vocab", type=int, default=20000, help="Distinct words (default 20000).")
+    f.add_argument("--min-score", type=float, default=0.75)
+    f.add_argument("--margin", type=float, default=0.1)
+    f.add_argument("--seed", type=int, default=1)
+    f.set_defaults(func=bench_fuzzy)
+
+    t = sub.add_parser("table", help="Columnar CSV track table vs. dataclass rows.")
+    t.add_argument("--rows", type=int, default=100000, help="Synthetic export rows (default 100000).")
+    t.add_argument("--vocab", type=int, default=20000, help="Distinct words (default 20000).")
+    t.add_argument("--seed", type=int, default=1)
+    t.set_defaults(func=bench_table)
+
+    j = sub.add_parser("json", help="JSON load/pretty-dump via json_codec vs. the stdlib.")
+    j.add_argument(
+        "--path",
+        default=str(Path(__file__).resolve().parent.parent / "data" / "title-overrides.json"),
+        help="JSON file to load and dump (default: data/title-overrides.json).",
+    )
+    j.add_argument("--repeat", type=int, default=10, help="Best of N runs (default 10).")
+    j.set_defaults(func=bench_json)
+
+    jp = sub.add_parser("jsonpath", help="Streamed vs. loaded JSON path extraction (json_path.py).")
+    jp.add_argument("--items", type=int, default=100000, help="Playlist items (default 100000).")
+    jp.add_argument("--item-bytes", type=int, default=400, help="Filler bytes per item (default 400).")
+    jp.add_argument("--seed", type=int, default=1)
+    jp.set_defaults(func=bench_jsonpath)
+
+    r = sub.add_parser("reorder", help="Move simulation of yt-reorder-playlist.py.")
+    r.add_argument("--items", type=int, default=5000, help="Playlist length (default 5000).")
+    r.add_argument("--shuffle", type=float, default=1.0, help="Random swaps per item (default 1.0).")
+    r.add_argument(
+        "--naive-max", type=int, default=20000, help="Also time the list scan up to this length (default 20000)."
+    )
+    r.add_argument("--seed", type=int, default=1)
+    r.set_defaults(func=bench_reorder)
+
+    args = p.parse_args(argv)
+    report = args.func(args)
+    print(json.dumps(report, indent=2))
+    return 0 if report.get("agree", True) and report.get("same_rows", True) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,6 +2,7 @@
 
 import argparse
 import base64
+import bisect
 import hashlib
 import json
 import os
@@ -9,16 +10,22 @@ import secrets
 import shutil
 import subprocess
 import sys
+import threading
 import time
 import urllib.error
 import urllib.parse
-import urllib.request
 import webbrowser
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from http.server import BaseHTTPRequestHandler, HTTPServer
 from pathlib import Path
 from typing import Any, Dict, Iterable, List, Optional, Tuple
 
+from spotify_http import PooledHttpClient, RateLimiter, ResponseLostError
+from json_codec import dumps, load_path, loads
+from json_path import compile_path
+from json_stream import dumps_pretty
+
 
 SPOTIFY_ACCOUNTS_BASE = "https://accounts.spotify.com"
 SPOTIFY_API_BASE = "https://api.spotify.com"
@@ -32,6 +39,15 @@ def _now() -> float:
     return time.time()
 
 
+# Per-thread job context: log prefix and API call counter (used by --index batch runs).
+_JOB = threading.local()
+
+
+def _log(msg: str) -> None:
+    prefix = getattr(_JOB, "prefix", "")
+    print(f"{prefix}{msg}" if prefix else msg, flush=bool(prefix))
+
+
 def _is_spotify_track_id(value: str) -> bool:
     if not isinstance(value, str):
         return False
@@ -174,23 +190,15 @@ def _find_spotify_client_id(env_file: Optional[str], explicit_client_id: Optiona
     )
 
 
-def _navigate_json_path(root: Any, path: str) -> Any:
-    cur = root
-    for key in [p for p in path.split(".") if p]:
-        if isinstance(cur, dict):
-            if key not in cur:
-                raise KeyError(f"Missing key '{key}' while resolving path '{path}'.")
-            cur = cur[key]
-        else:
-            raise TypeError(f"Cannot resolve key '{key}' on non-object while resolving path '{path}'.")
-    return cur
-
-
 def _guess_items_path(root: Any) -> str:
     if not isinstance(root, dict):
         raise SystemExit("JSON root is not an object; please provide --path.")
 
     candidates: List[str] = []
+    # Hosted playlist files (public/video-hosted/pl_*.json) keep items at the root.
+    root_items = root.get("items")
+    if isinstance(root_items, list) and any(_extract_track_uri(it) for it in root_items[:50]):
+        candidates.append("items")
     for k, v in root.items():
         if not isinstance(v, dict):
             continue
@@ -249,11 +257,13 @@ class TokenStore:
         self._token_path = token_path
         self._client_id = client_id
         self._token: Optional[OAuthToken] = None
+        # Shared by batch workers; only one of them should refresh an expired token.
+        self._lock = threading.RLock()
 
     def load(self) -> Optional[OAuthToken]:
         if not self._token_path.exists():
             return None
-        obj = json.loads(_read_text_file(self._token_path))
+        obj = loads(_read_text_file(self._token_path))
         tok = OAuthToken.from_json(obj)
         if not tok.access_token or not tok.refresh_token:
             return None
@@ -262,27 +272,29 @@ class TokenStore:
 
     def save(self, token: OAuthToken) -> None:
         self._token_path.parent.mkdir(parents=True, exist_ok=True)
-        self._token_path.write_text(json.dumps(token.to_json(), indent=2) + "\n", encoding="utf-8")
+        self._token_path.write_text(dumps_pretty(token.to_json(), ensure_ascii=True) + "\n", encoding="utf-8")
         self._token = token
 
     def ensure_valid(self) -> OAuthToken:
-        if self._token is None:
-            self.load()
-        if self._token is None:
-            raise RuntimeError("No token loaded")
-        if self._token.is_expired():
-            self._token = self.refresh(self._token)
-            self.save(self._token)
-        return self._token
+        with self._lock:
+            if self._token is None:
+                self.load()
+            if self._token is None:
+                raise RuntimeError("No token loaded")
+            if self._token.is_expired():
+                self._token = self.refresh(self._token)
+                self.save(self._token)
+            return self._token
 
     def force_refresh(self) -> OAuthToken:
-        if self._token is None:
-            self.load()
-        if self._token is None:
-            raise RuntimeError("No token loaded")
-        self._token = self.refresh(self._token)
-        self.save(self._token)
-        return self._token
+        with self._lock:
+            if self._token is None:
+                self.load()
+            if self._token is None:
+                raise RuntimeError("No token loaded")
+            self._token = self.refresh(self._token)
+            self.save(self._token)
+            return self._token
 
     def refresh(self, token: OAuthToken) -> OAuthToken:
         data = {
@@ -463,8 +475,10 @@ def _pkce_authorize_and_exchange(
     return tok
 
 
-def _read_http_body(resp: urllib.response.addinfourl) -> bytes:
-    return resp.read() or b""
+# One keep-alive connection per thread and one limiter for the whole process, so
+# concurrent playlist workers share the request budget.
+_HTTP = PooledHttpClient()
+_LIMITER = RateLimiter(0.0)
 
 
 def http_request_json(
@@ -475,33 +489,21 @@ def http_request_json(
     body: Optional[bytes] = None,
     allow_unauthorized: bool = False,
 ) -> Dict[str, Any]:
-    req = urllib.request.Request(url, data=body, method=method)
-    for k, v in (headers or {}).items():
-        req.add_header(k, v)
-
-    try:
-        with urllib.request.urlopen(req) as resp:
-            raw = _read_http_body(resp)
-            if not raw:
-                return {}
-            return json.loads(raw.decode("utf-8"))
-    except urllib.error.HTTPError as e:
-        raw = e.read() or b""
+    status, resp_headers, raw = _HTTP.request(method, url, headers=headers, body=body)
+    if status >= 400:
         try:
-            payload = json.loads(raw.decode("utf-8")) if raw else {}
+            payload = loads(raw.decode("utf-8")) if raw else {}
         except Exception:
             payload = {"raw": raw.decode("utf-8", errors="replace")}
 
-        if e.code == 401 and not allow_unauthorized:
-            raise
+        if status == 401 and not allow_unauthorized:
+            raise urllib.error.HTTPError(url, status, "Unauthorized", resp_headers, None)
 
-        raise urllib.error.HTTPError(
-            e.url,
-            e.code,
-            str(payload),
-            e.headers,
-            e.fp,
-        )
+        raise urllib.error.HTTPError(url, status, str(payload), resp_headers, None)
+
+    if not raw:
+        return {}
+    return loads(raw.decode("utf-8"))
 
 
 def spotify_api_json(
@@ -528,11 +530,12 @@ def spotify_api_json(
         body: Optional[bytes] = None
         if body_obj is not None:
             headers["Content-Type"] = "application/json"
-            body = json.dumps(body_obj).encode("utf-8")
+            body = dumps(body_obj).encode("utf-8")
 
         try:
-            if throttle_ms > 0:
-                time.sleep(throttle_ms / 1000.0)
+            # Always through the limiter: with throttling off it still holds a 429 pause.
+            _LIMITER.wait(max(0, throttle_ms) / 1000.0)
+            _JOB.calls = getattr(_JOB, "calls", 0) + 1
             return http_request_json(method, url, headers=headers, body=body)
         except urllib.error.HTTPError as e:
             last_err = e
@@ -561,12 +564,19 @@ def spotify_api_json(
                 delay = min(cap, base * (2**attempt) * jitter)
                 if retry_after is not None:
                     delay = max(delay, retry_after)
-                print(f"HTTP {e.code} from Spotify; retrying in {delay:.1f}s...")
-                time.sleep(delay)
+                _log(f"HTTP {e.code} from Spotify; retrying in {delay:.1f}s...")
+                if e.code == 429:
+                    # Rate limits are per app: hold back every worker, not just this one.
+                    _LIMITER.pause(delay)
+                else:
+                    time.sleep(delay)
                 continue
 
             # otherwise, fail
             raise
+        except ResponseLostError:
+            # Re-sending could create or add twice; a resumed run re-checks against the checkpoint.
+            raise
         except Exception as e:
             last_err = e
             if attempt < max_retries:
@@ -574,7 +584,7 @@ def spotify_api_json(
                 cap = 60.0
                 jitter = 0.25 + (secrets.randbelow(1000) / 1000.0) * 0.75
                 delay = min(cap, base * (2**attempt) * jitter)
-                print(f"Request error; retrying in {delay:.1f}s... ({e})")
+                _log(f"Request error; retrying in {delay:.1f}s... ({e})")
                 time.sleep(delay)
                 continue
             raise
@@ -588,30 +598,6 @@ def _spotify_get_me(token_store: TokenStore, throttle_ms: int) -> Dict[str, Any]
     return spotify_api_json(token_store, "GET", "/v1/me", throttle_ms=throttle_ms)
 
 
-def _spotify_find_playlist_by_name(
-    token_store: TokenStore, name: str, throttle_ms: int
-) -> Optional[Dict[str, Any]]:
-    limit = 50
-    offset = 0
-    while True:
-        page = spotify_api_json(
-            token_store,
-            "GET",
-            "/v1/me/playlists",
-            query={"limit": limit, "offset": offset},
-            throttle_ms=throttle_ms,
-        )
-        items = page.get("items")
-        if not isinstance(items, list):
-            return None
-        for pl in items:
-            if isinstance(pl, dict) and pl.get("name") == name:
-                return pl
-        if page.get("next") is None:
-            return None
-        offset += limit
-
-
 def _spotify_unfollow_playlist(token_store: TokenStore, playlist_id: str, throttle_ms: int) -> None:
     spotify_api_json(
         token_store,
@@ -650,6 +636,453 @@ def _spotify_add_tracks(
     )
 
 
+def _spotify_get_playlist_meta(token_store: TokenStore, playlist_id: str, throttle_ms: int) -> Dict[str, Any]:
+    return spotify_api_json(
+        token_store,
+        "GET",
+        f"/v1/playlists/{playlist_id}",
+        query={"fields": "id,name,snapshot_id,tracks.total,owner.id"},
+        throttle_ms=throttle_ms,
+    )
+
+
+def _spotify_get_playlist_track_uris(
+    token_store: TokenStore, playlist_id: str, throttle_ms: int
+) -> List[Optional[str]]:
+    """All track URIs in playlist order; None for entries without a URI (e.g. unavailable tracks)."""
+    limit = 100
+    offset = 0
+    out: List[Optional[str]] = []
+    while True:
+        page = spotify_api_json(
+            token_store,
+            "GET",
+            f"/v1/playlists/{playlist_id}/tracks",
+            query={"limit": limit, "offset": offset, "fields": "items(track(uri)),next"},
+            throttle_ms=throttle_ms,
+        )
+        items = page.get("items")
+        if not isinstance(items, list):
+            break
+        for it in items:
+            track = it.get("track") if isinstance(it, dict) else None
+            uri = track.get("uri") if isinstance(track, dict) else None
+            out.append(uri if isinstance(uri, str) and uri else None)
+        if page.get("next") is None:
+            break
+        offset += limit
+    return out
+
+
+def _spotify_remove_tracks(
+    token_store: TokenStore, playlist_id: str, uris: List[str], snapshot_id: str, throttle_ms: int
+) -> Dict[str, Any]:
+    body: Dict[str, Any] = {"tracks": [{"uri": u} for u in uris]}
+    if snapshot_id:
+        body["snapshot_id"] = snapshot_id
+    return spotify_api_json(
+        token_store,
+        "DELETE",
+        f"/v1/playlists/{playlist_id}/tracks",
+        body_obj=body,
+        throttle_ms=throttle_ms,
+    )
+
+
+def _spotify_insert_tracks(
+    token_store: TokenStore, playlist_id: str, uris: List[str], position: int, throttle_ms: int
+) -> Dict[str, Any]:
+    return spotify_api_json(
+        token_store,
+        "POST",
+        f"/v1/playlists/{playlist_id}/tracks",
+        body_obj={"uris": uris, "position": int(position)},
+        throttle_ms=throttle_ms,
+    )
+
+
+def _spotify_reorder_tracks(
+    token_store: TokenStore,
+    playlist_id: str,
+    range_start: int,
+    insert_before: int,
+    range_length: int,
+    snapshot_id: str,
+    throttle_ms: int,
+) -> Dict[str, Any]:
+    body: Dict[str, Any] = {
+        "range_start": int(range_start),
+        "insert_before": int(insert_before),
+        "range_length": int(range_length),
+    }
+    if snapshot_id:
+        body["snapshot_id"] = snapshot_id
+    return spotify_api_json(
+        token_store,
+        "PUT",
+        f"/v1/playlists/{playlist_id}/tracks",
+        body_obj=body,
+        throttle_ms=throttle_ms,
+    )
+
+
+def _playlist_summary(pl: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    pid = pl.get("id")
+    if not isinstance(pid, str) or not pid:
+        return None
+    tracks = pl.get("tracks")
+    owner = pl.get("owner")
+    return {
+        "id": pid,
+        "name": str(pl.get("name") or ""),
+        "snapshot_id": str(pl.get("snapshot_id") or ""),
+        "tracks_total": int(tracks.get("total", 0)) if isinstance(tracks, dict) else 0,
+        "owner_id": str(owner.get("id") or "") if isinstance(owner, dict) else "",
+    }
+
+
+class PlaylistMirror:
+    """
+    Persisted copy of the user's playlist metadata (id, name, snapshot_id, track count).
+
+    Name lookups are answered from the mirror and confirmed with a single
+    GET /v1/playlists/{id}; otherwise /v1/me/playlists is re-read only until a page
+    matches what is already mirrored (new playlists show up at the top). That shortcut
+    needs a mirror that once held the whole library: `complete` is set only by a walk
+    that reached the last page.
+    """
+
+    def __init__(self, path: Path):
+        self._path = path
+        self.user_id = ""
+        self.total: Optional[int] = None
+        self.complete = False
+        self.playlists: Dict[str, Dict[str, Any]] = {}
+        # Batch workers share one mirror; network calls happen outside the lock.
+        self._lock = threading.RLock()
+
+    def load(self) -> "PlaylistMirror":
+        if self._path.exists():
+            try:
+                obj = loads(_read_text_file(self._path))
+            except Exception:
+                obj = {}
+            if isinstance(obj, dict) and isinstance(obj.get("playlists"), dict):
+                self.user_id = str(obj.get("user_id") or "")
+                self.total = obj.get("total") if isinstance(obj.get("total"), int) else None
+                self.complete = obj.get("complete") is True
+                self.playlists = {k: v for k, v in obj["playlists"].items() if isinstance(v, dict)}
+        return self
+
+    def save(self) -> None:
+        with self._lock:
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self._path.with_suffix(self._path.suffix + ".tmp")
+            obj = {
+                "user_id": self.user_id,
+                "total": self.total,
+                "complete": self.complete,
+                "saved_at": int(_now()),
+                "playlists": self.playlists,
+            }
+            tmp.write_text(dumps_pretty(obj, ensure_ascii=True) + "\n", encoding="utf-8")
+            tmp.replace(self._path)
+
+    def put(self, pl: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        summary = _playlist_summary(pl)
+        if summary is not None:
+            with self._lock:
+                self.playlists[summary["id"]] = summary
+        return summary
+
+    def forget(self, playlist_id: str) -> None:
+        with self._lock:
+            self.playlists.pop(playlist_id, None)
+
+    def set_snapshot(self, playlist_id: str, snapshot_id: str, tracks_total: Optional[int] = None) -> None:
+        with self._lock:
+            entry = self.playlists.get(playlist_id)
+            if entry is None:
+                return
+            if snapshot_id:
+                entry["snapshot_id"] = snapshot_id
+            if tracks_total is not None:
+                entry["tracks_total"] = int(tracks_total)
+
+    def by_name(self, name: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            for entry in self.playlists.values():
+                if entry.get("name") == name:
+                    return dict(entry)
+        return None
+
+    def validate(self, token_store: TokenStore, playlist_id: str, throttle_ms: int) -> Optional[Dict[str, Any]]:
+        """Re-read one playlist's metadata; drops it from the mirror if it is gone."""
+        try:
+            meta = _spotify_get_playlist_meta(token_store, playlist_id, throttle_ms=throttle_ms)
+        except urllib.error.HTTPError as e:
+            if e.code in (403, 404):
+                self.forget(playlist_id)
+                return None
+            raise
+        return self.put(meta)
+
+    def refresh(self, token_store: TokenStore, throttle_ms: int, *, stop_at_name: str = "") -> None:
+        """
+        Incrementally re-read /v1/me/playlists. Stops once stop_at_name is seen or, if the
+        mirror is complete, after the first page that is entirely known with unchanged
+        snapshot_ids (and unchanged total); an incomplete mirror is walked to the end, so a
+        name missing afterwards is really absent. Reaching the last page drops playlists
+        that are no longer in the library and marks the mirror complete.
+        """
+        limit = 50
+        offset = 0
+        seen: set[str] = set()
+        while True:
+            page = spotify_api_json(
+                token_store,
+                "GET",
+                "/v1/me/playlists",
+                query={"limit": limit, "offset": offset},
+                throttle_ms=throttle_ms,
+            )
+            items = page.get("items")
+            if not isinstance(items, list):
+                return
+            unchanged = True
+            found = False
+            with self._lock:
+                for pl in items:
+                    if not isinstance(pl, dict):
+                        continue
+                    summary = _playlist_summary(pl)
+                    if summary is None:
+                        continue
+                    seen.add(summary["id"])
+                    old = self.playlists.get(summary["id"])
+                    if old is None or old.get("snapshot_id") != summary["snapshot_id"]:
+                        unchanged = False
+                    self.playlists[summary["id"]] = summary
+                    if stop_at_name and summary["name"] == stop_at_name:
+                        found = True
+                total = page.get("total")
+                if isinstance(total, int) and total != self.total:
+                    unchanged = False
+                    self.total = total
+                if page.get("next") is None:
+                    for pid in list(self.playlists):
+                        if pid not in seen:
+                            self.playlists.pop(pid, None)
+                    self.complete = True
+                    return
+                if found or (unchanged and self.complete):
+                    return
+            offset += limit
+
+    def ensure_user_id(self, token_store: TokenStore, throttle_ms: int) -> str:
+        if not self.user_id:
+            me = _spotify_get_me(token_store, throttle_ms=throttle_ms)
+            user_id = me.get("id")
+            if not isinstance(user_id, str) or not user_id:
+                raise SystemExit("Failed to get Spotify user ID from /v1/me")
+            self.user_id = user_id
+        return self.user_id
+
+
+def _spotify_find_playlist_by_name(
+    token_store: TokenStore, mirror: PlaylistMirror, name: str, throttle_ms: int
+) -> Optional[Dict[str, Any]]:
+    cached = mirror.by_name(name)
+    if cached is not None:
+        fresh = mirror.validate(token_store, cached["id"], throttle_ms=throttle_ms)
+        if fresh is not None and fresh.get("name") == name:
+            return fresh
+    mirror.refresh(token_store, throttle_ms=throttle_ms, stop_at_name=name)
+    return mirror.by_name(name)
+
+
+def _lis_indices(seq: List[int]) -> List[int]:
+    """Indices of a longest strictly increasing subsequence (O(n log n) patience sort)."""
+    if not seq:
+        return []
+    tails: List[int] = []
+    tails_idx: List[int] = []
+    prev: List[int] = [-1] * len(seq)
+    for i, x in enumerate(seq):
+        j = bisect.bisect_left(tails, x)
+        if j == len(tails):
+            tails.append(x)
+            tails_idx.append(i)
+        else:
+            tails[j] = x
+            tails_idx[j] = i
+        if j > 0:
+            prev[i] = tails_idx[j - 1]
+    k = tails_idx[-1]
+    out: List[int] = []
+    while k != -1:
+        out.append(k)
+        k = prev[k]
+    out.reverse()
+    return out
+
+
+def _occurrence_keys(uris: List[Optional[str]]) -> List[Tuple[Optional[str], int]]:
+    seen: Dict[Optional[str], int] = {}
+    keys: List[Tuple[Optional[str], int]] = []
+    for u in uris:
+        n = seen.get(u, 0)
+        seen[u] = n + 1
+        keys.append((u, n))
+    return keys
+
+
+def _plan_sync(current: List[Optional[str]], desired: List[str]) -> List[Dict[str, Any]]:
+    """
+    Compute a small edit script that turns `current` into `desired`:
+      1. remove URIs that have surplus occurrences (the remove endpoint drops every
+         occurrence of a URI, so such URIs are removed entirely and re-added below),
+      2. reorder the kept tracks, moving only those outside a LIS (runs that are
+         contiguous in both orders move as one range),
+      3. insert missing tracks at their final positions, contiguous runs batched.
+
+    Duplicate URIs are matched by occurrence number.
+    """
+    if any(u is None for u in current):
+        raise SystemExit(
+            "Existing playlist contains entries without a track URI (unavailable/local tracks); "
+            "cannot sync in place. Re-run with --no-sync to rebuild it."
+        )
+
+    ops: List[Dict[str, Any]] = []
+
+    cur_keys = _occurrence_keys(current)
+    des_keys = _occurrence_keys(list(desired))
+    des_index = {k: i for i, k in enumerate(des_keys)}
+
+    doomed = sorted({u for (u, _) in cur_keys if (u, _) not in des_index and u is not None})
+    doomed_set = set(doomed)
+    for i in range(0, len(doomed), 100):
+        ops.append({"op": "remove", "uris": doomed[i : i + 100]})
+
+    work = [k for k in cur_keys if k[0] not in doomed_set]
+    seq = [des_index[k] for k in work]
+    keep = {work[i] for i in _lis_indices(seq)}
+    target = sorted(work, key=lambda k: des_index[k])
+
+    i = 0
+    while i < len(target):
+        key = target[i]
+        if key in keep:
+            i += 1
+            continue
+        # Extend over following targets that are also moving and already sit right after it.
+        from_idx = work.index(key)
+        run = 1
+        while (
+            i + run < len(target)
+            and target[i + run] not in keep
+            and from_idx + run < len(work)
+            and work[from_idx + run] == target[i + run]
+        ):
+            run += 1
+        insert_before = work.index(target[i - 1]) + 1 if i > 0 else 0
+        if insert_before != from_idx:
+            ops.append({"op": "move", "range_start": from_idx, "insert_before": insert_before, "range_length": run})
+            block = work[from_idx : from_idx + run]
+            del work[from_idx : from_idx + run]
+            dest = insert_before if insert_before < from_idx else insert_before - run
+            work[dest:dest] = block
+        i += run
+
+    kept = set(work)
+    pos = 0
+    while pos < len(des_keys):
+        if des_keys[pos] in kept:
+            pos += 1
+            continue
+        end = pos
+        while end < len(des_keys) and des_keys[end] not in kept:
+            end += 1
+        for start in range(pos, end, 100):
+            ops.append({"op": "add", "position": start, "uris": [k[0] for k in des_keys[start : min(end, start + 100)]]})
+        work[pos:pos] = des_keys[pos:end]
+        pos = end
+
+    if [k[0] for k in work] != list(desired):
+        raise RuntimeError("Internal error: sync plan does not reproduce the desired order")
+    return ops
+
+
+def _run_sync(
+    token_store: TokenStore,
+    mirror: PlaylistMirror,
+    playlist_id: str,
+    uris: List[str],
+    checkpoint: Dict[str, Any],
+    checkpoint_path: Path,
+    throttle_ms: int,
+    meta: Optional[Dict[str, Any]] = None,
+) -> int:
+    """Bring an existing playlist in line with `uris` using only the edits that are needed.
+
+    `meta` may carry metadata that was just fetched (e.g. by the name lookup) to save a call.
+    """
+    if meta is None:
+        meta = mirror.validate(token_store, playlist_id, throttle_ms=throttle_ms)
+    if meta is None:
+        raise SystemExit(f"Playlist {playlist_id} no longer exists; re-run with --no-resume to start over.")
+    snapshot_id = str(meta.get("snapshot_id") or "")
+
+    ops = checkpoint.get("ops")
+    next_op = int(checkpoint.get("next_op", 0))
+    if not isinstance(ops, list) or checkpoint.get("snapshot_id") != snapshot_id:
+        # Fresh start, or the playlist changed since the plan was made: re-diff.
+        current = _spotify_get_playlist_track_uris(token_store, playlist_id, throttle_ms=throttle_ms)
+        ops = _plan_sync(current, uris)
+        next_op = 0
+        counts = {k: sum(1 for o in ops if o["op"] == k) for k in ("remove", "move", "add")}
+        _log(
+            f"Sync plan for {playlist_id}: {len(current)} -> {len(uris)} tracks; "
+            f"{counts['remove']} remove, {counts['move']} move, {counts['add']} add call(s)."
+        )
+    else:
+        _log(f"Resuming sync: op {next_op + 1}/{len(ops)}")
+
+    checkpoint.update({"ops": ops, "next_op": next_op, "snapshot_id": snapshot_id})
+    checkpoint_path.write_text(dumps_pretty(checkpoint, ensure_ascii=True) + "\n", encoding="utf-8")
+
+    while next_op < len(ops):
+        op = ops[next_op]
+        if op["op"] == "remove":
+            resp = _spotify_remove_tracks(token_store, playlist_id, op["uris"], snapshot_id, throttle_ms=throttle_ms)
+        elif op["op"] == "move":
+            resp = _spotify_reorder_tracks(
+                token_store,
+                playlist_id,
+                op["range_start"],
+                op["insert_before"],
+                op["range_length"],
+                snapshot_id,
+                throttle_ms=throttle_ms,
+            )
+        else:
+            resp = _spotify_insert_tracks(token_store, playlist_id, op["uris"], op["position"], throttle_ms=throttle_ms)
+        snapshot_id = str(resp.get("snapshot_id") or snapshot_id)
+        mirror.set_snapshot(playlist_id, snapshot_id)
+        next_op += 1
+        checkpoint["next_op"] = next_op
+        checkpoint["snapshot_id"] = snapshot_id
+        checkpoint_path.write_text(dumps_pretty(checkpoint, ensure_ascii=True) + "\n", encoding="utf-8")
+
+    mirror.set_snapshot(playlist_id, snapshot_id, tracks_total=len(uris))
+    checkpoint["status"] = "completed"
+    checkpoint["completed_at"] = int(_now())
+    checkpoint_path.write_text(dumps_pretty(checkpoint, ensure_ascii=True) + "\n", encoding="utf-8")
+    _log(f"Done. Synced '{checkpoint.get('playlist_name')}' with {len(ops)} API edit(s).")
+    return 0
+
+
 def _default_checkpoint_path() -> Path:
     return Path(__file__).resolve().parent / ".spotify-playlist-checkpoint.json"
 
@@ -658,101 +1091,42 @@ def _default_token_path() -> Path:
     return Path(__file__).resolve().parent / ".spotify-oauth-token.json"
 
 
-def main() -> int:
-    ap = argparse.ArgumentParser(
-        description="Create a (public) Spotify playlist from polaris-player-2 JSON items (expects spotifyId fields)."
-    )
-    ap.add_argument("--json", required=True, help="Path to playlist JSON (e.g. public/local-playlist.json)")
-    ap.add_argument(
-        "--path",
-        default="",
-        help="Dot-path to the items array (e.g. user__wave_alternatives.items). If omitted, script will try to guess.",
-    )
-    ap.add_argument(
-        "--name",
-        default="",
-        help="Target playlist name. If omitted, uses the JSON playlist's title.",
-    )
-    ap.add_argument(
-        "--replace",
-        action=argparse.BooleanOptionalAction,
-        default=True,
-        help="Replace (unfollow) any existing playlist with the same name when starting fresh.",
-    )
-    ap.add_argument(
-        "--resume",
-        action=argparse.BooleanOptionalAction,
-        default=True,
-        help="Resume a previously-started run using the checkpoint file.",
-    )
-    ap.add_argument(
-        "--checkpoint",
-        default="",
-        help="Path to checkpoint file (default: utility/.spotify-playlist-checkpoint.json)",
-    )
-    ap.add_argument(
-        "--token",
-        default="",
-        help="Path to token cache (default: utility/.spotify-oauth-token.json)",
-    )
-    ap.add_argument(
-        "--public",
-        action=argparse.BooleanOptionalAction,
-        default=True,
-        help="Create a public playlist.",
-    )
-    ap.add_argument(
-        "--description",
-        default="Created by polaris-player-2 utility/create-spotify-playlist.py",
-        help="Playlist description.",
-    )
-    ap.add_argument("--client-id", default="", help="Spotify app client ID (overrides .spotify.env)")
-    ap.add_argument("--env-file", default="", help="Path to .spotify.env (optional)")
-    ap.add_argument(
-        "--redirect-uri",
-        default="http://127.0.0.1:8888/callback",
-        help="Must match a Redirect URI configured in your Spotify app.",
-    )
-    ap.add_argument(
-        "--open-browser",
-        action=argparse.BooleanOptionalAction,
-        default=True,
-        help="Open the Spotify auth URL in a browser.",
-    )
-    ap.add_argument(
-        "--copy-auth-url",
-        action=argparse.BooleanOptionalAction,
-        default=False,
-        help="Copy the Spotify auth URL to clipboard (macOS pbcopy) to avoid line-wrap copy issues.",
-    )
-    ap.add_argument(
-        "--throttle-ms",
-        type=int,
-        default=250,
-        help="Minimum delay between Spotify API requests.",
-    )
+def _default_mirror_path() -> Path:
+    return Path(__file__).resolve().parent / ".spotify-playlists.json"
+
+
+@dataclass
+class PublishJob:
+    json_path: Path
+    items_path: str
+    playlist_name: str
+    uris: List[str]
+    uri_hash: str
+    skipped: int
 
-    args = ap.parse_args()
 
-    json_path = Path(args.json)
+def _prepare_job(json_path: Path, path_arg: str, name_arg: str) -> PublishJob:
+    """Resolve items, name and track URIs for one playlist file."""
     if not json_path.exists():
         raise SystemExit(f"JSON file not found: {json_path}")
 
-    root = json.loads(_read_text_file(json_path))
-    items_path = args.path.strip() or _guess_items_path(root)
+    root = load_path(json_path)
+    items_path = path_arg or _guess_items_path(root)
 
     # For title inference, if path ends with .items
     playlist_obj: Optional[Dict[str, Any]] = None
-    if items_path.endswith(".items"):
+    if items_path == "items" and isinstance(root, dict):
+        playlist_obj = root
+    elif items_path.endswith(".items"):
         prefix = items_path[: -len(".items")].rstrip(".")
         try:
-            obj = _navigate_json_path(root, prefix)
+            obj = compile_path(prefix).get(root)
             if isinstance(obj, dict):
                 playlist_obj = obj
         except Exception:
             playlist_obj = None
 
-    items = _navigate_json_path(root, items_path)
+    items = compile_path(items_path).get(root)
     if not isinstance(items, list):
         raise SystemExit(f"Resolved --path '{items_path}' but it is not an array.")
 
@@ -762,7 +1136,7 @@ def main() -> int:
         if isinstance(t, str):
             title = t
 
-    playlist_name = (args.name or title).strip()
+    playlist_name = (name_arg or title).strip()
     if not playlist_name:
         raise SystemExit("Missing playlist name. Provide --name or ensure JSON contains a title.")
 
@@ -778,78 +1152,218 @@ def main() -> int:
     if not uris:
         raise SystemExit(f"No Spotify track IDs found at '{items_path}'.")
 
-    uri_hash = _sha256_of_lines(uris)
-
-    checkpoint_path = Path(args.checkpoint).expanduser() if args.checkpoint else _default_checkpoint_path()
-    token_path = Path(args.token).expanduser() if args.token else _default_token_path()
-
-    client_id = _find_spotify_client_id(args.env_file or None, args.client_id or None)
-    token_store = TokenStore(token_path, client_id)
+    return PublishJob(
+        json_path=json_path,
+        items_path=items_path,
+        playlist_name=playlist_name,
+        uris=uris,
+        uri_hash=_sha256_of_lines(uris),
+        skipped=skipped,
+    )
 
-    # Minimum needed for this script:
-    # - create playlist (public/private)
-    # - add tracks
-    # - list playlists by name
-    scope = "playlist-modify-public playlist-modify-private playlist-read-private"
 
+def _resumable_checkpoint(job: PublishJob, checkpoint_path: Path, resume: bool) -> Dict[str, Any]:
+    """The checkpoint to resume from, or {} when starting fresh."""
     checkpoint: Dict[str, Any] = {}
-    if args.resume and checkpoint_path.exists():
+    if resume and checkpoint_path.exists():
         try:
-            checkpoint = json.loads(_read_text_file(checkpoint_path))
+            checkpoint = load_path(checkpoint_path)
         except Exception:
             checkpoint = {}
 
     def checkpoint_matches(cp: Dict[str, Any]) -> bool:
         return (
-            cp.get("source_json") == str(json_path)
-            and cp.get("source_path") == items_path
-            and cp.get("playlist_name") == playlist_name
-            and cp.get("uri_hash") == uri_hash
+            cp.get("source_json") == str(job.json_path)
+            and cp.get("source_path") == job.items_path
+            and cp.get("playlist_name") == job.playlist_name
+            and cp.get("uri_hash") == job.uri_hash
             and isinstance(cp.get("playlist_id"), str)
         )
 
     resuming = (
-        args.resume
+        resume
         and isinstance(checkpoint, dict)
         and checkpoint_matches(checkpoint)
         and checkpoint.get("status") == "in_progress"
     )
+    return checkpoint if resuming else {}
+
+
+def _index_entries(index_path: Path) -> List[Path]:
+    """
+    Playlist files listed in an index such as public/video-hosted/default-playlists.json.
+    Entries are relative to the web root ("./video-hosted/..."), so they are tried against
+    the index's folder and its parent.
+    """
+    entries = load_path(index_path)
+    if not isinstance(entries, list):
+        raise SystemExit(f"Index {index_path} is not a JSON array of playlist paths.")
+    out: List[Path] = []
+    for entry in entries:
+        if not isinstance(entry, str) or not entry.strip():
+            continue
+        candidates = [index_path.parent / entry, index_path.parent.parent / entry]
+        found = next((c for c in candidates if c.is_file()), None)
+        if found is None:
+            raise SystemExit(f"Playlist '{entry}' from {index_path} not found.")
+        out.append(found.resolve())
+    return out
 
-    # Ensure we have a token (refresh if cached)
-    tok = token_store.load()
-    if tok is None:
-        tok = _pkce_authorize_and_exchange(
-            client_id=client_id,
-            redirect_uri=args.redirect_uri,
-            scope=scope,
-            token_store=token_store,
-            open_browser=bool(args.open_browser),
-            copy_auth_url=bool(args.copy_auth_url),
-        )
-    else:
-        token_store.ensure_valid()
 
-    me = _spotify_get_me(token_store, throttle_ms=args.throttle_ms)
-    user_id = me.get("id")
-    if not isinstance(user_id, str) or not user_id:
-        raise SystemExit("Failed to get Spotify user ID from /v1/me")
+def _batch_checkpoint_path(job: PublishJob) -> Path:
+    """Each index entry's own checkpoint; the hash tells apart a/playlist.json and b/playlist.json."""
+    base = _default_checkpoint_path()
+    entry = "\0".join((str(job.json_path.resolve()), job.items_path, job.playlist_name))
+    tag = hashlib.sha256(entry.encode("utf-8")).hexdigest()[:10]
+    return base.with_name(f"{base.stem}.{job.json_path.stem}-{tag}{base.suffix}")
+
+
+def _run_batch(
+    args: argparse.Namespace,
+    token_store: TokenStore,
+    mirror: PlaylistMirror,
+    jobs: List[PublishJob],
+    skipped_files: Dict[str, str],
+) -> int:
+    """Publish several playlists concurrently over the shared connection pool and rate limiter."""
+
+    def run(job: PublishJob) -> Dict[str, Any]:
+        _JOB.prefix = f"[{job.playlist_name}] "
+        _JOB.calls = 0
+        started = time.monotonic()
+        checkpoint_path = _batch_checkpoint_path(job)
+        status = "ok"
+        error = ""
+        try:
+            rc = _publish(
+                args,
+                token_store,
+                mirror,
+                checkpoint=_resumable_checkpoint(job, checkpoint_path, bool(args.resume)),
+                checkpoint_path=checkpoint_path,
+                json_path=job.json_path,
+                items_path=job.items_path,
+                playlist_name=job.playlist_name,
+                uris=job.uris,
+                uri_hash=job.uri_hash,
+                skipped=job.skipped,
+            )
+            if rc != 0:
+                status = "failed"
+        except (Exception, SystemExit) as e:
+            status = "failed"
+            error = str(e)
+            _log(f"Failed: {e}")
+        return {
+            "json": str(job.json_path),
+            "name": job.playlist_name,
+            "status": status,
+            "tracks": len(job.uris),
+            "skipped_items": job.skipped,
+            "api_calls": _JOB.calls,
+            "seconds": round(time.monotonic() - started, 1),
+            "checkpoint": str(checkpoint_path),
+            **({"error": error} if error else {}),
+        }
+
+    started = time.monotonic()
+    # Largest first, so the longest pipeline starts immediately and the rest fill in around it.
+    ordered = sorted(jobs, key=lambda j: len(j.uris), reverse=True)
+    with ThreadPoolExecutor(max_workers=max(1, int(args.jobs))) as pool:
+        results = {r.pop("json"): r for r in pool.map(run, ordered)}
+
+    report = {
+        "playlists": results,
+        "skipped_files": skipped_files,
+        "ok": sum(1 for r in results.values() if r["status"] == "ok"),
+        "failed": sum(1 for r in results.values() if r["status"] != "ok"),
+        "tracks": sum(r["tracks"] for r in results.values()),
+        "api_calls": sum(r["api_calls"] for r in results.values()),
+        "seconds": round(time.monotonic() - started, 1),
+    }
+    print(json.dumps(report, indent=2))
+    return 0 if report["failed"] == 0 else 1
+
 
+def _publish(
+    args: argparse.Namespace,
+    token_store: TokenStore,
+    mirror: PlaylistMirror,
+    *,
+    checkpoint: Dict[str, Any],
+    checkpoint_path: Path,
+    json_path: Path,
+    items_path: str,
+    playlist_name: str,
+    uris: List[str],
+    uri_hash: str,
+    skipped: int,
+) -> int:
     playlist_id: Optional[str] = None
     next_index = 0
 
-    if resuming:
+    if checkpoint.get("mode") == "sync":
+        return _run_sync(
+            token_store,
+            mirror,
+            str(checkpoint.get("playlist_id")),
+            uris,
+            checkpoint,
+            checkpoint_path,
+            throttle_ms=args.throttle_ms,
+        )
+
+    if checkpoint:
         playlist_id = str(checkpoint.get("playlist_id"))
         next_index = int(checkpoint.get("next_index", 0))
         total = int(checkpoint.get("total", len(uris)))
-        print(f"Resuming: playlist_id={playlist_id}, next_index={next_index}/{total}")
-    else:
-        existing = _spotify_find_playlist_by_name(token_store, playlist_name, throttle_ms=args.throttle_ms)
+        live = mirror.validate(token_store, playlist_id, throttle_ms=args.throttle_ms)
+        if live is None:
+            _log(f"Checkpointed playlist {playlist_id} no longer exists; starting over.")
+            playlist_id = None
+            next_index = 0
+        else:
+            # A batch may have landed after the last checkpoint write (e.g. killed mid-request).
+            landed = int(live.get("tracks_total", 0))
+            if next_index < landed <= total:
+                next_index = landed
+            _log(f"Resuming: playlist_id={playlist_id}, next_index={next_index}/{total}")
+
+    if playlist_id is None:
+        existing = _spotify_find_playlist_by_name(token_store, mirror, playlist_name, throttle_ms=args.throttle_ms)
+        existing_id = existing.get("id") if existing else None
+        if args.sync and isinstance(existing_id, str) and existing_id:
+            checkpoint = {
+                "status": "in_progress",
+                "mode": "sync",
+                "created_at": int(_now()),
+                "source_json": str(json_path),
+                "source_path": items_path,
+                "playlist_name": playlist_name,
+                "playlist_id": existing_id,
+                "total": len(uris),
+                "skipped_items": skipped,
+                "uri_hash": uri_hash,
+            }
+            return _run_sync(
+                token_store,
+                mirror,
+                existing_id,
+                uris,
+                checkpoint,
+                checkpoint_path,
+                throttle_ms=args.throttle_ms,
+                meta=existing,
+            )
+
         if existing and args.replace:
             old_id = existing.get("id")
             if isinstance(old_id, str) and old_id:
-                print(f"Unfollowing existing playlist '{playlist_name}' ({old_id})")
+                _log(f"Unfollowing existing playlist '{playlist_name}' ({old_id})")
                 _spotify_unfollow_playlist(token_store, old_id, throttle_ms=args.throttle_ms)
+                mirror.forget(old_id)
 
+        user_id = mirror.ensure_user_id(token_store, throttle_ms=args.throttle_ms)
         created = _spotify_create_playlist(
             token_store,
             user_id,
@@ -861,6 +1375,8 @@ def main() -> int:
         playlist_id = created.get("id")
         if not isinstance(playlist_id, str) or not playlist_id:
             raise SystemExit("Failed to create playlist (missing id)")
+        mirror.put(created)
+        mirror.save()
 
         checkpoint = {
             "status": "in_progress",
@@ -875,17 +1391,17 @@ def main() -> int:
             "skipped_items": skipped,
             "uri_hash": uri_hash,
         }
-        checkpoint_path.write_text(json.dumps(checkpoint, indent=2) + "\n", encoding="utf-8")
-        print(f"Created playlist '{playlist_name}' ({playlist_id})")
+        checkpoint_path.write_text(dumps_pretty(checkpoint, ensure_ascii=True) + "\n", encoding="utf-8")
+        _log(f"Created playlist '{playlist_name}' ({playlist_id})")
 
     assert playlist_id is not None
 
     total = len(uris)
     if next_index >= total:
-        print("Nothing to do; checkpoint already complete.")
+        _log("Nothing to do; checkpoint already complete.")
         checkpoint["status"] = "completed"
         checkpoint["completed_at"] = int(_now())
-        checkpoint_path.write_text(json.dumps(checkpoint, indent=2) + "\n", encoding="utf-8")
+        checkpoint_path.write_text(dumps_pretty(checkpoint, ensure_ascii=True) + "\n", encoding="utf-8")
         return 0
 
     # Add in batches of 100.
@@ -893,19 +1409,193 @@ def main() -> int:
     i = next_index
     while i < total:
         batch = uris[i : i + batch_size]
-        print(f"Adding tracks {i + 1}-{min(i + len(batch), total)} of {total}...")
-        _spotify_add_tracks(token_store, playlist_id, batch, throttle_ms=args.throttle_ms)
+        _log(f"Adding tracks {i + 1}-{min(i + len(batch), total)} of {total}...")
+        resp = _spotify_add_tracks(token_store, playlist_id, batch, throttle_ms=args.throttle_ms)
         i += len(batch)
+        mirror.set_snapshot(playlist_id, str(resp.get("snapshot_id") or ""), tracks_total=i)
         checkpoint["next_index"] = i
-        checkpoint_path.write_text(json.dumps(checkpoint, indent=2) + "\n", encoding="utf-8")
+        checkpoint_path.write_text(dumps_pretty(checkpoint, ensure_ascii=True) + "\n", encoding="utf-8")
 
     checkpoint["status"] = "completed"
     checkpoint["completed_at"] = int(_now())
-    checkpoint_path.write_text(json.dumps(checkpoint, indent=2) + "\n", encoding="utf-8")
+    checkpoint_path.write_text(dumps_pretty(checkpoint, ensure_ascii=True) + "\n", encoding="utf-8")
 
-    print(f"Done. Added {total} tracks to '{playlist_name}'. Skipped items without Spotify IDs: {skipped}.")
+    _log(f"Done. Added {total} tracks to '{playlist_name}'. Skipped items without Spotify IDs: {skipped}.")
     return 0
 
 
+def main() -> int:
+    ap = argparse.ArgumentParser(
+        description="Create a (public) Spotify playlist from polaris-player-2 JSON items (expects spotifyId fields)."
+    )
+    ap.add_argument("--json", default="", help="Path to playlist JSON (e.g. public/local-playlist.json)")
+    ap.add_argument(
+        "--index",
+        default="",
+        help=(
+            "Publish every playlist listed in an index file (e.g. public/video-hosted/default-playlists.json) "
+            "concurrently, each with its own checkpoint. Replaces --json/--path/--name."
+        ),
+    )
+    ap.add_argument(
+        "--jobs",
+        type=int,
+        default=4,
+        help="Playlists published concurrently with --index (they share one rate limit).",
+    )
+    ap.add_argument(
+        "--path",
+        default="",
+        help="Dot-path to the items array (e.g. user__wave_alternatives.items). If omitted, script will try to guess.",
+    )
+    ap.add_argument(
+        "--name",
+        default="",
+        help="Target playlist name. If omitted, uses the JSON playlist's title.",
+    )
+    ap.add_argument(
+        "--replace",
+        action=argparse.BooleanOptionalAction,
+        default=True,
+        help="Replace (unfollow) any existing playlist with the same name when starting fresh.",
+    )
+    ap.add_argument(
+        "--sync",
+        action=argparse.BooleanOptionalAction,
+        default=False,
+        help=(
+            "If a playlist with the same name exists, edit it in place (remove/reorder/insert only what "
+            "differs) instead of replacing it. Keeps followers and links."
+        ),
+    )
+    ap.add_argument(
+        "--resume",
+        action=argparse.BooleanOptionalAction,
+        default=True,
+        help="Resume a previously-started run using the checkpoint file.",
+    )
+    ap.add_argument(
+        "--checkpoint",
+        default="",
+        help="Path to checkpoint file (default: utility/.spotify-playlist-checkpoint.json)",
+    )
+    ap.add_argument(
+        "--token",
+        default="",
+        help="Path to token cache (default: utility/.spotify-oauth-token.json)",
+    )
+    ap.add_argument(
+        "--playlist-cache",
+        default="",
+        help="Path to the local mirror of your playlists' metadata (default: utility/.spotify-playlists.json)",
+    )
+    ap.add_argument(
+        "--public",
+        action=argparse.BooleanOptionalAction,
+        default=True,
+        help="Create a public playlist.",
+    )
+    ap.add_argument(
+        "--description",
+        default="Created by polaris-player-2 utility/create-spotify-playlist.py",
+        help="Playlist description.",
+    )
+    ap.add_argument("--client-id", default="", help="Spotify app client ID (overrides .spotify.env)")
+    ap.add_argument("--env-file", default="", help="Path to .spotify.env (optional)")
+    ap.add_argument(
+        "--redirect-uri",
+        default="http://127.0.0.1:8888/callback",
+        help="Must match a Redirect URI configured in your Spotify app.",
+    )
+    ap.add_argument(
+        "--open-browser",
+        action=argparse.BooleanOptionalAction,
+        default=True,
+        help="Open the Spotify auth URL in a browser.",
+    )
+    ap.add_argument(
+        "--copy-auth-url",
+        action=argparse.BooleanOptionalAction,
+        default=False,
+        help="Copy the Spotify auth URL to clipboard (macOS pbcopy) to avoid line-wrap copy issues.",
+    )
+    ap.add_argument(
+        "--throttle-ms",
+        type=int,
+        default=250,
+        help="Minimum delay between Spotify API requests.",
+    )
+
+    args = ap.parse_args()
+
+    if args.index:
+        if args.path or args.name or args.checkpoint:
+            ap.error("--path, --name and --checkpoint apply to single-playlist runs; --index derives them per file")
+    elif not args.json:
+        ap.error("one of --json or --index is required")
+
+    token_path = Path(args.token).expanduser() if args.token else _default_token_path()
+    mirror_path = Path(args.playlist_cache).expanduser() if args.playlist_cache else _default_mirror_path()
+
+    jobs: List[PublishJob] = []
+    skipped_files: Dict[str, str] = {}
+    if args.index:
+        for path in _index_entries(Path(args.index)):
+            try:
+                jobs.append(_prepare_job(path, "", ""))
+            except SystemExit as e:
+                skipped_files[str(path)] = str(e)
+        if not jobs:
+            raise SystemExit("No playlist in the index has Spotify track IDs.")
+    else:
+        jobs.append(_prepare_job(Path(args.json), args.path.strip(), args.name))
+
+    client_id = _find_spotify_client_id(args.env_file or None, args.client_id or None)
+    token_store = TokenStore(token_path, client_id)
+
+    # Minimum needed for this script:
+    # - create playlist (public/private)
+    # - add tracks
+    # - list playlists by name
+    scope = "playlist-modify-public playlist-modify-private playlist-read-private"
+
+    # Ensure we have a token (refresh if cached); batch workers all share this one.
+    tok = token_store.load()
+    if tok is None:
+        tok = _pkce_authorize_and_exchange(
+            client_id=client_id,
+            redirect_uri=args.redirect_uri,
+            scope=scope,
+            token_store=token_store,
+            open_browser=bool(args.open_browser),
+            copy_auth_url=bool(args.copy_auth_url),
+        )
+    else:
+        token_store.ensure_valid()
+
+    mirror = PlaylistMirror(mirror_path).load()
+    try:
+        if args.index:
+            return _run_batch(args, token_store, mirror, jobs, skipped_files)
+
+        job = jobs[0]
+        checkpoint_path = Path(args.checkpoint).expanduser() if args.checkpoint else _default_checkpoint_path()
+        return _publish(
+            args,
+            token_store,
+            mirror,
+            checkpoint=_resumable_checkpoint(job, checkpoint_path, bool(args.resume)),
+            checkpoint_path=checkpoint_path,
+            json_path=job.json_path,
+            items_path=job.items_path,
+            playlist_name=job.playlist_name,
+            uris=job.uris,
+            uri_hash=job.uri_hash,
+            skipped=job.skipped,
+        )
+    finally:
+        mirror.save()
+
+
 if __name__ == "__main__":
     raise SystemExit(main())
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Compact on-disk string tables for the playlist utilities.
+
+A table file holds a few columns of equal length plus a JSON metadata header. Every
+distinct string is stored once in a UTF-8 blob; string columns are uint32 arrays of
+string ids, integer columns int64 arrays. Loading mmaps the file and casts the arrays
+in place, so opening a table costs milliseconds regardless of its size; strings are
+decoded only when read.
+
+Layout:
+    MAGIC (8 bytes) | header length (u64 LE) | header JSON | pad to 8
+    string offsets (u64 x strings+1) | string columns (u32 x rows each, padded to 8)
+    | integer columns (i64 x rows each) | string blob
+
+Callers key a table by the sha256 of its source files (see file_sha256) and rebuild it
+when they change.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+MAGIC = b"STRTAB01"
+_ALIGN = 8
+
+
+def file_sha256(path: Path) -> str:
+    h = hashlib.sha256()
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _pad(n: int) -> int:
+    return (-n) % _ALIGN
+
+
+def write_table(path: Path, columns: List[str], rows: Iterable[Sequence[str]], meta: Dict[str, Any]) -> int:
+    """Write rows (one string per column) to path atomically. Returns the row count."""
+    ids: Dict[str, int] = {}
+    strings: List[str] = []
+    cols = [array("I") for _ in columns]
+    count = 0
+    for row in rows:
+        for col, s in zip(cols, row):
+            sid = ids.get(s)
+            if sid is None:
+                sid = len(strings)
+                ids[s] = sid
+                strings.append(s)
+            col.append(sid)
+        count += 1
+    write_columns(path, strings, dict(zip(columns, cols)), {}, meta)
+    return count
+
+
+def write_columns(
+    path: Path,
+    strings: Sequence[str],
+    str_columns: Dict[str, "array[int]"],
+    int_columns: Dict[str, "array[int]"],
+    meta: Dict[str, Any],
+) -> None:
+    """Write already interned columns atomically: str_columns hold indexes into strings."""
+    blob = bytearray()
+    offsets = array("Q", [0])
+    for s in strings:
+        blob += s.encode("utf-8")
+        offsets.append(len(blob))
+    arrays = [array("I", c) if c.typecode != "I" else c for c in str_columns.values()]
+    arrays += [array("q", c) if c.typecode != "q" else c for c in int_columns.values()]
+    lengths = {len(a) for a in arrays}
+    if len(lengths) > 1:
+        raise ValueError("columns differ in length")
+    count = lengths.pop() if lengths else 0
+
+    header = json.dumps(
+        {
+            "byteorder": sys.byteorder,
+            "columns": list(str_columns),
+            "int_columns": list(int_columns),
+            "rows": count,
+            "strings": len(strings),
+            "meta": meta,
+        },
+        ensure_ascii=False,
+    ).encode("utf-8")
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    try:
+        with tmp.open("wb") as f:
+            f.write(MAGIC)
+            f.write(struct.pack("<Q", len(header)))
+            f.write(header)
+            f.write(b"\0" * _pad(len(MAGIC) + 8 + len(header)))
+            f.write(offsets.tobytes())
+            for col in arrays:
+                f.write(col.tobytes())
+                f.write(b"\0" * _pad(len(col) * col.itemsize))
+            f.write(bytes(blob))
+        tmp.replace(path)
+    finally:
+        if tmp.exists():
+            tmp.unlink()
+
+
+class StringColumn(Sequence[str]):
+    """Read-only view of one column; decodes the string on access."""
+
+    __slots__ = ("_table", "_ids")
+
+    def __init__(self, table: "StringTableFile", ids: memoryview):
+        self._table = table
+        self._ids = ids
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __getitem__(self, i):  # type: ignore[override]
+        if isinstance(i, slice):
+            return [self._table.string(sid) for sid in self._ids[i]]
+        return self._table.string(self._ids[i])
+
+
+class StringTableFile:
+    """A table opened with mmap. Keep the object alive while its columns are in use."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        with path.open("rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        mm = self._mm
+        if mm[: len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path}: not a string table")
+        (hlen,) = struct.unpack_from("<Q", mm, len(MAGIC))
+        pos = len(MAGIC) + 8
+        header = json.loads(mm[pos : pos + hlen].decode("utf-8"))
+        if header.get("byteorder") != sys.byteorder:
+            raise ValueError(f"{path}: written on a {header.get('byteorder')}-endian machine")
+        pos += hlen + _pad(pos + hlen)
+
+        self.meta: Dict[str, Any] = header.get("meta") or {}
+        self.columns: List[str] = list(header["columns"])
+        self.int_columns: List[str] = list(header.get("int_columns") or [])
+        self.rows: int = int(header["rows"])
+        strings = int(header["strings"])
+
+        view = memoryview(mm)
+        self._offsets = view[pos : pos + 8 * (strings + 1)].cast("Q")
+        pos += 8 * (strings + 1)
+        self._cols: Dict[str, StringColumn] = {}
+        for name in self.columns:
+            self._cols[name] = StringColumn(self, view[pos : pos + 4 * self.rows].cast("I"))
+            pos += 4 * self.rows + _pad(4 * self.rows)
+        self._ints: Dict[str, memoryview] = {}
+        for name in self.int_columns:
+            self._ints[name] = view[pos : pos + 8 * self.rows].cast("q")
+            pos += 8 * self.rows
+        self._blob_at = pos
+
+    def string(self, sid: int) -> str:
+        offsets, base = self._offsets, self._blob_at
+        return self._mm[base + offsets[sid] : base + offsets[sid + 1]].decode("utf-8")
+
+    def cell(self, column: str, i: int) -> str:
+        return self.string(self._cols[column]._ids[i])
+
+    def column(self, name: str) -> StringColumn:
+        return self._cols[name]
+
+    def string_ids(self, name: str) -> memoryview:
+        """The raw uint32 string ids of a string column."""
+        return self._cols[name]._ids
+
+    def int_column(self, name: str) -> memoryview:
+        return self._ints[name]
+
+    def __len__(self) -> int:
+        return self.rows
+
+
+def open_table(path: Path, expect_meta: Optional[Dict[str, Any]] = None) -> Optional[StringTableFile]:
+    """Open path if it exists, is readable and its meta contains expect_meta; else None."""
+    if not path.exists():
+        return None
+    try:
+        table = StringTableFile(path)
+    except (OSError, ValueError, KeyError, struct.error):
+        return None
+    for k, v in (expect_meta or {}).items():
+        if table.meta.get(k) != v:
+            return None
+    return table
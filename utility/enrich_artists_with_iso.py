@@ -16,20 +16,39 @@ Features:
 - low-noise progress to stderr (TTY only)
 - optional verbose/debug trace to stderr
 - JSON cache to speed up reruns
+- change-tracking journal (--journal): rows whose track line was already resolved reuse
+  the recorded countries without touching MusicBrainz or the cache
+- two-phase planning (default; --no-plan resolves row by row): the whole input is read
+  first, every distinct lookup is done once, the ones most rows wait on first, and rows
+  are written in input order as soon as they and all rows before them are resolved
+- batched searches (--batch N): up to N planned recording or artist lookups go out as one
+  OR'ed MusicBrainz search, each hit is matched back to its lookup and cached on its own
+- ISRC-first resolution (--isrc-col, TSV mode): rows with an ISRC resolve through the
+  exact MusicBrainz ISRC lookup, cached per ISRC; the artist/title search is the fallback
+- offline resolution (--source local): no network, against a local index that mb_index.py
+  builds from MusicBrainz dumps
 """
 
 from __future__ import annotations
 
 import sys
 import csv
+import heapq
+import sqlite3
 import json
 import time
 import argparse
 import urllib.parse
 import urllib.request
 import urllib.error
+from functools import lru_cache
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from enrich_journal import add_journal_args, journal_from_args
+from json_codec import load_path, loads
+from json_stream import dumps_pretty
+from mb_index import DEFAULT_INDEX, MBIndex, isrc_key, name_key
 
 MB_BASE = "https://musicbrainz.org/ws/2"
 
@@ -83,17 +102,18 @@ def load_cache(path: Optional[str]) -> Dict[str, Any]:
         return {}
     p = Path(path)
     if p.exists():
-        return json.loads(p.read_text(encoding="utf-8"))
+        return load_path(p)
     return {}
 
 
 def save_cache(path: Optional[str], cache: Dict[str, Any]) -> None:
     if not path:
         return
-    Path(path).write_text(json.dumps(cache, indent=2, ensure_ascii=False), encoding="utf-8")
+    Path(path).write_text(dumps_pretty(cache), encoding="utf-8")
 
 
-def http_get_json(url: str, retries: int = 4, timeout: int = 30) -> Any:
+def http_get_json(url: str, retries: int = 4, timeout: int = 30, missing_ok: bool = False) -> Any:
+    """GET url as JSON; with missing_ok, a 404 returns None."""
     last_err: Optional[Exception] = None
 
     for attempt in range(retries + 1):
@@ -104,12 +124,14 @@ def http_get_json(url: str, retries: int = 4, timeout: int = 30) -> Any:
                 raw = resp.read()
 
             try:
-                return json.loads(raw.decode("utf-8"))
+                return loads(raw.decode("utf-8"))
             except Exception as e:
                 snippet = raw[:400].decode("utf-8", errors="replace")
                 raise RuntimeError(f"Non-JSON response from MusicBrainz:\n{snippet}") from e
 
         except urllib.error.HTTPError as e:
+            if e.code == 404 and missing_ok:
+                return None
             body = e.read()
             snippet = body[:400].decode("utf-8", errors="replace")
             last_err = RuntimeError(f"HTTP {e.code} from MusicBrainz:\n{snippet}")
@@ -162,18 +184,135 @@ def mb_recording_search_one(artist: str, title: str) -> Optional[Dict[str, Any]]
     return recs[0] if recs else None
 
 
+def credited_artist_ids(rec: Optional[Dict[str, Any]]) -> List[str]:
+    found: List[str] = []
+    if rec and rec.get("artist-credit"):
+        for ac in rec["artist-credit"]:
+            art = ac.get("artist") or {}
+            mbid = art.get("id")
+            if mbid:
+                found.append(mbid)
+    return found
+
+
 def mb_artist_country(mbid: str) -> Optional[str]:
     url = f"{MB_BASE}/artist/{urllib.parse.quote(mbid)}?fmt=json"
     data = http_get_json(url)
-    c = data.get("country")
+    return _country_of(data)
+
+
+def mb_isrc_recording(isrc: str) -> Optional[Dict[str, Any]]:
+    """The first recording with this ISRC that credits an artist (None if MusicBrainz has none)."""
+    url = f"{MB_BASE}/isrc/{urllib.parse.quote(isrc)}?fmt=json&inc=artists"
+    data = http_get_json(url, missing_ok=True) or {}
+    return next((rec for rec in data.get("recordings") or [] if credited_artist_ids(rec)), None)
+
+
+def _country_of(artist: Dict[str, Any]) -> Optional[str]:
+    c = artist.get("country")
     if isinstance(c, str) and c.strip():
         return c.strip()
     return None
 
 
+# MusicBrainz caps a search page at 100 hits. A recording search returns every matching
+# recording of a song (releases, remasters, live takes), so fewer clauses share a page;
+# an ISRC names one recording, now and then a few.
+MAX_SEARCH_LIMIT = 100
+MAX_RECORDING_CLAUSES = 25
+MAX_ISRC_CLAUSES = 50
+
+
+def _phrase(s: str) -> str:
+    return '"' + s.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+def _credits_artist(rec: Dict[str, Any], artist: str) -> bool:
+    want = name_key(artist)
+    if not want:
+        return False
+    phrase = ""
+    for ac in rec.get("artist-credit") or []:
+        names = (ac.get("name") or "", (ac.get("artist") or {}).get("name") or "")
+        if any(name_key(n) == want for n in names):
+            return True
+        phrase += names[0] + (ac.get("joinphrase") or "")
+    return f" {want} " in f" {name_key(phrase)} "
+
+
+def mb_recording_search_many(pairs: List[Tuple[str, str]]) -> Dict[int, Optional[Dict[str, Any]]]:
+    """
+    One OR'ed search for several (artist, title) pairs, answers by pair index. A pair gets
+    the best-scoring hit whose title and credited artist match it by name. It gets None
+    (nothing found) only if the page holds every hit and each hit matched some pair;
+    otherwise a pair without a match is left out and the caller asks for it on its own.
+    """
+    q = " OR ".join(f"(recording:{_phrase(t)} AND artist:{_phrase(a)})" for a, t in pairs)
+    params = urllib.parse.urlencode({"query": q, "fmt": "json", "limit": MAX_SEARCH_LIMIT})
+    data = http_get_json(f"{MB_BASE}/recording/?{params}")
+    hits = sorted(data.get("recordings") or [], key=lambda r: -int(r.get("score") or 0))
+    wanted: Dict[str, List[int]] = {}
+    for i, (_, t) in enumerate(pairs):
+        if name_key(t):
+            wanted.setdefault(name_key(t), []).append(i)
+    found: Dict[int, Optional[Dict[str, Any]]] = {}
+    unmatched_hits = 0
+    for rec in hits:  # stable: equal scores keep the server's order
+        matched = [i for i in wanted.get(name_key(rec.get("title") or ""), ()) if _credits_artist(rec, pairs[i][0])]
+        unmatched_hits += not matched
+        for i in matched:
+            found.setdefault(i, rec)
+    if not unmatched_hits and int(data.get("count", len(hits))) <= len(hits):
+        for i in range(len(pairs)):
+            found.setdefault(i, None)
+    return found
+
+
+def mb_isrc_search_many(isrcs: List[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+    """
+    One recording search for several ISRCs, answers by ISRC: the best-scoring hit listing
+    it that credits an artist. As in mb_recording_search_many, an ISRC gets None only if
+    the page holds every hit and each hit listed a wanted ISRC; otherwise it is left out.
+    """
+    params = urllib.parse.urlencode({"query": "isrc:(" + " OR ".join(isrcs) + ")", "fmt": "json", "limit": MAX_SEARCH_LIMIT})
+    data = http_get_json(f"{MB_BASE}/recording/?{params}")
+    hits = sorted(data.get("recordings") or [], key=lambda r: -int(r.get("score") or 0))
+    wanted = set(isrcs)
+    found: Dict[str, Optional[Dict[str, Any]]] = {}
+    unmatched_hits = 0
+    for rec in hits:
+        listed = wanted.intersection(isrc_key(i) for i in rec.get("isrcs") or ())
+        unmatched_hits += not listed
+        if credited_artist_ids(rec):
+            for isrc in listed:
+                found.setdefault(isrc, rec)
+    if not unmatched_hits and int(data.get("count", len(hits))) <= len(hits):
+        for isrc in isrcs:
+            found.setdefault(isrc, None)
+    return found
+
+
+def mb_artist_countries(mbids: List[str]) -> Dict[str, Optional[str]]:
+    """Countries of several artists from one search by MBID; MBIDs the index does not return are left out."""
+    q = "arid:(" + " OR ".join(mbids) + ")"
+    params = urllib.parse.urlencode({"query": q, "fmt": "json", "limit": min(len(mbids), MAX_SEARCH_LIMIT)})
+    data = http_get_json(f"{MB_BASE}/artist/?{params}")
+    wanted = set(mbids)
+    return {a["id"]: _country_of(a) for a in data.get("artists") or [] if a.get("id") in wanted}
+
+
 # ----------------------------- core logic ------------------------------
 
-def countries_for_track(line: str, cache: Dict[str, Any], debug_enabled: bool) -> List[str]:
+def countries_for_track(line: str, cache: Dict[str, Any], debug_enabled: bool, isrc: str = "") -> List[str]:
+    if isrc:
+        isrc_cache_key = f"isrc::{isrc}"
+        if isrc_cache_key not in cache:
+            cache[isrc_cache_key] = credited_artist_ids(mb_isrc_recording(isrc))
+        mbids = cache[isrc_cache_key] or []
+        debug(f"isrc {isrc}: artist mbids={mbids}", debug_enabled)
+        if mbids:
+            return _artist_countries(mbids, cache, debug_enabled)
+
     line = (line or "").strip()
     line_key = f"line::{line}"
     if line_key in cache:
@@ -195,15 +334,7 @@ def countries_for_track(line: str, cache: Dict[str, Any], debug_enabled: bool) -
         if rec_key in cache:
             mbids = cache[rec_key] or []
         else:
-            rec = mb_recording_search_one(a, title)
-            found: List[str] = []
-            if rec and rec.get("artist-credit"):
-                for ac in rec["artist-credit"]:
-                    art = ac.get("artist") or {}
-                    mbid = art.get("id")
-                    if mbid:
-                        found.append(mbid)
-            mbids = found
+            mbids = credited_artist_ids(mb_recording_search_one(a, title))
             cache[rec_key] = mbids
 
         if mbids:
@@ -211,6 +342,12 @@ def countries_for_track(line: str, cache: Dict[str, Any], debug_enabled: bool) -
 
     debug(f"  artist mbids={mbids}", debug_enabled)
 
+    iso = _artist_countries(mbids, cache, debug_enabled)
+    cache[line_key] = iso
+    return iso
+
+
+def _artist_countries(mbids: List[str], cache: Dict[str, Any], debug_enabled: bool) -> List[str]:
     iso: List[str] = []
     for mbid in mbids:
         akey = f"artist::{mbid}"
@@ -224,14 +361,263 @@ def countries_for_track(line: str, cache: Dict[str, Any], debug_enabled: bool) -
 
     iso = list(dict.fromkeys(iso))
     debug(f"  iso={iso}", debug_enabled)
+    return iso
 
-    cache[line_key] = iso
+
+def countries_for_track_local(line: str, index: MBIndex, debug_enabled: bool, isrc: str = "") -> List[str]:
+    """countries_for_track against a local index (mb_index.py) instead of MusicBrainz."""
+    artists, title = split_track_line(line)
+    debug(f"track: {line.strip()}" + (f" [{isrc}]" if isrc else ""), debug_enabled)
+
+    mbids: List[str] = []
+    if isrc:
+        mbids = next((m for m in map(index.recording_artists, index.recordings_with_isrc(isrc)) if m), [])
+    if not mbids and not artists:
+        return []
+    for a in artists if title and not mbids else ():
+        rec = index.find_recording(a, title)
+        if rec:
+            mbids = index.recording_artists(rec)
+            break
+    debug(f"  artist mbids={mbids}", debug_enabled)
+
+    if mbids:
+        iso = [c for c in map(index.country, mbids) if c]
+    else:
+        # No known recording: each artist by name, where the name settles the country.
+        iso = []
+        for a in artists:
+            countries = {c for c in map(index.country, index.artists_named(a)) if c}
+            if len(countries) == 1:
+                iso.append(countries.pop())
+
+    iso = list(dict.fromkeys(iso))
+    debug(f"  iso={iso}", debug_enabled)
     return iso
 
 
+def _lookup_norm(s: str) -> str:
+    # MusicBrainz search ignores case and runs of whitespace.
+    return " ".join(s.split()).casefold()
+
+
+class _Track:
+    __slots__ = ("idx", "line", "artists", "title", "isrc", "via_isrc", "next_artist", "mbids")
+
+    def __init__(self, idx: int, line: str, artists: List[str], title: str, isrc: str):
+        self.idx = idx
+        self.line = line
+        self.artists = artists
+        self.title = title
+        self.isrc = isrc  # cleared once its lookup is answered
+        self.via_isrc = False
+        self.next_artist = 0
+        self.mbids: List[str] = []
+
+
+class LookupPlanner:
+    """
+    Resolves many track lines together, with the same results countries_for_track gives
+    one by one: add() every line first, then run() does each distinct lookup once, always
+    the one the most unresolved lines are waiting on next. Recording searches that differ
+    only in case or spacing count as one; the answer is cached under every exact
+    rec:: key that asked for it. A line with an ISRC waits on its isrc:: lookup first and
+    only falls back to the text searches if that finds no credited artists.
+
+    With batch > 1, run() resolves the next `batch` lookups of one kind in a single OR'ed
+    search (see mb_recording_search_many / mb_isrc_search_many / mb_artist_countries) and looks up on their own
+    only the ones the search did not answer.
+    """
+
+    def __init__(self, cache: Dict[str, Any], debug_enabled: bool, batch: int = 1):
+        self.cache = cache
+        self.debug_enabled = debug_enabled
+        self.batch = max(1, min(batch, MAX_SEARCH_LIMIT))
+        self.requests = 0
+        # lookup -> tracks waiting on it; per kind a heap of (-waiting, first seen, lookup),
+        # lazily updated.
+        self._waiting: Dict[Tuple[str, str], List[_Track]] = {}
+        self._query: Dict[Tuple[str, str], Tuple[str, str]] = {}
+        self._heaps: Dict[str, List[Tuple[int, int, Tuple[str, str]]]] = {"isrc": [], "rec": [], "artist": []}
+        self._seq = 0
+        # Normalized recording searches already answered this run.
+        self._rec_done: Dict[str, List[str]] = {}
+
+    @property
+    def pending_lookups(self) -> int:
+        return len(self._waiting)
+
+    def add(self, idx: int, line: str, isrc: str = "") -> Optional[List[str]]:
+        """The countries of line if known without MusicBrainz, else None (it waits for run())."""
+        line = (line or "").strip()
+        artists, title = split_track_line(line)
+        t = _Track(idx, line, artists, title or "", isrc)
+        if not isrc:
+            known = self._text_start(t)
+            if known is not None:
+                return known
+        return self._advance(t)
+
+    def _text_start(self, t: _Track) -> Optional[List[str]]:
+        """What countries_for_track settles before any search: a cached or an unparsable line."""
+        line_key = f"line::{t.line}"
+        if line_key in self.cache:
+            debug(f"cache hit line: {t.line}", self.debug_enabled)
+            return self.cache[line_key] or []
+        if not t.artists or not t.title:
+            self.cache[line_key] = []
+            return []
+        return None
+
+    def _advance(self, t: _Track) -> Optional[List[str]]:
+        """Move t on through the cached lookups; its countries once complete, else None."""
+        cache = self.cache
+        if t.isrc:
+            key = f"isrc::{t.isrc}"
+            if key not in cache:
+                self._wait(("isrc", t.isrc), (t.isrc, ""), t)
+                return None
+            t.isrc = ""
+            t.mbids = cache[key] or []
+            t.via_isrc = bool(t.mbids)
+            if not t.via_isrc:
+                known = self._text_start(t)
+                if known is not None:
+                    return known
+        while not t.mbids and t.next_artist < len(t.artists):
+            a = t.artists[t.next_artist]
+            rec_key = f"rec::{a}::{t.title}"
+            if rec_key not in cache:
+                norm = f"{_lookup_norm(a)}::{_lookup_norm(t.title)}"
+                if norm not in self._rec_done:
+                    self._wait(("rec", norm), (a, t.title), t)
+                    return None
+                cache[rec_key] = self._rec_done[norm]
+            t.mbids = cache[rec_key] or []
+            t.next_artist += 1
+        for mbid in t.mbids:
+            if f"artist::{mbid}" not in cache:
+                self._wait(("artist", mbid), (mbid, ""), t)
+                return None
+        iso = [c for c in (cache[f"artist::{mbid}"] for mbid in t.mbids) if c]
+        iso = list(dict.fromkeys(iso))
+        debug(f"track: {t.line}\n  artist mbids={t.mbids}\n  iso={iso}", self.debug_enabled)
+        if not t.via_isrc:
+            cache[f"line::{t.line}"] = iso
+        return iso
+
+    def _wait(self, lookup: Tuple[str, str], query: Tuple[str, str], t: _Track) -> None:
+        waiting = self._waiting.setdefault(lookup, [])
+        if not waiting:
+            self._query[lookup] = query
+        waiting.append(t)
+        self._seq += 1
+        heapq.heappush(self._heaps[lookup[0]], (-len(waiting), self._seq, lookup))
+
+    def _top(self, heap: List[Tuple[int, int, Tuple[str, str]]]) -> Optional[Tuple[int, int, Tuple[str, str]]]:
+        """The heap's top live entry, dropping stale ones above it."""
+        while heap:
+            neg, seq, lookup = heap[0]
+            waiting = self._waiting.get(lookup)
+            if waiting is not None and len(waiting) == -neg:
+                return heap[0]
+            heapq.heappop(heap)
+        return None
+
+    def _next_batch(self) -> List[Tuple[str, str]]:
+        """The most waited-on lookup and, batching, the next most waited-on ones of its kind."""
+        tops = [(top, kind) for kind, heap in self._heaps.items() for top in (self._top(heap),) if top is not None]
+        if not tops:
+            return []
+        kind = min(tops, key=lambda tk: tk[0][:2])[1]
+        heap = self._heaps[kind]
+        size = min(self.batch, {"rec": MAX_RECORDING_CLAUSES, "isrc": MAX_ISRC_CLAUSES}.get(kind, MAX_SEARCH_LIMIT))
+        lookups: List[Tuple[str, str]] = []
+        while len(lookups) < size and self._top(heap) is not None:
+            lookups.append(heapq.heappop(heap)[2])
+        return lookups
+
+    def _search_recordings(self, queries: List[Tuple[str, str]]) -> List[List[str]]:
+        if len(queries) == 1:
+            self.requests += 1
+            return [credited_artist_ids(mb_recording_search_one(*queries[0]))]
+        self.requests += 1
+        found = mb_recording_search_many(queries)
+        debug(f"  batch answered {len(found)}/{len(queries)}", self.debug_enabled)
+        out: List[List[str]] = []
+        for i, (artist, title) in enumerate(queries):
+            if i not in found:
+                self.requests += 1
+                found[i] = mb_recording_search_one(artist, title)
+            out.append(credited_artist_ids(found[i]))
+        return out
+
+    def _lookup_isrcs(self, isrcs: List[str]) -> List[List[str]]:
+        if len(isrcs) == 1:
+            self.requests += 1
+            return [credited_artist_ids(mb_isrc_recording(isrcs[0]))]
+        self.requests += 1
+        found = mb_isrc_search_many(isrcs)
+        debug(f"  batch answered {len(found)}/{len(isrcs)}", self.debug_enabled)
+        out: List[List[str]] = []
+        for isrc in isrcs:
+            if isrc not in found:
+                self.requests += 1
+                found[isrc] = mb_isrc_recording(isrc)
+            out.append(credited_artist_ids(found[isrc]))
+        return out
+
+    def _artist_countries(self, mbids: List[str]) -> List[Optional[str]]:
+        if len(mbids) == 1:
+            self.requests += 1
+            return [mb_artist_country(mbids[0])]
+        self.requests += 1
+        found = mb_artist_countries(mbids)
+        debug(f"  batch answered {len(found)}/{len(mbids)}", self.debug_enabled)
+        out: List[Optional[str]] = []
+        for mbid in mbids:
+            if mbid not in found:
+                self.requests += 1
+                found[mbid] = mb_artist_country(mbid)
+            out.append(found[mbid])
+        return out
+
+    def run(self) -> Iterator[Tuple[int, List[str]]]:
+        """Do the lookups; yields (idx, countries) for each added line as it completes."""
+        cache = self.cache
+        while True:
+            lookups = self._next_batch()
+            if not lookups:
+                return
+            waiting = [self._waiting.pop(lookup) for lookup in lookups]
+            queries = [self._query.pop(lookup) for lookup in lookups]
+            kind = lookups[0][0]
+            debug(
+                f"lookup {kind} x{len(lookups)}: "
+                + "; ".join(f"{' - '.join(q for q in query if q)} ({len(w)} waiting)" for query, w in zip(queries, waiting)),
+                self.debug_enabled,
+            )
+            if kind == "isrc":
+                for (isrc, _), mbids in zip(queries, self._lookup_isrcs([q[0] for q in queries])):
+                    cache[f"isrc::{isrc}"] = mbids
+            elif kind == "rec":
+                for lookup, tracks, mbids in zip(lookups, waiting, self._search_recordings(queries)):
+                    self._rec_done[lookup[1]] = mbids
+                    for t in tracks:
+                        cache[f"rec::{t.artists[t.next_artist]}::{t.title}"] = mbids
+            else:
+                for (mbid, _), country in zip(queries, self._artist_countries([q[0] for q in queries])):
+                    cache[f"artist::{mbid}"] = country
+            for tracks in waiting:
+                for t in tracks:
+                    iso = self._advance(t)
+                    if iso is not None:
+                        yield t.idx, iso
+
+
 # ----------------------------- main ------------------------------------
 
-def main() -> None:
+def main(argv: Optional[List[str]] = None) -> None:
     ap = argparse.ArgumentParser()
     ap.add_argument("input", help="TSV input file or '-' for stdin")
     ap.add_argument("-o", "--output", default="-", help="TSV output file or '-' for stdout")
@@ -246,30 +632,112 @@ def main() -> None:
                     help="Verbose per-track diagnostics to stderr")
     ap.add_argument("--flush-every", type=int, default=1,
                     help="Flush stdout every N output rows (0 disables). Default 1 = immediate streaming.")
-    args = ap.parse_args()
-
-    cache = load_cache(args.cache_json)
+    ap.add_argument("--no-plan", action="store_true",
+                    help="Resolve and write one row at a time instead of reading the whole input first "
+                         "and doing each distinct lookup once, most shared first")
+    ap.add_argument("--batch", type=int, default=1,
+                    help=f"Pack up to N artist lookups (max {MAX_SEARCH_LIMIT}), ISRC lookups (max {MAX_ISRC_CLAUSES}) "
+                         f"or recording searches (max {MAX_RECORDING_CLAUSES}) into one OR'ed search; "
+                         "default 1 = one request per lookup")
+    ap.add_argument("--isrc-col", default="isrc",
+                    help="TSV column with the track's ISRC (see enrich_spotify_isrc.py); rows that have one "
+                         "resolve through MusicBrainz's exact ISRC lookup, the artist/title search is the fallback")
+    ap.add_argument("--source", choices=("musicbrainz", "local"), default="musicbrainz",
+                    help="Resolve against the MusicBrainz API, or offline against a local index built by mb_index.py")
+    ap.add_argument("--index", type=Path, default=DEFAULT_INDEX,
+                    help=f"Local index for --source local (default {DEFAULT_INDEX.name} next to this script)")
+    add_journal_args(ap)
+    args = ap.parse_args(argv)
+    if args.batch < 1 or args.batch > MAX_SEARCH_LIMIT:
+        ap.error(f"--batch must be between 1 and {MAX_SEARCH_LIMIT}")
+    if args.batch > 1 and args.no_plan:
+        ap.error("--batch packs the lookups a plan collects; drop --no-plan")
+
+    index: Optional[MBIndex] = None
+    if args.source == "local":
+        if args.batch > 1:
+            ap.error("--batch applies to --source musicbrainz")
+        try:
+            index = MBIndex(args.index)
+        except (OSError, ValueError, sqlite3.Error) as e:
+            raise SystemExit(str(e))
+    # Offline there are no requests to plan, and the cache holds MusicBrainz answers, not the index's.
+    plan = not args.no_plan and index is None
+    cache_path = args.cache_json if index is None else None
+
+    cache = load_cache(cache_path)
+    resolve: Callable[[str, str], List[str]]
+    if index is not None:
+        local = index
+        journal = journal_from_args(args, "enrich_artists_with_iso:local", {"source": "local", "index": local.stamp})
+
+        @lru_cache(maxsize=1 << 16)
+        def resolve(track: str, isrc: str) -> List[str]:
+            return countries_for_track_local(track, local, args.debug, isrc)
+    else:
+        journal = journal_from_args(args, "enrich_artists_with_iso", {"mb_base": MB_BASE})
+
+        def resolve(track: str, isrc: str) -> List[str]:
+            return countries_for_track(track, cache, args.debug, isrc)
+    unchanged = 0
+
+    def journal_key(track: str, isrc: str) -> str:
+        # Rows without an ISRC keep the keys they had before ISRCs were read.
+        return journal.text_key(f"{isrc}\t{track.strip()}" if isrc else track.strip())
+
+    def lookup(track: str, isrc: str) -> List[str]:
+        nonlocal unchanged
+        key = journal_key(track, isrc)
+        if key in journal:
+            unchanged += 1
+            return list(journal.get(key) or [])
+        iso = list(resolve(track, isrc))
+        journal.record(key, iso)
+        return iso
 
     start_ts = time.time()
     processed = 0
     last_report = 0
     last_flush = 0
+    planner: Optional[LookupPlanner] = None
+
+    try:
+        with open_input(args.input) as fin, open_output(args.output) as fout:
+            rows: Iterator[Tuple[Any, str, str]]
+            emit: Callable[[Any, List[str]], None]
+            if args.no_header:
+                writer = csv.writer(fout, delimiter="\t", lineterminator="\n")
+                writer.writerow(["artists", "iso_countries"])
+                rows = ((line, line, "") for line in (raw.rstrip("\n") for raw in fin))
+
+                def emit(line: str, iso: List[str]) -> None:
+                    writer.writerow([line, ";".join(iso)])
+            else:
+                reader = csv.DictReader(fin, delimiter="\t")
+                if not reader.fieldnames:
+                    raise SystemExit("Missing header; use --no-header for plain lines")
+
+                fields = list(reader.fieldnames)
+                if "iso_countries" not in fields:
+                    fields.append("iso_countries")
+
+                dict_writer = csv.DictWriter(fout, delimiter="\t", fieldnames=fields, lineterminator="\n")
+                dict_writer.writeheader()
+                rows = (
+                    (row, (row.get(args.artists_col) or "").strip(), isrc_key(row.get(args.isrc_col)))
+                    for row in reader
+                )
+
+                def emit(row: Dict[str, Any], iso: List[str]) -> None:
+                    row["iso_countries"] = ";".join(iso)
+                    dict_writer.writerow(row)
 
-    def maybe_flush(fout, rows_written: int) -> None:
-        if args.flush_every and (rows_written - last_flush) >= args.flush_every:
-            fout.flush()
-
-    with open_input(args.input) as fin, open_output(args.output) as fout:
-        if args.no_header:
-            writer = csv.writer(fout, delimiter="\t", lineterminator="\n")
-            writer.writerow(["artists", "iso_countries"])
             fout.flush()
             out_rows = 1
 
-            for raw in fin:
-                line = raw.rstrip("\n")
-                iso = countries_for_track(line, cache, args.debug)
-                writer.writerow([line, ";".join(iso)])
+            def write(payload: Any, iso: List[str]) -> None:
+                nonlocal out_rows, last_flush, processed, last_report
+                emit(payload, iso)
                 out_rows += 1
 
                 # force streaming
@@ -281,38 +749,56 @@ def main() -> None:
                 if args.progress_every and processed - last_report >= args.progress_every:
                     progress(f"[{processed}] tracks processed ({time.time() - start_ts:.1f}s)")
                     last_report = processed
-        else:
-            reader = csv.DictReader(fin, delimiter="\t")
-            if not reader.fieldnames:
-                raise SystemExit("Missing header; use --no-header for plain lines")
-
-            fields = list(reader.fieldnames)
-            if "iso_countries" not in fields:
-                fields.append("iso_countries")
-
-            writer = csv.DictWriter(fout, delimiter="\t", fieldnames=fields, lineterminator="\n")
-            writer.writeheader()
-            fout.flush()
-            out_rows = 1
-
-            for row in reader:
-                track = (row.get(args.artists_col) or "").strip()
-                iso = countries_for_track(track, cache, args.debug)
-                row["iso_countries"] = ";".join(iso)
-                writer.writerow(row)
-                out_rows += 1
-
-                if args.flush_every and (out_rows - last_flush) >= args.flush_every:
-                    fout.flush()
-                    last_flush = out_rows
-
-                processed += 1
-                if args.progress_every and processed - last_report >= args.progress_every:
-                    progress(f"[{processed}] tracks processed ({time.time() - start_ts:.1f}s)")
-                    last_report = processed
 
-    save_cache(args.cache_json, cache)
-    progress(f"done: {processed} tracks in {time.time() - start_ts:.1f}s")
+            if not plan:
+                for payload, track, isrc in rows:
+                    write(payload, lookup(track, isrc))
+            else:
+                # Phase 1: read everything, settle what needs no request, queue the rest.
+                planner = LookupPlanner(cache, args.debug, args.batch)
+                payloads: List[Any] = []
+                keys: List[str] = []
+                done: List[Optional[List[str]]] = []
+                for i, (payload, track, isrc) in enumerate(rows):
+                    key = journal_key(track, isrc)
+                    if key in journal:
+                        unchanged += 1
+                        iso = list(journal.get(key) or [])
+                    else:
+                        iso = planner.add(i, track, isrc)
+                        if iso is not None:
+                            journal.record(key, iso)
+                    payloads.append(payload)
+                    keys.append(key)
+                    done.append(iso)
+                progress(
+                    f"plan: {len(done)} tracks, {sum(iso is None for iso in done)} waiting on "
+                    f"{planner.pending_lookups} distinct lookups"
+                )
+
+                # Phase 2: look up, writing rows in input order as soon as they are complete.
+                next_out = 0
+
+                def drain() -> None:
+                    nonlocal next_out
+                    while next_out < len(done) and done[next_out] is not None:
+                        write(payloads[next_out], done[next_out])
+                        payloads[next_out] = done[next_out] = None
+                        next_out += 1
+
+                drain()
+                for i, iso in planner.run():
+                    journal.record(keys[i], iso)
+                    done[i] = iso
+                    if i == next_out:
+                        drain()
+                drain()
+    finally:
+        # Also after an error or Ctrl-C, so a rerun does not repeat the lookups made so far.
+        save_cache(cache_path, cache)
+        journal.save()
+    requests = f", {planner.requests} lookups" if planner is not None else ""
+    progress(f"done: {processed} tracks ({unchanged} unchanged{requests}) in {time.time() - start_ts:.1f}s")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Change tracking shared by the enrichers (enrich_spotify_ids, enrich_spotify_isrc,
+enrich_artists_with_iso).
+
+Each enricher owns a namespace in one journal file. The namespace carries a fingerprint
+of the enricher's configuration (CSV hashes, options, ...) and the digests of the inputs
+it has already processed, each taken *after* enrichment. A later run skips an input whose
+digest is still recorded: the item is unchanged since the enricher last saw (and wrote)
+it. Editing an item, running with a different configuration or writing the result
+somewhere other than the input all change the digest, so those inputs are processed again.
+
+Enrichers whose output does not live in the input (TSV rows) store their result as the
+entry's value and reuse it on a hit.
+
+Journal file:
+    {"version": 1, "namespaces": {"<name>": {"config": "<fingerprint>", "entries": {"<digest>": value}}}}
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from json_codec import dumps, load_path
+
+JOURNAL_VERSION = 1
+DEFAULT_JOURNAL = Path(__file__).resolve().parent / ".enrich-journal.json"
+
+# The item fields every enricher's result depends on.
+ITEM_FIELDS: Tuple[str, ...] = ("videoId", "title", "userTitle", "spotifyId")
+
+
+# Digests always go through the stdlib encoder, so they do not change with the json_codec backend.
+def fingerprint(config: Any) -> str:
+    raw = json.dumps(config, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:16]
+
+
+def _digest(values: Any) -> str:
+    raw = json.dumps(values, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.blake2b(raw.encode("utf-8"), digest_size=12).hexdigest()
+
+
+def _read(path: Path) -> Dict[str, Any]:
+    try:
+        doc = load_path(path)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(doc, dict) or doc.get("version") != JOURNAL_VERSION:
+        return {}
+    return doc
+
+
+class EnrichJournal:
+    """One enricher's view of the journal. With path=None every lookup misses and nothing is saved."""
+
+    def __init__(
+        self,
+        path: Optional[Path],
+        namespace: str,
+        config: Any,
+        fields: Iterable[str] = ITEM_FIELDS,
+    ):
+        self.path = path
+        self.namespace = namespace
+        self.fields = tuple(fields)
+        self.config = fingerprint(config)
+        # True when an older configuration's entries were discarded.
+        self.reset = False
+        self._entries: Dict[str, Any] = {}
+        self._dirty = False
+        if path is not None:
+            ns = _read(path).get("namespaces", {}).get(namespace)
+            if isinstance(ns, dict):
+                if ns.get("config") == self.config and isinstance(ns.get("entries"), dict):
+                    self._entries = ns["entries"]
+                else:
+                    self.reset = True
+                    self._dirty = True
+
+    @property
+    def enabled(self) -> bool:
+        return self.path is not None
+
+    def item_key(self, item: Dict[str, Any]) -> str:
+        return _digest([item.get(f) for f in self.fields])
+
+    def text_key(self, text: str) -> str:
+        return _digest(text)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self._entries.get(key, default)
+
+    def record(self, key: str, value: Any = None) -> None:
+        if self.path is None:
+            return
+        if key not in self._entries or self._entries[key] != value:
+            self._entries[key] = value
+            self._dirty = True
+
+    def save(self) -> None:
+        """Write this namespace back, re-reading the file so other enrichers' namespaces survive."""
+        if self.path is None or not self._dirty:
+            return
+        doc = _read(self.path)
+        namespaces = doc.get("namespaces") if isinstance(doc.get("namespaces"), dict) else {}
+        namespaces[self.namespace] = {"config": self.config, "entries": self._entries}
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(f".{self.path.name}.{os.getpid()}.tmp")
+        tmp.write_text(
+            dumps({"version": JOURNAL_VERSION, "namespaces": namespaces}),
+            encoding="utf-8",
+        )
+        tmp.replace(self.path)
+        self._dirty = False
+
+
+def add_journal_args(p: argparse.ArgumentParser) -> None:
+    p.add_argument(
+        "--journal",
+        default=str(DEFAULT_JOURNAL),
+        help=f"Change-tracking journal; unchanged inputs are skipped (default: utility/{DEFAULT_JOURNAL.name})",
+    )
+    p.add_argument("--no-journal", action="store_true", help="Process every input; do not read or write --journal")
+
+
+def journal_from_args(
+    args: argparse.Namespace, namespace: str, config: Any, fields: Iterable[str] = ITEM_FIELDS
+) -> EnrichJournal:
+    path = None if args.no_journal else Path(args.journal).expanduser()
+    return EnrichJournal(path, namespace, config, fields)
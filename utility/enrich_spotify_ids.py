@@ -2,16 +2,30 @@
 
 import argparse
 import csv
+import gc
 import json
+import multiprocessing as mp
 import re
 import sys
-from copy import deepcopy
-from dataclasses import dataclass
+import zlib
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from csv_index import file_sha256
+from enrich_journal import ITEM_FIELDS, add_journal_args, journal_from_args
+from json_codec import load_path
+from json_path import compile_path
+from json_stream import atomic_text_writer, write_json_pretty
+from track_table import TrackRow, TrackTable
+
+try:
+    import numpy as np
+except ImportError:  # only --fuzzy needs it
+    np = None
 
 
 _ALNUM_RE = re.compile(r"[^0-9a-z]+", re.IGNORECASE)
+_WORD_SEP_RE = re.compile(r"[\W_]+")
 
 
 def _norm(s: str) -> str:
@@ -21,19 +35,6 @@ def _norm(s: str) -> str:
     return s
 
 
-def _get_in(root: Any, path: str) -> Any:
-    """Resolve a dotted path through dicts (e.g., 'a.b.c')."""
-    cur = root
-    if not path:
-        return cur
-    for part in path.split("."):
-        if isinstance(cur, dict) and part in cur:
-            cur = cur[part]
-            continue
-        raise KeyError(f"Path segment '{part}' not found")
-    return cur
-
-
 def _find_csv_column(fieldnames: List[str], desired: str) -> Optional[str]:
     desired_l = desired.strip().lower()
     for f in fieldnames:
@@ -44,6 +45,15 @@ def _find_csv_column(fieldnames: List[str], desired: str) -> Optional[str]:
     return None
 
 
+_ISRC_RE = re.compile(r"[A-Z]{2}[A-Z0-9]{3}[0-9]{7}")
+
+
+def _norm_isrc(s: str) -> str:
+    """Canonical ISRC (uppercase, no separators), or "" for placeholders and junk."""
+    s = re.sub(r"[\s-]+", "", s or "").upper()
+    return s if _ISRC_RE.fullmatch(s) else ""
+
+
 def _extract_spotify_id(track_uri: str) -> str:
     s = (track_uri or "").strip()
     if not s:
@@ -55,24 +65,65 @@ def _extract_spotify_id(track_uri: str) -> str:
     return ""
 
 
-@dataclass
-class CsvRow:
-    raw: Dict[str, str]
-    track_name: str
-    artist_name: str
-    spotify_id: str
+# Derived columns of a CSV track table; the export's own columns follow as "csv:<header>".
+CSV_COLUMNS = ("track_name", "artist_name", "spotify_id", "isrc", "track_norm", "artist_norm")
+_RAW_PREFIX = "csv:"
+
+
+class CsvRow(TrackRow):
+    """A row of a CSV track table. track_norm/artist_norm are normalized once at load; every
+    matcher compares these."""
+
+    __slots__ = ()
+
+    @property
+    def raw(self) -> Dict[str, str]:
+        """The row as read from the export, keyed by the merged header."""
+        t, i = self._table, self._i
+        return {f: t.cell(_RAW_PREFIX + f, i) for f in t.meta["fieldnames"]}
 
 
-def load_csv_rows(csv_path: Path) -> Tuple[List[str], List[CsvRow]]:
+def new_csv_table() -> TrackTable:
+    return TrackTable(CSV_COLUMNS, row_base=CsvRow, meta={"fieldnames": [], "duplicates": 0})
+
+
+def append_csv_row(
+    table: TrackTable,
+    track_name: str,
+    artist_name: str,
+    spotify_id: str,
+    isrc: str = "",
+    raw_values: Sequence[str] = (),
+) -> int:
+    """raw_values: the export's cells in table.meta["fieldnames"] order (missing ones are "")."""
+    missing = len(table.meta["fieldnames"]) - len(raw_values)
+    return table.append(
+        track_name, artist_name, spotify_id, isrc, _norm(track_name), _norm(artist_name), *raw_values, *([""] * missing)
+    )
+
+
+def load_csv_rows(
+    csv_path: Path, table: Optional[TrackTable] = None, seen: Optional[set[str]] = None
+) -> Tuple[List[str], TrackTable]:
+    """
+    Append the rows of one Spotify export to table (a new one by default). The export's
+    columns are added to the table as they first appear. With seen, rows whose spotify_id
+    is already in it are dropped and counted in table.meta["duplicates"].
+    Returns (this file's header, table).
+    """
+    if table is None:
+        table = new_csv_table()
     with csv_path.open("r", encoding="utf-8", newline="") as f:
-        reader = csv.DictReader(f)
-        if not reader.fieldnames:
+        # Plain rows, not DictReader: the cells go straight into the table's columns.
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if not header:
             raise ValueError("CSV has no header")
-        header = list(reader.fieldnames)
 
         track_col = _find_csv_column(header, "Track Name")
         artist_col = _find_csv_column(header, "Artist Name") or _find_csv_column(header, "Artist Name(s)")
         uri_col = _find_csv_column(header, "Track URI")
+        isrc_col = _find_csv_column(header, "ISRC")  # optional; used by --isrc-join
 
         if not track_col:
             raise ValueError("CSV missing required column 'Track Name'")
@@ -81,28 +132,85 @@ def load_csv_rows(csv_path: Path) -> Tuple[List[str], List[CsvRow]]:
         if not uri_col:
             raise ValueError("CSV missing required column 'Track URI'")
 
-        rows: List[CsvRow] = []
-        for r in reader:
-            track_name = (r.get(track_col) or "").strip()
-            artist_name_raw = (r.get(artist_col) or "").strip()
+        fields = table.meta["fieldnames"]
+        for h in header:
+            if h not in fields:
+                table.add_column(_RAW_PREFIX + h)
+                fields.append(h)
+        # Cell position of every table field in this file's rows (-1: not in this file).
+        width = len(header)
+        positions = [header.index(h) if h in header else -1 for h in fields]
+        in_order = positions == list(range(width))
+        track_at, artist_at, uri_at = header.index(track_col), header.index(artist_col), header.index(uri_col)
+        isrc_at = header.index(isrc_col) if isrc_col else -1
+
+        for cells in reader:
+            if not cells:
+                continue
+            if len(cells) != width:
+                cells = (cells + [""] * width)[:width]
+            spotify_id = _extract_spotify_id(cells[uri_at])
+            if seen is not None and spotify_id:
+                if spotify_id in seen:
+                    table.meta["duplicates"] += 1
+                    continue
+                seen.add(spotify_id)
             # Spotify exports multiple artists separated by ';'.
             # The playlist userTitle typically starts with the primary artist.
-            artist_name = artist_name_raw.split(';', 1)[0].strip()
-            spotify_id = _extract_spotify_id(r.get(uri_col) or "")
-            rows.append(CsvRow(raw=r, track_name=track_name, artist_name=artist_name, spotify_id=spotify_id))
-
-        return header, rows
-
-
-def match_row(user_title: str, rows: List[CsvRow]) -> List[int]:
+            artist_name = cells[artist_at].strip().split(';', 1)[0].strip()
+            isrc = _norm_isrc(cells[isrc_at]) if isrc_at >= 0 else ""
+            raw_values = cells if in_order else [cells[j] if j >= 0 else "" for j in positions]
+            append_csv_row(table, cells[track_at].strip(), artist_name, spotify_id, isrc, raw_values)
+
+        return header, table
+
+
+CSV_INDEX_VERSION = 3
+DEFAULT_CSV_INDEX = Path(__file__).resolve().parent / ".spotify-csv-index.bin"
+
+
+def load_csv_corpus(
+    csv_paths: List[Path], index_path: Optional[Path], sources: Optional[List[str]] = None
+) -> Tuple[List[str], TrackTable, Dict[str, Any]]:
+    """
+    Merge Spotify-export CSVs into one track table, dropping rows whose Track URI was already
+    seen (the first file wins). With index_path the table is saved memory-mappable, keyed by
+    the CSV files' sha256, and later runs open it until one of the inputs changes.
+
+    sources: the files' sha256 if the caller already has them.
+    Returns (merged header, table, info for the stats report).
+    """
+    key = {
+        "kind": "spotify-csv",
+        "version": CSV_INDEX_VERSION,
+        "sources": sources if sources is not None else [file_sha256(p) for p in csv_paths],
+    }
+    if index_path is not None:
+        table = TrackTable.open(index_path, key, row_base=CsvRow)
+        if table is not None:
+            return list(table.meta["fieldnames"]), table, {"csv_index": "loaded", "csv_duplicates": table.meta["duplicates"]}
+
+    table = new_csv_table()
+    seen: set[str] = set()
+    for path in csv_paths:
+        load_csv_rows(path, table, seen)
+
+    info: Dict[str, Any] = {"csv_index": "none", "csv_duplicates": table.meta["duplicates"]}
+    if index_path is not None:
+        table.save(index_path, {**key, "files": [str(p) for p in csv_paths], **table.meta})
+        info["csv_index"] = "compiled"
+    return list(table.meta["fieldnames"]), table, info
+
+
+def match_row(user_title: str, rows: Sequence[CsvRow]) -> List[int]:
     t = _norm(user_title)
     if not t:
         return []
 
     matches: List[int] = []
     for i, r in enumerate(rows):
-        tn = _norm(r.track_name)
-        an = _norm(r.artist_name)
+        tn = r.track_norm
+        an = r.artist_norm
         if not tn or not an:
             continue
         if tn in t and an in t:
@@ -110,16 +218,441 @@ def match_row(user_title: str, rows: List[CsvRow]) -> List[int]:
     return matches
 
 
+class CsvMatchIndex:
+    """
+    Inverted index over normalized CSV rows; match() returns exactly what match_row() does.
+
+    Every row is filed under the first GRAM characters of the longer (more selective) of
+    its normalized artist/track strings. A row can only match a title that contains that
+    string, so sliding a window over the normalized title and looking up each substring
+    of a used key length yields every candidate; the containment check then confirms it.
+    """
+
+    GRAM = 8
+
+    def __init__(self, rows: TrackTable):
+        self._tracks = rows.column("track_norm")
+        self._artists = rows.column("artist_norm")
+        self._by_gram: Dict[str, List[int]] = {}
+        lengths: set[int] = set()
+        for i, (tn, an) in enumerate(zip(self._tracks, self._artists)):
+            if not tn or not an:
+                continue
+            longer = an if len(an) >= len(tn) else tn
+            key = longer[: self.GRAM]
+            self._by_gram.setdefault(key, []).append(i)
+            lengths.add(len(key))
+        self._key_lengths = sorted(lengths)
+
+    def candidates(self, t: str) -> set[int]:
+        out: set[int] = set()
+        by_gram = self._by_gram
+        for n in self._key_lengths:
+            for pos in range(len(t) - n + 1):
+                hit = by_gram.get(t[pos : pos + n])
+                if hit:
+                    out.update(hit)
+        return out
+
+    def match(self, user_title: str) -> List[int]:
+        t = _norm(user_title)
+        if not t:
+            return []
+        tracks, artists = self._tracks, self._artists
+        return sorted(i for i in self.candidates(t) if tracks[i] in t and artists[i] in t)
+
+
+class AhoCorasick:
+    """Aho-Corasick automaton: find every pattern occurring in a text in one linear pass."""
+
+    def __init__(self, patterns: List[str]):
+        goto: List[Dict[str, int]] = [{}]
+        out: List[List[int]] = [[]]
+        for pid, pat in enumerate(patterns):
+            node = 0
+            for ch in pat:
+                nxt = goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto[node][ch] = nxt
+                    goto.append({})
+                    out.append([])
+                node = nxt
+            out[node].append(pid)
+
+        fail = [0] * len(goto)
+        # dict_link[n]: nearest node on n's failure chain that ends a pattern (0 = none).
+        dict_link = [0] * len(goto)
+        queue = list(goto[0].values())
+        head = 0
+        while head < len(queue):
+            node = queue[head]
+            head += 1
+            for ch, nxt in goto[node].items():
+                f = fail[node]
+                while f and ch not in goto[f]:
+                    f = fail[f]
+                target = goto[f].get(ch, 0)
+                fail[nxt] = target if target != nxt else 0
+                dict_link[nxt] = fail[nxt] if out[fail[nxt]] else dict_link[fail[nxt]]
+                queue.append(nxt)
+
+        self._goto = goto
+        self._fail = fail
+        self._out = out
+        self._dict_link = dict_link
+
+    def find(self, text: str) -> set[int]:
+        """Ids of all patterns that occur in text."""
+        goto, fail, out, dict_link = self._goto, self._fail, self._out, self._dict_link
+        found: set[int] = set()
+        node = 0
+        for ch in text:
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            hit = node if out[node] else dict_link[node]
+            while hit:
+                found.update(out[hit])
+                hit = dict_link[hit]
+        return found
+
+
+class CsvAhoMatcher:
+    """
+    Compiles every distinct normalized artist and track string into one automaton, so a
+    title is scanned once; rows whose artist and track patterns were both seen match.
+    match() returns exactly what match_row() does.
+    """
+
+    def __init__(self, rows: TrackTable):
+        pattern_ids: Dict[str, int] = {}
+        # artist pattern id -> [(row index, track pattern id)]
+        self._by_artist: Dict[int, List[Tuple[int, int]]] = {}
+        for i, (tn, an) in enumerate(zip(rows.column("track_norm"), rows.column("artist_norm"))):
+            if not tn or not an:
+                continue
+            aid = pattern_ids.setdefault(an, len(pattern_ids))
+            tid = pattern_ids.setdefault(tn, len(pattern_ids))
+            self._by_artist.setdefault(aid, []).append((i, tid))
+        self._automaton = AhoCorasick(list(pattern_ids))
+
+    def match(self, user_title: str) -> List[int]:
+        t = _norm(user_title)
+        if not t:
+            return []
+        found = self._automaton.find(t)
+        by_artist = self._by_artist
+        out: List[int] = []
+        for pid in found:
+            for i, tid in by_artist.get(pid, ()):
+                if tid in found:
+                    out.append(i)
+        out.sort()
+        return out
+
+
+class _ScanMatcher:
+    """match_row() over the table's columns."""
+
+    def __init__(self, rows: TrackTable):
+        self._pairs = list(zip(rows.column("track_norm"), rows.column("artist_norm")))
+
+    def match(self, user_title: str) -> List[int]:
+        t = _norm(user_title)
+        if not t:
+            return []
+        return [i for i, (tn, an) in enumerate(self._pairs) if tn and an and tn in t and an in t]
+
+
+MATCHERS = {"aho": CsvAhoMatcher, "index": CsvMatchIndex, "scan": _ScanMatcher}
+
+
+def _fuzzy_text(s: str) -> str:
+    """Lowercase, collapse everything but letters/digits (any script) to single spaces."""
+    return _WORD_SEP_RE.sub(" ", (s or "").lower()).strip()
+
+
+def _gram_set(text: str, n: int, dim: int) -> List[int]:
+    """Distinct hashed character n-grams of text (padded, so word starts/ends count)."""
+    if not text:
+        return []
+    t = f" {text} "
+    return sorted({zlib.crc32(t[i : i + n].encode("utf-8")) % dim for i in range(max(1, len(t) - n + 1))})
+
+
+class FuzzyScorer:
+    """
+    Scores titles against CSV rows with hashed character n-grams, as NumPy matrix products
+    over row x title chunks so memory stays bounded by the chunk size, not the corpus.
+
+    best(): for titles with no containment hit. A row scores the geometric mean of how much
+    of its artist and how much of its track name shows up in the title, so a row whose artist
+    matches but whose track does not stays low, and title noise ("Official Video") is free.
+
+    best_among(): for titles with several containment hits (all fully contained). Those are
+    told apart by cosine similarity of the whole title with "artist track".
+
+    Rows without a spotifyId never win.
+    """
+
+    def __init__(self, rows: TrackTable, *, n: int = 3, dim: int = 1024, chunk: int = 4096):
+        if np is None:
+            raise RuntimeError("fuzzy scoring requires numpy (pip install numpy)")
+        self._n = n
+        self._dim = dim
+        self._chunk = chunk
+        self._artist_grams = [_gram_set(_fuzzy_text(a), n, dim) for a in rows.column("artist_name")]
+        self._track_grams = [_gram_set(_fuzzy_text(t), n, dim) for t in rows.column("track_name")]
+        self._row_ok = np.array(
+            [
+                bool(sid) and bool(a) and bool(t)
+                for sid, a, t in zip(rows.column("spotify_id"), self._artist_grams, self._track_grams)
+            ],
+            dtype=bool,
+        )
+        self._rows = rows
+
+    def _matrix(self, grams: List[List[int]], norm: Optional[str]) -> "np.ndarray":
+        """One binary row per gram list; 'l1' scales to unit sum (dot with a binary title = coverage),
+        'l2' to unit length (dot = cosine), None leaves it binary."""
+        dim = self._dim
+        flat = np.fromiter((i * dim + h for i, g in enumerate(grams) for h in g), dtype=np.int64)
+        m = np.zeros(len(grams) * dim, dtype=np.float32)
+        m[flat] = 1.0
+        m = m.reshape(len(grams), dim)
+        if norm is None:
+            return m
+        sizes = np.array([len(g) for g in grams], dtype=np.float32)
+        sizes[sizes == 0] = 1.0
+        m /= (sizes if norm == "l1" else np.sqrt(sizes))[:, None]
+        return m
+
+    def _title_grams(self, title: str) -> List[int]:
+        return _gram_set(_fuzzy_text(title), self._n, self._dim)
+
+    def best(self, titles: List[str]) -> Tuple["np.ndarray", "np.ndarray", "np.ndarray"]:
+        """For each title: (best row index, best score, runner-up score); index -1 if no row."""
+        t_count = len(titles)
+        best_idx = np.full(t_count, -1, dtype=np.int64)
+        best = np.full(t_count, -1.0, dtype=np.float32)
+        second = np.full(t_count, -1.0, dtype=np.float32)
+        rows_total = len(self._rows)
+        if not t_count or not rows_total:
+            return best_idx, best, second
+
+        tv_all = self._matrix([self._title_grams(t) for t in titles], None)
+        for r0 in range(0, rows_total, self._chunk):
+            r1 = min(rows_total, r0 + self._chunk)
+            width = r1 - r0
+            rv = np.vstack(
+                (self._matrix(self._artist_grams[r0:r1], "l1"), self._matrix(self._track_grams[r0:r1], "l1"))
+            )
+            dead = ~self._row_ok[r0:r1]
+            for t0 in range(0, t_count, self._chunk):
+                t1 = min(t_count, t0 + self._chunk)
+                cov = tv_all[t0:t1] @ rv.T
+                s = np.sqrt(cov[:, :width] * cov[:, width:])
+                s[:, dead] = -1.0
+                # Top two per title: argmax, blank it out, max again (cheaper than a partition).
+                rows_ix = np.arange(t1 - t0)
+                top = s.argmax(axis=1)
+                c_idx = top + r0
+                c_best = s[rows_ix, top]
+                s[rows_ix, top] = -1.0
+                c_second = s.max(axis=1)
+
+                b, sec = best[t0:t1], second[t0:t1]
+                sec[:] = np.maximum(np.maximum(sec, c_second), np.minimum(b, c_best))
+                better = c_best > b
+                best_idx[t0:t1][better] = c_idx[better]
+                b[:] = np.maximum(b, c_best)
+        return best_idx, best, second
+
+    def best_among(self, title: str, candidates: List[int]) -> Tuple[int, float, float]:
+        """Like best() for one title, restricted to the given row indices (scored by cosine)."""
+        cands = [i for i in candidates if self._row_ok[i]]
+        if not cands:
+            return -1, -1.0, -1.0
+        rows = self._rows
+        texts = [_fuzzy_text(f"{rows[i].artist_name} {rows[i].track_name}") for i in cands]
+        rv = self._matrix([_gram_set(t, self._n, self._dim) for t in texts], "l2")
+        s = rv @ self._matrix([self._title_grams(title)], "l2")[0]
+        order = np.argsort(-s, kind="stable")
+        runner_up = float(s[order[1]]) if len(cands) > 1 else -1.0
+        return cands[int(order[0])], float(s[order[0]]), runner_up
+
+
+FUZZY_REPORT_FIELDS = ["userTitle", "exactMatches", "outcome", "score", "runnerUp", "spotifyId", "Track Name", "Artist Name"]
+
+
+def fuzzy_resolve(
+    scorer: FuzzyScorer,
+    rows: TrackTable,
+    pending: Dict[str, List[int]],
+    *,
+    min_score: float,
+    margin: float,
+) -> Tuple[Dict[str, int], List[Dict[str, Any]]]:
+    """
+    Pick a row for titles the containment matchers left unmatched (no hits: scored against
+    every row) or ambiguous (several hits: scored among those). A pick needs score >= min_score
+    and a lead of at least margin over the runner-up. Returns (title -> row index, report rows).
+    """
+    titles = list(pending)
+    scored: Dict[str, Tuple[int, float, float]] = {}
+    open_titles = [t for t in titles if not pending[t]]
+    if open_titles:
+        idx, best, second = scorer.best(open_titles)
+        for j, t in enumerate(open_titles):
+            scored[t] = (int(idx[j]), float(best[j]), float(second[j]))
+    for t in titles:
+        if pending[t]:
+            scored[t] = scorer.best_among(t, pending[t])
+
+    picks: Dict[str, int] = {}
+    report: List[Dict[str, Any]] = []
+    for t in titles:
+        i, score, runner_up = scored[t]
+        if i < 0:
+            outcome = "no_candidate"
+        elif score < min_score:
+            outcome = "low_score"
+        elif score - runner_up < margin:
+            outcome = "low_margin"
+        else:
+            outcome = "matched"
+            picks[t] = i
+        row = rows[i] if i >= 0 else None
+        report.append(
+            {
+                "userTitle": t,
+                "exactMatches": len(pending[t]),
+                "outcome": outcome,
+                "score": f"{score:.4f}" if i >= 0 else "",
+                "runnerUp": f"{runner_up:.4f}" if runner_up >= 0 else "",
+                "spotifyId": row.spotify_id if row else "",
+                "Track Name": row.track_name if row else "",
+                "Artist Name": row.artist_name if row else "",
+            }
+        )
+    return picks, report
+
+
+ISRC_REPORT_FIELDS = ["isrc", "userTitle", "candidates", "resolution", "spotifyId", "Track Name", "Artist Name", "candidateIds"]
+
+
+def build_isrc_map(rows: TrackTable) -> Dict[str, List[int]]:
+    """ISRC -> row indices (CSV order), for rows that have both an ISRC and a spotifyId."""
+    by_isrc: Dict[str, List[int]] = {}
+    for i, (isrc, spotify_id) in enumerate(zip(rows.column("isrc"), rows.column("spotify_id"))):
+        if isrc and spotify_id:
+            by_isrc.setdefault(isrc, []).append(i)
+    return by_isrc
+
+
+def resolve_isrc(
+    rows: TrackTable, by_isrc: Dict[str, List[int]], isrc: str, user_title: str
+) -> Tuple[Optional[int], str]:
+    """
+    Pick the row for an item's ISRC. One row: take it. Several rows (the same recording on
+    several releases) is a collision: take the candidate whose names are contained in the title
+    (the longest track name if several are), else the first in CSV order; any of them plays
+    the same recording.
+    Returns (row index or None, resolution).
+    """
+    cands = by_isrc.get(isrc)
+    if not cands:
+        return None, "none"
+    if len(cands) == 1:
+        return cands[0], "unique"
+    contained = match_row(user_title, [rows[i] for i in cands]) if user_title else []
+    if contained:
+        best = max(contained, key=lambda j: len(rows[cands[j]].track_norm))
+        return cands[best], "title"
+    return cands[0], "first"
+
+
+# The matcher a forked match_titles() worker inherits from its parent.
+_POOL_MATCHER: Any = None
+
+
+def _match_shard(titles: List[str]) -> List[List[int]]:
+    return [_POOL_MATCHER.match(t) for t in titles]
+
+
+def match_titles(matcher: Any, titles: List[str], jobs: int) -> Dict[str, List[int]]:
+    """
+    Match each title, sharding the work over `jobs` forked processes. Workers inherit the
+    matcher (and the memory-mapped CSV index behind it) copy-on-write instead of having it
+    pickled per task, and shards are collected in submission order, so the result does not
+    depend on scheduling. Without fork (e.g. Windows) this runs in-process.
+    """
+    global _POOL_MATCHER
+    if jobs <= 1 or len(titles) < 2 or "fork" not in mp.get_all_start_methods():
+        return {t: matcher.match(t) for t in titles}
+
+    # A few shards per worker keeps them busy when some titles are slower than others.
+    size = -(-len(titles) // (jobs * 4))
+    shards = [titles[i : i + size] for i in range(0, len(titles), size)]
+    _POOL_MATCHER = matcher
+    # Keep the collector from touching (and so copying) every inherited object in the children.
+    gc.freeze()
+    try:
+        with mp.get_context("fork").Pool(jobs) as pool:
+            results = pool.map(_match_shard, shards)
+    finally:
+        gc.unfreeze()
+        _POOL_MATCHER = None
+
+    out: Dict[str, List[int]] = {}
+    for shard, res in zip(shards, results):
+        out.update(zip(shard, res))
+    return out
+
+
+def _needs_match(item: Dict[str, Any], unmatched_value: str, fill_missing: bool) -> bool:
+    """Default behavior: only update items explicitly marked as unmatched."""
+    existing = item.get("spotifyId")
+    if existing is None:
+        return fill_missing
+    if isinstance(existing, str):
+        if existing.strip() == "":
+            return fill_missing
+        return existing == unmatched_value
+    return False
+
+
 def main(argv: Optional[List[str]] = None) -> int:
     p = argparse.ArgumentParser(
         description=(
             "Enrich playlist JSON items with spotifyId by matching userTitle against a Spotify-export CSV. "
-            "Writes enriched.json and unused.csv to the current directory."
+            "Writes enriched.json (or updates --json with --in-place) and unused.csv to the current directory."
         )
     )
-    p.add_argument("--json", dest="json_path", required=True, help="Input JSON file path")
-    p.add_argument("--json-path", dest="json_path_expr", required=True, help="Dotted path to the items list")
-    p.add_argument("--csv", dest="csv_path", required=True, help="Input CSV file path")
+    p.add_argument("--json", dest="json_path", help="Input JSON file path")
+    p.add_argument("--json-path", dest="json_path_expr", help="Dotted path to the items list")
+    p.add_argument(
+        "--csv",
+        dest="csv_paths",
+        action="append",
+        required=True,
+        help="Input CSV file path (repeatable: exports are merged, duplicate Track URIs dropped)",
+    )
+    p.add_argument(
+        "--csv-index",
+        default=str(DEFAULT_CSV_INDEX),
+        help=(
+            "Compiled index of the merged CSVs, reused until an input CSV changes "
+            f"(default: {DEFAULT_CSV_INDEX.name} next to this script)"
+        ),
+    )
+    p.add_argument("--no-csv-index", action="store_true", help="Parse the CSVs every run; do not read or write --csv-index")
+    p.add_argument(
+        "--compile-only",
+        action="store_true",
+        help="Only build (or refresh) --csv-index from the given --csv files and exit.",
+    )
     p.add_argument("--out-json", dest="out_json", default="enriched.json", help="Output JSON file name")
     p.add_argument("--out-unused", dest="out_unused", default="unused.csv", help="Output CSV file name")
     p.add_argument(
@@ -137,64 +670,209 @@ def main(argv: Optional[List[str]] = None) -> int:
             "already equals the unmatched value are updated."
         ),
     )
+    p.add_argument(
+        "--matcher",
+        choices=sorted(MATCHERS),
+        default="index",
+        help=(
+            "Containment matcher: 'index' (n-gram inverted index, default), 'aho' (one Aho-Corasick "
+            "pass per title; slower to build, per-title cost independent of CSV size) or 'scan' "
+            "(reference linear scan). All give identical results."
+        ),
+    )
+    p.add_argument(
+        "--isrc-join",
+        action="store_true",
+        help=(
+            "First match items to CSV rows by ISRC (item field --isrc-field, CSV column 'ISRC'); only items "
+            "without a known ISRC fall back to title matching. ISRCs shared by several rows are listed in "
+            "--out-isrc-report."
+        ),
+    )
+    p.add_argument("--isrc-field", default="isrc", help="Item field holding the ISRC (default: isrc)")
+    p.add_argument(
+        "--out-isrc-report", default="isrc-collisions.csv", help="ISRC collision report (CSV, with --isrc-join)"
+    )
+    p.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        help="Match titles in N worker processes (default 1; results are identical for any N)",
+    )
+    p.add_argument(
+        "--fuzzy",
+        action="store_true",
+        help=(
+            "Score titles left unmatched or ambiguous by the containment matcher against the CSV rows "
+            "with hashed character n-grams (needs numpy) and take the best row when it is confident. "
+            "Every scored title is listed in --out-fuzzy."
+        ),
+    )
+    p.add_argument("--fuzzy-min-score", type=float, default=0.75, help="Minimum score for a fuzzy pick (default 0.75)")
+    p.add_argument(
+        "--fuzzy-margin",
+        type=float,
+        default=0.1,
+        help="Required lead of the best row over the runner-up (default 0.1)",
+    )
+    p.add_argument("--out-fuzzy", dest="out_fuzzy", default="fuzzy.csv", help="Fuzzy scoring report (CSV)")
+    p.add_argument(
+        "--in-place",
+        action="store_true",
+        help="Write the enriched JSON back to the --json file (atomically) instead of --out-json.",
+    )
+    add_journal_args(p)
 
     args = p.parse_args(argv)
+    if args.compile_only and args.no_csv_index:
+        p.error("--compile-only needs the CSV index (drop --no-csv-index)")
+    if not args.compile_only and not (args.json_path and args.json_path_expr):
+        p.error("--json and --json-path are required")
+    if args.fuzzy and np is None:
+        p.error("--fuzzy requires numpy (pip install numpy)")
+
+    csv_paths = [Path(c) for c in args.csv_paths]
+    index_path = None if args.no_csv_index else Path(args.csv_index)
+    csv_sources = [file_sha256(p) for p in csv_paths]
+    header, csv_rows, csv_info = load_csv_corpus(csv_paths, index_path, csv_sources)
+    if args.compile_only:
+        print(json.dumps({**csv_info, "csv_files": len(csv_paths), "csv_total": len(csv_rows)}, indent=2), file=sys.stderr)
+        return 0
 
     json_path = Path(args.json_path)
-    csv_path = Path(args.csv_path)
     out_json = Path(args.out_json)
     out_unused = Path(args.out_unused)
 
-    data = json.loads(json_path.read_text(encoding="utf-8"))
-    data_out = deepcopy(data)
+    # Mutated in place: nothing else needs the original document, so no deepcopy.
+    data = load_path(json_path)
 
-    header, csv_rows = load_csv_rows(csv_path)
+    matcher = MATCHERS[args.matcher](csv_rows)
 
     try:
-        items = _get_in(data_out, args.json_path_expr)
-    except KeyError as e:
+        items = compile_path(args.json_path_expr).get(data)
+    except (KeyError, ValueError) as e:
         raise SystemExit(f"JSON path not found: {args.json_path_expr}. {e}")
 
     if not isinstance(items, list):
         raise SystemExit(f"JSON path '{args.json_path_expr}' did not resolve to a list.")
 
+    # Items whose (post-enrichment) inputs the journal has already seen with this exact
+    # configuration would come out the same again; they are left alone.
+    journal = journal_from_args(
+        args,
+        "enrich_spotify_ids",
+        {
+            "csv": csv_sources,
+            "unmatched_value": args.unmatched_value,
+            "fill_missing": args.fill_missing,
+            "isrc_join": args.isrc_field if args.isrc_join else None,
+            "fuzzy": [args.fuzzy_min_score, args.fuzzy_margin] if args.fuzzy else None,
+        },
+        ITEM_FIELDS + ((args.isrc_field,) if args.isrc_join else ()),
+    )
+    unchanged_items: set[int] = set()
+
+    # --isrc-join: items whose ISRC is in the CSV are resolved by that key alone (keyed by
+    # id(item)); only the rest go on to title matching.
+    isrc_picks: Dict[int, int] = {}
+    isrc_collisions = 0
+    isrc_report: List[Dict[str, Any]] = []
+    by_isrc = build_isrc_map(csv_rows) if args.isrc_join else {}
+
+    # Every distinct title that needs a match is matched up front (sharded over --jobs
+    # processes); the streaming pass below only applies the results.
+    titles: Dict[str, None] = {}
+    for item in items:
+        if not isinstance(item, dict) or not _needs_match(item, args.unmatched_value, args.fill_missing):
+            continue
+        if journal.item_key(item) in journal:
+            unchanged_items.add(id(item))
+            continue
+        user_title = (item.get("userTitle") or item.get("title") or "").strip()
+        isrc = item.get(args.isrc_field)
+        if by_isrc and isinstance(isrc, str) and _norm_isrc(isrc) in by_isrc:
+            key = _norm_isrc(isrc)
+            idx, resolution = resolve_isrc(csv_rows, by_isrc, key, user_title)
+            isrc_picks[id(item)] = idx
+            if resolution in ("title", "first"):
+                isrc_collisions += 1
+                chosen = csv_rows[idx]
+                isrc_report.append(
+                    {
+                        "isrc": key,
+                        "userTitle": user_title,
+                        "candidates": len(by_isrc[key]),
+                        "resolution": resolution,
+                        "spotifyId": chosen.spotify_id,
+                        "Track Name": chosen.track_name,
+                        "Artist Name": chosen.artist_name,
+                        "candidateIds": ";".join(csv_rows[i].spotify_id for i in by_isrc[key]),
+                    }
+                )
+            continue
+        if user_title:
+            titles[user_title] = None
+    if args.isrc_join:
+        with Path(args.out_isrc_report).open("w", encoding="utf-8", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=ISRC_REPORT_FIELDS)
+            writer.writeheader()
+            writer.writerows(isrc_report)
+    matches_by_title = match_titles(matcher, list(titles), args.jobs)
+
+    # Titles the containment matcher could not resolve uniquely, with their exact hits.
+    pending = {t: hits for t, hits in matches_by_title.items() if len(hits) != 1}
+    fuzzy_picks: Dict[str, int] = {}
+    if args.fuzzy:
+        scorer = FuzzyScorer(csv_rows)
+        fuzzy_picks, fuzzy_report = fuzzy_resolve(
+            scorer, csv_rows, pending, min_score=args.fuzzy_min_score, margin=args.fuzzy_margin
+        )
+        with Path(args.out_fuzzy).open("w", encoding="utf-8", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=FUZZY_REPORT_FIELDS)
+            writer.writeheader()
+            writer.writerows(fuzzy_report)
+
     used_indices: set[int] = set()
     enriched = 0
+    fuzzy_matched = 0
+    isrc_matched = 0
     ambiguous = 0
     missing = 0
     skipped = 0
+    processed: List[Dict[str, Any]] = []
 
-    for item in items:
-        if not isinstance(item, dict):
-            continue
-
-        existing = item.get("spotifyId")
+    def enrich_item(parent: list, item: Any) -> None:
+        nonlocal enriched, fuzzy_matched, isrc_matched, ambiguous, missing, skipped
+        if parent is not items or not isinstance(item, dict):
+            return
 
-        # Default behavior: only update items explicitly marked as unmatched.
-        if existing is None:
-            if not args.fill_missing:
-                skipped += 1
-                continue
-        elif isinstance(existing, str):
-            if existing.strip() == "":
-                if not args.fill_missing:
-                    skipped += 1
-                    continue
-            elif existing != args.unmatched_value:
-                skipped += 1
-                continue
-        else:
+        if not _needs_match(item, args.unmatched_value, args.fill_missing):
             skipped += 1
-            continue
+            return
+        if id(item) in unchanged_items:
+            return
+        processed.append(item)
+
+        idx = isrc_picks.get(id(item))
+        if idx is not None:
+            item["spotifyId"] = csv_rows[idx].spotify_id
+            used_indices.add(idx)
+            isrc_matched += 1
+            return
 
         user_title = (item.get("userTitle") or item.get("title") or "").strip()
         if not user_title:
             item["spotifyId"] = args.unmatched_value
             missing += 1
-            continue
-
-        matches = match_row(user_title, csv_rows)
-        if len(matches) == 1:
+            return
+
+        matches = matches_by_title[user_title]
+        if len(matches) != 1 and user_title in fuzzy_picks:
+            idx = fuzzy_picks[user_title]
+            item["spotifyId"] = csv_rows[idx].spotify_id
+            used_indices.add(idx)
+            fuzzy_matched += 1
+        elif len(matches) == 1:
             idx = matches[0]
             spotify_id = csv_rows[idx].spotify_id
             if spotify_id:
@@ -211,26 +889,39 @@ def main(argv: Optional[List[str]] = None) -> int:
             item["spotifyId"] = args.unmatched_value
             ambiguous += 1
 
-    out_json.write_text(json.dumps(data_out, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+    # The streaming write applies the matches computed above to each item as it goes out,
+    # so the document is never held as one big serialized string.
+    with atomic_text_writer(json_path if args.in_place else out_json) as f:
+        write_json_pretty(data, f, before_item=enrich_item)
+        f.write("\n")
 
     with out_unused.open("w", encoding="utf-8", newline="") as f:
         writer = csv.DictWriter(f, fieldnames=header)
         writer.writeheader()
-        for i, r in enumerate(csv_rows):
-            if i in used_indices:
+        for r in csv_rows:
+            if r.index in used_indices:
                 continue
             writer.writerow(r.raw)
 
+    # Only now that the output exists: record what each processed item looks like after enrichment.
+    for item in processed:
+        journal.record(journal.item_key(item))
+    journal.save()
+
     print(
         json.dumps(
             {
                 "items_total": len(items),
                 "enriched": enriched,
+                **({"isrc_matched": isrc_matched, "isrc_collisions": isrc_collisions} if args.isrc_join else {}),
+                **({"fuzzy_matched": fuzzy_matched} if args.fuzzy else {}),
                 "unmatched": missing,
                 "ambiguous": ambiguous,
                 "csv_total": len(csv_rows),
+                **csv_info,
                 "csv_unused": len(csv_rows) - len(used_indices),
                 "skipped": skipped,
+                **({"journal_unchanged": len(unchanged_items), "journal_reset": journal.reset} if journal.enabled else {}),
             },
             indent=2,
         ),
@@ -2,6 +2,7 @@
 
 import argparse
 import base64
+import glob
 import hashlib
 import json
 import os
@@ -14,11 +15,15 @@ import urllib.error
 import urllib.parse
 import urllib.request
 import webbrowser
-from copy import deepcopy
 from dataclasses import dataclass
 from http.server import BaseHTTPRequestHandler, HTTPServer
 from pathlib import Path
-from typing import Any, Dict, Iterable, List, Optional, Tuple
+from typing import Any, Callable, Dict, Iterable, List, Optional, TextIO, Tuple
+
+from enrich_journal import ITEM_FIELDS, EnrichJournal, add_journal_args, journal_from_args
+from json_codec import load_path, loads
+from json_path import compile_path
+from json_stream import atomic_text_writer, dumps_pretty, write_json_pretty
 
 
 SPOTIFY_ACCOUNTS_BASE = "https://accounts.spotify.com"
@@ -130,32 +135,27 @@ def _extract_spotify_id(item: Any) -> str:
     return ""
 
 
-def _get_in(root: Any, path: str) -> Any:
-    cur = root
-    if not path:
-        return cur
-    for part in path.split("."):
-        if isinstance(cur, dict) and part in cur:
-            cur = cur[part]
-            continue
-        raise KeyError(f"Path segment '{part}' not found")
-    return cur
+def _find_items_lists(root: Any) -> List[Tuple[str, List[Any]]]:
+    out: List[Tuple[str, List[Any]]] = []
+    if isinstance(root, dict):
+        # Hosted playlist files (public/video-hosted/pl_*.json) keep items at the root.
+        if isinstance(root.get("items"), list):
+            out.append(("items", root["items"]))
+        # Library files: find all dict values containing an 'items' list.
+        for k, v in root.items():
+            if isinstance(v, dict) and isinstance(v.get("items"), list):
+                out.append((f"{k}.items", v["items"]))
+    return out
 
 
 def _iter_items_lists(root: Any, explicit_path: str) -> List[Tuple[str, List[Any]]]:
     if explicit_path:
-        items = _get_in(root, explicit_path)
+        items = compile_path(explicit_path).get(root)
         if not isinstance(items, list):
             raise SystemExit(f"JSON path '{explicit_path}' did not resolve to a list.")
         return [(explicit_path, items)]
 
-    # Default: find all dict values containing an 'items' list.
-    out: List[Tuple[str, List[Any]]] = []
-    if isinstance(root, dict):
-        for k, v in root.items():
-            if isinstance(v, dict) and isinstance(v.get("items"), list):
-                out.append((f"{k}.items", v["items"]))
-
+    out = _find_items_lists(root)
     if not out:
         raise SystemExit("No '<playlist>.items' arrays found; pass --json-path.")
 
@@ -196,7 +196,7 @@ class TokenStore:
     def load(self) -> Optional[OAuthToken]:
         if not self._token_path.exists():
             return None
-        obj = json.loads(_read_text(self._token_path))
+        obj = loads(_read_text(self._token_path))
         tok = OAuthToken.from_json(obj)
         if not tok.access_token or not tok.refresh_token:
             return None
@@ -205,7 +205,7 @@ class TokenStore:
 
     def save(self, token: OAuthToken) -> None:
         self._token_path.parent.mkdir(parents=True, exist_ok=True)
-        self._token_path.write_text(json.dumps(token.to_json(), indent=2) + "\n", encoding="utf-8")
+        self._token_path.write_text(dumps_pretty(token.to_json(), ensure_ascii=True) + "\n", encoding="utf-8")
         self._token = token
 
     def ensure_valid(self) -> OAuthToken:
@@ -404,11 +404,11 @@ def http_request_json(
             raw = _read_http_body(resp)
             if not raw:
                 return {}
-            return json.loads(raw.decode("utf-8"))
+            return loads(raw.decode("utf-8"))
     except urllib.error.HTTPError as e:
         raw = e.read() or b""
         try:
-            payload = json.loads(raw.decode("utf-8")) if raw else {}
+            payload = loads(raw.decode("utf-8")) if raw else {}
         except Exception:
             payload = {"raw": raw.decode("utf-8", errors="replace")}
 
@@ -510,7 +510,7 @@ def _load_isrc_cache(path: Path) -> Dict[str, Optional[str]]:
     if not path.exists():
         return {}
     try:
-        obj = json.loads(_read_text(path))
+        obj = loads(_read_text(path))
         if isinstance(obj, dict):
             out: Dict[str, Optional[str]] = {}
             for k, v in obj.items():
@@ -526,25 +526,323 @@ def _load_isrc_cache(path: Path) -> Dict[str, Optional[str]]:
 def _save_isrc_cache(path: Path, cache: Dict[str, Optional[str]]) -> None:
     path.parent.mkdir(parents=True, exist_ok=True)
     tmp = path.with_suffix(path.suffix + ".tmp")
-    tmp.write_text(json.dumps(cache, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+    tmp.write_text(dumps_pretty(cache) + "\n", encoding="utf-8")
     tmp.replace(path)
 
 
+def _write_output(
+    data: Any,
+    args: argparse.Namespace,
+    json_path: Path,
+    *,
+    before_item: Optional[Callable[[list, Any], None]],
+    on_open: Optional[Callable[[TextIO], None]] = None,
+) -> None:
+    """Stream the document to stdout, --output or back to --json (--in-place)."""
+    if args.in_place or args.output != "-":
+        target = json_path if args.in_place else Path(args.output)
+        with atomic_text_writer(target) as f:
+            if on_open:
+                on_open(f)
+            write_json_pretty(data, f, before_item=before_item)
+            f.write("\n")
+        return
+
+    if on_open:
+        on_open(sys.stdout)
+    write_json_pretty(data, sys.stdout, before_item=before_item)
+    # Matches the historical print(json.dumps(...) + "\n") output byte for byte.
+    sys.stdout.write("\n\n")
+    sys.stdout.flush()
+
+
+class _IsrcFetcher:
+    """Fetches ISRCs for pending Spotify IDs in batches, lazily and in a fixed order.
+
+    Authentication only happens when the first batch is actually needed, and every
+    batch is checkpointed into the ISRC cache.
+    """
+
+    def __init__(self, args: argparse.Namespace, cache_path: Path, cache: Dict[str, Optional[str]]):
+        self.args = args
+        self.cache_path = cache_path
+        self.cache = cache
+        self.out_fp: Optional[TextIO] = None
+        self.fetched = 0
+        self.rate_limited_wait: Optional[float] = None
+        self._token_store: Optional[TokenStore] = None
+        self._batches: List[List[str]] = []
+        self._pending: set[str] = set()
+
+    def queue(self, ids: Iterable[str]) -> None:
+        pending = [sid for sid in ids if sid not in self.cache and sid not in self._pending]
+        self._pending.update(pending)
+        # Spotify /v1/tracks supports up to 50 IDs per request.
+        self._batches.extend(chunks(pending, 50))
+
+    def token_store(self) -> TokenStore:
+        if self._token_store is None:
+            args = self.args
+            client_id = _find_spotify_client_id(args.env_file or None, args.client_id or None)
+            token_store = TokenStore(Path(args.token).expanduser(), client_id)
+            if token_store.load() is None:
+                _pkce_authorize_and_exchange(
+                    client_id=client_id,
+                    redirect_uri=args.redirect_uri,
+                    token_store=token_store,
+                    open_browser=bool(args.open_browser),
+                    copy_auth_url=bool(args.copy_auth_url),
+                )
+            else:
+                token_store.ensure_valid()
+            self._token_store = token_store
+        return self._token_store
+
+    def fetch_next_batch(self) -> bool:
+        if not self._batches or self.rate_limited_wait:
+            return False
+        batch = self._batches.pop(0)
+        # Let everything finalized so far reach the reader before we block on the network.
+        if self.out_fp is not None:
+            self.out_fp.flush()
+        try:
+            tracks = spotify_get_tracks(
+                self.token_store(),
+                batch,
+                throttle_ms=int(self.args.throttle_ms),
+                max_wait_seconds=float(self.args.max_wait_seconds),
+            )
+        except RateLimitWaitTooLong as e:
+            self.rate_limited_wait = e.wait_seconds
+            self._batches.clear()
+            return False
+
+        self.fetched += len(batch)
+        # Spotify returns a list aligned with ids; unknown ids become null.
+        for i, t in enumerate(tracks):
+            sid = batch[i] if i < len(batch) else None
+            if not sid:
+                continue
+            if not isinstance(t, dict):
+                self.cache[sid] = None
+                continue
+            ext = t.get("external_ids")
+            isrc = ext.get("isrc") if isinstance(ext, dict) else None
+            self.cache[sid] = isrc if isinstance(isrc, str) and isrc else None
+        self._pending.difference_update(batch)
+
+        _save_isrc_cache(self.cache_path, self.cache)
+        return True
+
+    def fetch_all(self) -> None:
+        while self.fetch_next_batch():
+            pass
+
+    def lookup(self, sid: str) -> Optional[str]:
+        while sid in self._pending and self.fetch_next_batch():
+            pass
+        return self.cache.get(sid)
+
+
+def _scan_items(
+    items_lists: List[Tuple[str, List[Any]]],
+    field_name: str,
+    stats: Dict[str, int],
+    ids: Dict[str, None],
+    journal: EnrichJournal,
+) -> None:
+    """Count items and collect spotify IDs missing field_name, in first-appearance order.
+    Items the journal has already seen unchanged are counted but not collected."""
+    for _, items in items_lists:
+        stats["items_total"] += len(items)
+        for it in items:
+            if not isinstance(it, dict):
+                continue
+            if isinstance(it.get(field_name), str) and it.get(field_name):
+                stats["already_had_isrc"] += 1
+                continue
+            if journal.item_key(it) in journal:
+                stats["unchanged"] += 1
+                continue
+            sid = _extract_spotify_id(it)
+            if sid:
+                ids.setdefault(sid, None)
+            else:
+                stats["missing_spotifyId"] += 1
+
+
+def _make_enricher(
+    items_lists: List[Tuple[str, List[Any]]],
+    field_name: str,
+    fetcher: _IsrcFetcher,
+    stats: Dict[str, int],
+    journal: EnrichJournal,
+    processed: List[Dict[str, Any]],
+) -> Callable[[list, Any], None]:
+    """Returns the per-item hook; items it settled (enriched or known to have no ISRC) are
+    appended to processed so the caller can journal them once the output is written."""
+    target_lists = {id(items) for _, items in items_lists}
+
+    def finalize_item(parent: list, it: Any) -> None:
+        if id(parent) not in target_lists or not isinstance(it, dict):
+            return
+        if isinstance(it.get(field_name), str) and it.get(field_name):
+            return
+        sid = _extract_spotify_id(it)
+        if not sid:
+            return
+        if journal.item_key(it) in journal:
+            return
+        isrc = fetcher.lookup(sid)
+        if isrc:
+            it[field_name] = isrc
+            stats["enriched"] += 1
+        else:
+            stats["not_found_in_spotify"] += 1
+        # Not settled if the lookup was cut short by a rate limit.
+        if sid in fetcher.cache:
+            processed.append(it)
+
+    return finalize_item
+
+
+def _record_processed(journal: EnrichJournal, processed: List[Dict[str, Any]]) -> None:
+    for it in processed:
+        journal.record(journal.item_key(it))
+    journal.save()
+
+
+def _new_stats() -> Dict[str, int]:
+    return {
+        "items_total": 0,
+        "enriched": 0,
+        "already_had_isrc": 0,
+        "missing_spotifyId": 0,
+        "not_found_in_spotify": 0,
+        "unchanged": 0,
+    }
+
+
+def _corpus_files(spec: str) -> List[Path]:
+    p = Path(spec).expanduser()
+    if p.is_dir():
+        files = sorted(p.glob("*.json"))
+    else:
+        files = sorted(Path(f) for f in glob.glob(str(p)))
+    return [f for f in files if f.is_file()]
+
+
+def _run_corpus(args: argparse.Namespace, field_name: str, journal: EnrichJournal) -> int:
+    """Enrich every playlist file matched by --corpus, fetching each unique ID once.
+
+    Files are scanned once to build the union of IDs, then re-read one at a time and
+    written back atomically, so only a single document is held in memory at a time.
+    """
+    files = _corpus_files(args.corpus)
+    if not files:
+        raise SystemExit(f"No JSON files matched --corpus {args.corpus!r}.")
+
+    totals = _new_stats()
+    per_file: Dict[Path, Dict[str, int]] = {}
+    needs_isrc: set[Path] = set()
+    all_ids: Dict[str, None] = {}
+    skipped_files: List[str] = []
+
+    for path in files:
+        try:
+            root = load_path(path)
+            items_lists = _iter_items_lists(root, args.json_path_expr) if args.json_path_expr else _find_items_lists(root)
+        except (ValueError, KeyError, SystemExit) as e:
+            print(f"Skipping {path}: {e}", file=sys.stderr)
+            skipped_files.append(str(path))
+            continue
+        if not items_lists:
+            skipped_files.append(str(path))
+            continue
+        stats = _new_stats()
+        file_ids: Dict[str, None] = {}
+        _scan_items(items_lists, field_name, stats, file_ids, journal)
+        per_file[path] = stats
+        if file_ids:
+            needs_isrc.add(path)
+        for sid in file_ids:
+            all_ids.setdefault(sid, None)
+        del root, items_lists
+
+    cache_path = Path(args.cache).expanduser()
+    fetcher = _IsrcFetcher(args, cache_path, _load_isrc_cache(cache_path))
+    fetcher.queue(all_ids)
+    fetcher.fetch_all()
+
+    files_written = 0
+    for path, scanned in per_file.items():
+        stats = _new_stats()
+        if path in needs_isrc:
+            root = load_path(path)
+            items_lists = _iter_items_lists(root, args.json_path_expr) if args.json_path_expr else _find_items_lists(root)
+            file_processed: List[Dict[str, Any]] = []
+            enrich = _make_enricher(items_lists, field_name, fetcher, stats, journal, file_processed)
+            for _, items in items_lists:
+                for it in items:
+                    enrich(items, it)
+            if stats["enriched"]:
+                with atomic_text_writer(path) as f:
+                    write_json_pretty(root, f)
+                    f.write("\n")
+                files_written += 1
+            for it in file_processed:
+                journal.record(journal.item_key(it))
+        for k in ("items_total", "already_had_isrc", "missing_spotifyId", "unchanged"):
+            stats[k] = scanned[k]
+        per_file[path] = stats
+        for k, v in stats.items():
+            totals[k] += v
+    journal.save()
+
+    print(
+        json.dumps(
+            {
+                "files": {str(p): s for p, s in per_file.items()},
+                "files_skipped": skipped_files,
+                "files_written": files_written,
+                **totals,
+                "spotify_ids_unique": len(all_ids),
+                "spotify_ids_cached": sum(1 for v in fetcher.cache.values() if isinstance(v, str) and v),
+                "fetched_ids": fetcher.fetched,
+                "incomplete": bool(fetcher.rate_limited_wait),
+                "rate_limited_wait_seconds": fetcher.rate_limited_wait,
+            },
+            indent=2,
+        ),
+        file=sys.stderr,
+    )
+    return 2 if fetcher.rate_limited_wait else 0
+
+
 def main(argv: Optional[List[str]] = None) -> int:
     p = argparse.ArgumentParser(
         description=(
             "Enrich playlist JSON items with ISRC (via Spotify Web API /v1/tracks) using existing spotifyId fields. "
-            "Writes enriched JSON to stdout; progress/stats go to stderr."
+            "Streams enriched JSON to stdout (or --output / --in-place); progress/stats go to stderr."
         )
     )
-    p.add_argument("--json", dest="json_path", required=True, help="Input JSON file path (e.g. public/local-playlist.json)")
+    src = p.add_mutually_exclusive_group(required=True)
+    src.add_argument("--json", dest="json_path", help="Input JSON file path (e.g. public/local-playlist.json)")
+    src.add_argument(
+        "--corpus",
+        default="",
+        help=(
+            "Directory (all *.json inside) or glob of playlist files (e.g. 'public/video-hosted/pl_*.json'). "
+            "Each unique spotifyId is fetched once across all files and every file is updated in place."
+        ),
+    )
     p.add_argument(
         "--json-path",
         dest="json_path_expr",
         default="",
         help=(
             "Optional dotted path to a specific items list (e.g. user__wave_alternatives.items). "
-            "If omitted, all '<playlist>.items' arrays under the root object are processed."
+            "If omitted, the root 'items' array and all '<playlist>.items' arrays under the root object are processed."
         ),
     )
     p.add_argument("--field", dest="field", default="isrc", help="Field name to write (default: isrc)")
@@ -590,49 +888,57 @@ def main(argv: Optional[List[str]] = None) -> int:
         default=600.0,
         help="If Spotify responds with Retry-After larger than this, stop and exit after writing partial output.",
     )
+    p.add_argument(
+        "--output",
+        default="-",
+        help="Where to write the enriched JSON: a file path, or '-' for stdout (default).",
+    )
+    p.add_argument(
+        "--in-place",
+        action="store_true",
+        help="Write the enriched JSON back to the --json file (atomically) instead of stdout.",
+    )
 
-    args = p.parse_args(argv)
+    add_journal_args(p)
 
-    json_path = Path(args.json_path)
-    data = json.loads(json_path.read_text(encoding="utf-8"))
-    data_out = deepcopy(data)
+    args = p.parse_args(argv)
 
-    items_lists = _iter_items_lists(data_out, args.json_path_expr)
+    if args.in_place and args.output != "-":
+        p.error("--in-place cannot be combined with --output")
 
-    # Collect unique spotify IDs that are missing ISRC.
     field_name = str(args.field or "isrc")
+    journal = journal_from_args(args, "enrich_spotify_isrc", {"field": field_name}, ITEM_FIELDS + (field_name,))
 
-    all_ids: List[str] = []
-    total_items = 0
-    already = 0
-    missing_spotify = 0
+    if args.corpus:
+        if args.output != "-":
+            p.error("--corpus always updates the matched files in place; --output is not supported")
+        return _run_corpus(args, field_name, journal)
 
-    for _, items in items_lists:
-        total_items += len(items)
-        for it in items:
-            if not isinstance(it, dict):
-                continue
-            if isinstance(it.get(field_name), str) and it.get(field_name):
-                already += 1
-                continue
-            sid = _extract_spotify_id(it)
-            if sid:
-                all_ids.append(sid)
-            else:
-                missing_spotify += 1
+    json_path = Path(args.json_path)
+    # Mutated in place: nothing else needs the original document, so no deepcopy.
+    data = load_path(json_path)
 
-    unique_ids = sorted(set(all_ids))
+    items_lists = _iter_items_lists(data, args.json_path_expr)
+
+    # Collect spotify IDs that are missing ISRC, in first-appearance order so fetch
+    # batches line up with the order items are streamed out.
+    scanned = _new_stats()
+    ids: Dict[str, None] = {}
+    _scan_items(items_lists, field_name, scanned, ids, journal)
+
+    unique_ids = list(ids)
 
     if not unique_ids:
-        print(json.dumps(data_out, ensure_ascii=False, indent=2) + "\n")
+        _write_output(data, args, json_path, before_item=None)
         print(
             json.dumps(
                 {
-                    "items_total": total_items,
+                    "items_total": scanned["items_total"],
                     "spotify_ids": 0,
                     "enriched": 0,
-                    "already_had_isrc": already,
-                    "missing_spotifyId": missing_spotify,
+                    "already_had_isrc": scanned["already_had_isrc"],
+                    "missing_spotifyId": scanned["missing_spotifyId"],
+                    "unchanged": scanned["unchanged"],
                 },
                 indent=2,
             ),
@@ -640,98 +946,41 @@ def main(argv: Optional[List[str]] = None) -> int:
         )
         return 0
 
-    client_id = _find_spotify_client_id(args.env_file or None, args.client_id or None)
-    token_store = TokenStore(Path(args.token).expanduser(), client_id)
-
-    tok = token_store.load()
-    if tok is None:
-        _pkce_authorize_and_exchange(
-            client_id=client_id,
-            redirect_uri=args.redirect_uri,
-            token_store=token_store,
-            open_browser=bool(args.open_browser),
-            copy_auth_url=bool(args.copy_auth_url),
-        )
-    else:
-        token_store.ensure_valid()
-
     cache_path = Path(args.cache).expanduser()
-    isrc_cache = _load_isrc_cache(cache_path)
-
-    fetched = 0
-    incomplete_due_to_rate_limit: Optional[float] = None
-
-    pending_ids = [sid for sid in unique_ids if sid not in isrc_cache]
-
-    # Spotify /v1/tracks supports up to 50 IDs per request.
-    for batch in chunks(pending_ids, 50):
-        try:
-            tracks = spotify_get_tracks(
-                token_store,
-                batch,
-                throttle_ms=int(args.throttle_ms),
-                max_wait_seconds=float(args.max_wait_seconds),
-            )
-        except RateLimitWaitTooLong as e:
-            incomplete_due_to_rate_limit = e.wait_seconds
-            break
-
-        fetched += len(batch)
-        # Spotify returns a list aligned with ids; unknown ids become null.
-        for i, t in enumerate(tracks):
-            sid = batch[i] if i < len(batch) else None
-            if not sid:
-                continue
-            if not isinstance(t, dict):
-                isrc_cache[sid] = None
-                continue
-            ext = t.get("external_ids")
-            isrc = ext.get("isrc") if isinstance(ext, dict) else None
-            isrc_cache[sid] = isrc if isinstance(isrc, str) and isrc else None
-
-        _save_isrc_cache(cache_path, isrc_cache)
+    fetcher = _IsrcFetcher(args, cache_path, _load_isrc_cache(cache_path))
+    fetcher.queue(unique_ids)
 
-    enriched = 0
-    not_found = 0
+    stats = _new_stats()
+    processed: List[Dict[str, Any]] = []
+    finalize_item = _make_enricher(items_lists, field_name, fetcher, stats, journal, processed)
 
-    for _, items in items_lists:
-        for it in items:
-            if not isinstance(it, dict):
-                continue
-            if isinstance(it.get(field_name), str) and it.get(field_name):
-                continue
-            sid = _extract_spotify_id(it)
-            if not sid:
-                continue
-            isrc = isrc_cache.get(sid)
-            if isrc:
-                it[field_name] = isrc
-                enriched += 1
-            else:
-                not_found += 1
+    def track_output(fp: TextIO) -> None:
+        fetcher.out_fp = fp
 
-    print(json.dumps(data_out, ensure_ascii=False, indent=2) + "\n")
+    _write_output(data, args, json_path, before_item=finalize_item, on_open=track_output)
+    _record_processed(journal, processed)
 
     print(
         json.dumps(
             {
-                "items_total": total_items,
+                "items_total": scanned["items_total"],
                 "spotify_ids_unique": len(unique_ids),
-                "spotify_ids_cached": sum(1 for v in isrc_cache.values() if isinstance(v, str) and v),
-                "fetched_ids": fetched,
-                "enriched": enriched,
-                "already_had_isrc": already,
-                "missing_spotifyId": missing_spotify,
-                "not_found_in_spotify": not_found,
-                "incomplete": bool(incomplete_due_to_rate_limit),
-                "rate_limited_wait_seconds": incomplete_due_to_rate_limit,
+                "spotify_ids_cached": sum(1 for v in fetcher.cache.values() if isinstance(v, str) and v),
+                "fetched_ids": fetcher.fetched,
+                "enriched": stats["enriched"],
+                "already_had_isrc": scanned["already_had_isrc"],
+                "missing_spotifyId": scanned["missing_spotifyId"],
+                "not_found_in_spotify": stats["not_found_in_spotify"],
+                "unchanged": scanned["unchanged"],
+                "incomplete": bool(fetcher.rate_limited_wait),
+                "rate_limited_wait_seconds": fetcher.rate_limited_wait,
             },
             indent=2,
         ),
         file=sys.stderr,
     )
 
-    return 2 if incomplete_due_to_rate_limit else 0
+    return 2 if fetcher.rate_limited_wait else 0
 
 
 if __name__ == "__main__":
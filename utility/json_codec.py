@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+JSON parsing and encoding for the playlist utilities, with an optional fast backend.
+
+orjson is used when it is installed (pip install orjson), the stdlib json module
+otherwise; PLAYLIST_JSON_BACKEND=json forces the stdlib. Results never depend on the
+backend:
+
+- loads() gives the same objects. Input orjson rejects but the stdlib accepts (NaN and
+  Infinity literals, lone surrogates) is re-parsed by the stdlib, and so is input with
+  integer literals orjson might turn into floats (19 digits or more).
+- Pretty output goes through json_stream, which hands orjson only the subtrees it
+  renders exactly like json.dumps(ensure_ascii=False, indent=2) (see pretty_subtree).
+- dumps() is compact output for request bodies and caches, not for diffs.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+from typing import Any, Optional, Union
+
+try:
+    import orjson
+except ImportError:  # optional speed-up
+    orjson = None
+
+if os.environ.get("PLAYLIST_JSON_BACKEND", "").strip().lower() in ("json", "stdlib"):
+    orjson = None
+
+BACKEND = "orjson" if orjson is not None else "json"
+
+_INT_MIN = -(2**63)
+_INT_END = 2**64
+# Every ASCII digit maps to "0", every other byte to " ": a run of 19 zeros in the
+# translation marks a number orjson may not hold in 64 bits (it parses those as floats).
+# Long digit runs inside strings or fractions only cost the stdlib fallback.
+_DIGITS = bytes(0x30 if 0x30 <= b <= 0x39 else 0x20 for b in range(256))
+_LONG_RUN = b"0" * 19
+
+
+def _has_long_digit_run(data: Union[str, bytes]) -> bool:
+    raw = data.encode("utf-8", "surrogatepass") if isinstance(data, str) else bytes(data)
+    return _LONG_RUN in raw.translate(_DIGITS)
+
+
+def loads(data: Union[str, bytes]) -> Any:
+    if orjson is not None and not _has_long_digit_run(data):
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            pass
+    return json.loads(data)
+
+
+def load_path(path: Path) -> Any:
+    """Parse a UTF-8 JSON file."""
+    if orjson is not None:
+        return loads(path.read_bytes())
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def dumps(obj: Any) -> str:
+    """Compact JSON (no whitespace, non-ASCII kept)."""
+    if orjson is not None and _plain(obj, lists_ok=True):
+        try:
+            return orjson.dumps(obj).decode("utf-8")
+        except orjson.JSONEncodeError:
+            pass
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+
+
+def _plain(obj: Any, *, lists_ok: bool) -> bool:
+    """
+    True if orjson encodes obj exactly like the stdlib: only str keys, no floats (orjson
+    formats them differently), ints within 64 bits, no subclasses. With lists_ok=False
+    obj must also contain no lists, so an item hook still sees every nested list element.
+    """
+    stack = [obj]
+    pop, push = stack.pop, stack.append
+    while stack:
+        o = pop()
+        t = type(o)
+        if t is str or t is bool or o is None:
+            continue
+        if t is int:
+            if not _INT_MIN <= o < _INT_END:
+                return False
+        elif t is dict:
+            for k, v in o.items():
+                if type(k) is not str:
+                    return False
+                push(v)
+        elif t is list or t is tuple:
+            if not lists_ok:
+                return False
+            stack.extend(o)
+        else:
+            return False
+    return True
+
+
+def pretty_subtree(obj: Any, level: int, *, lists_ok: bool) -> Optional[str]:
+    """
+    obj as json.dumps(obj, ensure_ascii=False, indent=2) would print it nested `level`
+    deep, via orjson; None when there is no fast backend or obj is not _plain().
+    """
+    if orjson is None or not isinstance(obj, (dict, list)) or not _plain(obj, lists_ok=lists_ok):
+        return None
+    try:
+        text = orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode("utf-8")
+    except orjson.JSONEncodeError:
+        return None
+    # Encoded strings never contain a raw newline, so every "\n" is layout.
+    return text.replace("\n", "\n" + "  " * level) if level else text
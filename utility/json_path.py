@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+"""
+Dotted JSON paths shared by the playlist utilities.
+
+A path is a list of keys separated by '.', e.g. 'user:1b3f8510-29cf.items[].videoId'. Keys
+may contain anything but '.' (':' and '-' are common); a key ending in '[]' expands the
+array it names, and a bare '[]' expands the current value. compile_path() parses a path
+once (and caches it) into a JsonPath, which can be evaluated
+
+- against a loaded object: find() (every match, lenient) or get() (exactly one value,
+  strict), or
+- over a file, without loading it: iter_file() streams the document through a small
+  incremental scanner. Objects on the path are walked key by key and subtrees off it
+  skipped without being built; the elements of the first expanded array are decoded one
+  at a time and the rest of the path applied to each. Extracting 'items[].videoId' from
+  a huge export holds one item in memory, never the whole tree.
+
+Skipped parts of a streamed file are scanned for structure only, not validated. A key
+repeated within one object matches every time when streaming, while a loaded dict keeps
+only its last value.
+"""
+
+from __future__ import annotations
+
+import json
+import re
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Iterator, List, Optional, TextIO, Tuple
+
+
+Segment = Tuple[str, bool]  # (key, expand); key "" with expand=True expands the current value
+
+
+class JsonPath:
+    """A compiled dotted path; see compile_path()."""
+
+    __slots__ = ("text", "segments")
+
+    def __init__(self, text: str, segments: Tuple[Segment, ...]):
+        self.text = text
+        self.segments = segments
+
+    def __repr__(self) -> str:
+        return f"JsonPath({self.text!r})"
+
+    def find(self, root: Any) -> List[Any]:
+        """Every value the path selects; missing keys, non-objects and non-arrays select nothing."""
+        return _find(self.segments, root)
+
+    def get(self, root: Any) -> Any:
+        """The single value at the path (no '[]' allowed); KeyError if a key is missing."""
+        cur = root
+        for key, expand in self.segments:
+            if expand:
+                raise ValueError(f"'{self.text}' expands arrays ([]); expected a path to one value")
+            if not isinstance(cur, dict) or key not in cur:
+                raise KeyError(f"Path segment '{key}' not found")
+            cur = cur[key]
+        return cur
+
+    def iter_file(self, path: Path, chunk_size: int = 1 << 16) -> Iterator[Any]:
+        """The values find() would return for the file's document, streamed in document order."""
+        with open(path, "r", encoding="utf-8") as f:
+            r = _Reader(f, chunk_size)
+            yield from _stream(r, self.segments, 0)
+            if r.peek():
+                raise ValueError(f"{path}: extra data after the JSON document")
+
+
+def _find(segments: Tuple[Segment, ...], root: Any) -> List[Any]:
+    cur: List[Any] = [root]
+    for key, expand in segments:
+        nxt: List[Any] = []
+        for obj in cur:
+            if key:
+                if not isinstance(obj, dict) or key not in obj:
+                    continue
+                obj = obj[key]
+            if expand:
+                if isinstance(obj, list):
+                    nxt.extend(obj)
+            else:
+                nxt.append(obj)
+        cur = nxt
+    return cur
+
+
+@lru_cache(maxsize=64)
+def compile_path(text: str) -> JsonPath:
+    """Parse a dotted path; '' is the root itself."""
+    segments: List[Segment] = []
+    for raw in text.split("."):
+        raw = raw.strip()
+        if not raw:
+            continue
+        expand = raw.endswith("[]")
+        key = raw[:-2] if expand else raw
+        if not key and not expand:
+            raise ValueError(f"Invalid json-path segment: '{raw}'")
+        segments.append((key, expand))
+    return JsonPath(text, tuple(segments))
+
+
+# -- streaming ---------------------------------------------------------------------------
+
+_decode = json.JSONDecoder().raw_decode
+_WS = re.compile(r"[ \t\n\r]*")
+_STRING = re.compile(r'"[^"\\]*(?:\\.[^"\\]*)*"')
+_PLAIN_STRING = re.compile(r'"([^"\\]*)"')
+# A whole string, a bracket, or a lone quote: a string that runs past the buffer.
+_TOKEN = re.compile(r'"[^"\\]*(?:\\.[^"\\]*)*"|[\[\]{}]|"')
+_SCALAR_END = re.compile(r"[ \t\n\r,\]}]")
+
+
+class _Reader:
+    """A window over a text stream: the unread text is buf[pos:]."""
+
+    def __init__(self, f: TextIO, chunk_size: int):
+        self._f = f
+        self._chunk = chunk_size
+        self.buf = ""
+        self.pos = 0
+
+    def _fill(self, size: int = 0) -> bool:
+        data = self._f.read(max(size, self._chunk))
+        if not data:
+            return False
+        self.buf = self.buf[self.pos :] + data
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        """Skip whitespace and return the next character ('' at the end)."""
+        while True:
+            self.pos = _WS.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, ch: str) -> None:
+        got = self.peek()
+        if got != ch:
+            raise ValueError(f"expected {ch!r}, got {got or 'end of input'!r}")
+        self.pos += 1
+
+    def _search(self, pattern: "re.Pattern[str]") -> Optional["re.Match[str]"]:
+        """Next match of pattern from pos, reading more input as needed; None at the end."""
+        while True:
+            m = pattern.search(self.buf, self.pos)
+            if m is not None:
+                return m
+            self.pos = len(self.buf)
+            if not self._fill():
+                return None
+
+    def _skip_string(self) -> None:
+        while True:
+            m = _STRING.match(self.buf, self.pos)
+            if m is not None:
+                self.pos = m.end()
+                return
+            if not self._fill():
+                raise ValueError("unterminated string")
+
+    def _skip_container(self) -> None:
+        depth = 0
+        while True:
+            for m in _TOKEN.finditer(self.buf, self.pos):
+                tok = m.group()
+                if tok[0] == '"':
+                    if len(tok) > 1:
+                        continue
+                    self.pos = m.start()
+                    break
+                depth += 1 if tok in "[{" else -1
+                if not depth:
+                    self.pos = m.end()
+                    return
+            else:
+                self.pos = len(self.buf)
+            if not self._fill():
+                raise ValueError("unexpected end of input")
+
+    def skip_value(self) -> None:
+        c = self.peek()
+        if c == '"':
+            self._skip_string()
+        elif c in ("[", "{"):
+            self._skip_container()
+        elif c and c not in ",:]}":
+            m = self._search(_SCALAR_END)
+            self.pos = m.start() if m is not None else len(self.buf)
+        else:
+            raise ValueError(f"expected a value, got {c or 'end of input'!r}")
+
+    def read_key(self) -> str:
+        if self.peek() != '"':
+            raise ValueError("expected an object key")
+        m = _PLAIN_STRING.match(self.buf, self.pos)
+        if m is not None:
+            self.pos = m.end()
+            return m.group(1)
+        return self.read_value()
+
+    def read_value(self) -> Any:
+        """Decode the value at pos with the stdlib's C scanner, reading on while it is cut off."""
+        self.peek()
+        while True:
+            try:
+                value, end = _decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                value, end = None, -1
+            # A number is only whole where a delimiter follows: cut at '1|.5' or '3|e5' the
+            # decoder still returns a number, just a shorter one.
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                whole = end >= 0 and _SCALAR_END.match(self.buf, end) is not None
+            else:
+                whole = end > 0
+            if whole:
+                self.pos = end
+                return value
+            # Double the window each time, so a long value is re-scanned O(log n) times.
+            if not self._fill(len(self.buf) - self.pos):
+                if end < 0:
+                    _decode(self.buf, self.pos)  # raises the decoder's error
+                self.pos = end
+                return value
+
+    def members(self) -> Iterator[str]:
+        """Keys of the object at pos; the caller reads or skips each value before the next."""
+        self.expect("{")
+        if self.peek() == "}":
+            self.pos += 1
+            return
+        while True:
+            key = self.read_key()
+            self.expect(":")
+            yield key
+            c = self.peek()
+            self.pos += 1
+            if c == "}":
+                return
+            if c != ",":
+                raise ValueError(f"expected ',' or '}}', got {c or 'end of input'!r}")
+
+    def elements(self) -> Iterator[None]:
+        """One step per element of the array at pos; the caller reads or skips each."""
+        self.expect("[")
+        if self.peek() == "]":
+            self.pos += 1
+            return
+        while True:
+            yield None
+            c = self.peek()
+            self.pos += 1
+            if c == "]":
+                return
+            if c != ",":
+                raise ValueError(f"expected ',' or ']', got {c or 'end of input'!r}")
+
+
+def _stream(r: _Reader, segments: Tuple[Segment, ...], i: int) -> Iterator[Any]:
+    """Values selected by segments[i:] from the value at r.pos (which is always consumed)."""
+    if i == len(segments):
+        yield r.read_value()
+        return
+    key, expand = segments[i]
+    if not key:
+        yield from _expand(r, segments, i)
+        return
+    if r.peek() != "{":
+        r.skip_value()
+        return
+    for k in r.members():
+        if k != key:
+            r.skip_value()
+        elif expand:
+            yield from _expand(r, segments, i)
+        else:
+            yield from _stream(r, segments, i + 1)
+
+
+def _expand(r: _Reader, segments: Tuple[Segment, ...], i: int) -> Iterator[Any]:
+    if r.peek() != "[":
+        r.skip_value()
+        return
+    rest = segments[i + 1 :]
+    for _ in r.elements():
+        # One element at a time: decoding it whole in C beats walking it here.
+        yield from _find(rest, r.read_value())
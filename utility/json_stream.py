@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Incremental pretty-printer for the playlist JSON documents written by the utilities.
+
+Produces exactly the same text as json.dumps(obj, ensure_ascii=False, indent=2), but
+yields it chunk by chunk so callers can write items as soon as they are finalized
+instead of building the whole document string in memory.
+
+With the fast json_codec backend, subtrees it can render identically (typically whole
+playlist items) are encoded in one call instead of node by node.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Iterator, Optional, TextIO
+
+from json_codec import pretty_subtree
+
+# Called right before a list element is serialized: before_item(parent_list, item).
+# Enrichers use it to finalize an item (e.g. fetch its batch) just in time.
+ItemHook = Callable[[list, Any], None]
+
+_encode_str = json.encoder.encode_basestring  # ensure_ascii=False flavour
+_encode_scalar = json.JSONEncoder(ensure_ascii=False).encode
+
+
+def _key_text(key: Any) -> str:
+    if isinstance(key, str):
+        return _encode_str(key)
+    # Mirror json.dumps: non-string keys are stringified via their JSON scalar form.
+    if isinstance(key, (int, float, bool)) or key is None:
+        return _encode_str(_encode_scalar(key))
+    raise TypeError(f"keys must be str, int, float, bool or None, not {type(key).__name__}")
+
+
+def iter_json_pretty(
+    obj: Any,
+    *,
+    indent: int = 2,
+    before_item: Optional[ItemHook] = None,
+    _level: int = 0,
+) -> Iterator[str]:
+    """Yield the pretty-printed JSON text of obj in chunks (one per scalar/bracket, or one
+    per subtree the fast backend takes)."""
+    if indent == 2:
+        # A hook has to see every list element, so with one only list-free subtrees qualify.
+        text = pretty_subtree(obj, _level, lists_ok=before_item is None)
+        if text is not None:
+            yield text
+            return
+    if isinstance(obj, str):
+        yield _encode_str(obj)
+        return
+    if isinstance(obj, dict):
+        if not obj:
+            yield "{}"
+            return
+        inner = "\n" + " " * (indent * (_level + 1))
+        sep = "{" + inner
+        for k, v in obj.items():
+            yield sep + _key_text(k) + ": "
+            yield from iter_json_pretty(v, indent=indent, before_item=before_item, _level=_level + 1)
+            sep = "," + inner
+        yield "\n" + " " * (indent * _level) + "}"
+        return
+    if isinstance(obj, (list, tuple)):
+        if not obj:
+            yield "[]"
+            return
+        inner = "\n" + " " * (indent * (_level + 1))
+        sep = "[" + inner
+        for v in obj:
+            if before_item is not None:
+                before_item(obj, v)  # type: ignore[arg-type]
+            yield sep
+            yield from iter_json_pretty(v, indent=indent, before_item=before_item, _level=_level + 1)
+            sep = "," + inner
+        yield "\n" + " " * (indent * _level) + "]"
+        return
+    yield _encode_scalar(obj)
+
+
+def write_json_pretty(
+    obj: Any,
+    fp: TextIO,
+    *,
+    indent: int = 2,
+    before_item: Optional[ItemHook] = None,
+) -> None:
+    """Stream obj to fp. fp's own buffering coalesces the small chunks; hooks that are
+    about to block (network) should call fp.flush() so already-final text goes out."""
+    write = fp.write
+    for chunk in iter_json_pretty(obj, indent=indent, before_item=before_item):
+        write(chunk)
+
+
+_NON_ASCII_RE = re.compile(r"[^\x00-\x7e]")
+
+
+def _escape_non_ascii(m: "re.Match[str]") -> str:
+    n = ord(m.group())
+    if n < 0x10000:
+        return f"\\u{n:04x}"
+    n -= 0x10000
+    return f"\\u{0xD800 | (n >> 10):04x}\\u{0xDC00 | (n & 0x3FF):04x}"
+
+
+def dumps_pretty(obj: Any, *, ensure_ascii: bool = False) -> str:
+    """json.dumps(obj, ensure_ascii=..., indent=2), byte for byte."""
+    text = "".join(iter_json_pretty(obj))
+    # Outside strings JSON text is ASCII, and control characters are escaped already, so
+    # escaping DEL and everything above is exactly what ensure_ascii does.
+    return _NON_ASCII_RE.sub(_escape_non_ascii, text) if ensure_ascii else text
+
+
+@contextmanager
+def atomic_text_writer(path: Path) -> Iterator[TextIO]:
+    """Open a temp file next to path and move it over path only if the block succeeds."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    try:
+        with tmp.open("w", encoding="utf-8", newline="\n") as f:
+            yield f
+        tmp.replace(path)
+    finally:
+        if tmp.exists():
+            tmp.unlink()
@@ -0,0 +1,357 @@
+#!/usr/bin/env python3
+"""
+Local MusicBrainz index for enrich_artists_with_iso.py --source local.
+
+Ingests MusicBrainz dump files into one SQLite file that answers, without any network:
+    normalized artist name   -> artist MBIDs   (names, sort names, aliases, credited names)
+    artist MBID              -> country (ISO 3166-1 alpha-2)
+    normalized title         -> recording MBIDs
+    recording MBID           -> credited artist MBIDs, in credit order
+    ISRC                     -> recording MBIDs
+
+Inputs are read as streams, one entity at a time, and written in batches, so memory
+stays flat however large the dump is:
+- JSON lines, one entity per line: the MusicBrainz JSON dumps (artist, recording). Plain
+  or compressed (.gz, .bz2, .xz), or the dump archive itself (.tar.xz and friends), whose
+  mbdump/<entity> members are read straight out of the stream.
+- TSV with a header row, e.g. exported from a local MusicBrainz mirror:
+      artist:    id, name, country [, sort-name] [, aliases]   (aliases ';'-separated)
+      recording: id, title, artists [, isrcs]                  (MBIDs / ISRCs ';'-separated)
+The entity kind comes from the file or member name ('artist...', 'recording...'), else
+from its fields; --kind forces it.
+
+MBIDs are stored as 16-byte blobs and every table is a WITHOUT ROWID B-tree keyed the way
+it is queried, which keeps the file compact and each lookup a single index probe.
+
+Usage:
+    python3 mb_index.py artist.tar.xz recording.tar.xz [-o .mb-index.sqlite] [--append]
+"""
+
+from __future__ import annotations
+
+import argparse
+import bz2
+import codecs
+import csv
+import gzip
+import json
+import lzma
+import os
+import re
+import sqlite3
+import sys
+import tarfile
+import time
+import unicodedata
+import uuid
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
+
+INDEX_VERSION = 1
+DEFAULT_INDEX = Path(__file__).resolve().parent / ".mb-index.sqlite"
+KINDS = ("artist", "recording")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS artist (mbid BLOB PRIMARY KEY, country TEXT) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS artist_name (name TEXT, mbid BLOB, PRIMARY KEY (name, mbid)) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS recording (title TEXT, mbid BLOB, PRIMARY KEY (title, mbid)) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS credit (recording BLOB, position INTEGER, artist BLOB,
+                                   PRIMARY KEY (recording, position)) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS isrc (isrc TEXT, recording BLOB, PRIMARY KEY (isrc, recording)) WITHOUT ROWID;
+"""
+
+
+def name_key(s: str) -> str:
+    """A name as MusicBrainz search compares it: no accents, case or punctuation."""
+    s = unicodedata.normalize("NFKD", s)
+    s = "".join(ch for ch in s if not unicodedata.combining(ch)).casefold()
+    return " ".join(re.findall(r"\w+", s))
+
+
+_ISRC = re.compile(r"[A-Z]{2}[A-Z0-9]{3}[0-9]{7}")
+
+
+def isrc_key(s: Any) -> str:
+    """An ISRC in its 12-character form ('us-s1z-99-00001' -> 'USS1Z9900001'); '' if s is not one."""
+    k = re.sub(r"[\s-]", "", str(s or "")).upper()
+    return k if _ISRC.fullmatch(k) else ""
+
+
+def _mbid(s: Any) -> Optional[bytes]:
+    try:
+        return uuid.UUID(str(s)).bytes
+    except ValueError:
+        return None
+
+
+def _mbid_str(b: bytes) -> str:
+    return str(uuid.UUID(bytes=b))
+
+
+# ----------------------------- reading dumps -----------------------------
+
+def _open_text(path: Path) -> TextIO:
+    opener = {".gz": gzip.open, ".bz2": bz2.open, ".xz": lzma.open}.get(path.suffix, open)
+    return opener(path, "rt", encoding="utf-8", newline="")
+
+
+def _is_tar(path: Path) -> bool:
+    return ".tar" in path.suffixes or path.suffix == ".tgz"
+
+
+def dump_streams(path: Path) -> Iterator[Tuple[str, TextIO]]:
+    """(name, text stream) for each file in a dump: the file itself, or each archive member."""
+    if not _is_tar(path):
+        with _open_text(path) as f:
+            yield path.name, f
+        return
+    with tarfile.open(path, "r|*") as tar:  # streaming: members are read in archive order
+        for member in tar:
+            base = member.name.rsplit("/", 1)[-1]
+            if not member.isfile() or not base.startswith(KINDS):
+                continue  # README, TIMESTAMP, ...
+            raw = tar.extractfile(member)
+            if raw is not None:
+                # Members of a streamed archive cannot seek, which TextIOWrapper requires.
+                yield member.name, codecs.getreader("utf-8")(raw)
+
+
+def _kind_of_name(name: str) -> Optional[str]:
+    base = name.rsplit("/", 1)[-1].casefold()
+    return next((k for k in KINDS if base.startswith(k)), None)
+
+
+def _split(value: Any) -> List[str]:
+    return [v.strip() for v in (value or "").split(";") if v.strip()]
+
+
+def iter_entities(stream: TextIO, kind: Optional[str]) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """(kind, entity in JSON dump shape) for each line of a JSON-lines or TSV stream."""
+    first = stream.readline()
+    if not first:
+        return
+    if first.lstrip().startswith("{"):
+        for line in _chain(first, stream):
+            line = line.strip()
+            if not line:
+                continue
+            obj = json.loads(line)
+            yield kind or ("recording" if "title" in obj else "artist"), obj
+        return
+    reader = csv.DictReader(_chain(first, stream), delimiter="\t")
+    fields = reader.fieldnames or []
+    kind = kind or ("recording" if "title" in fields else "artist")
+    for row in reader:
+        if kind == "artist":
+            obj = {
+                "id": row.get("id"),
+                "name": row.get("name") or "",
+                "sort-name": row.get("sort-name") or "",
+                "country": row.get("country") or None,
+                "aliases": [{"name": a} for a in _split(row.get("aliases"))],
+            }
+        else:
+            obj = {
+                "id": row.get("id"),
+                "title": row.get("title") or "",
+                "artist-credit": [{"artist": {"id": a}} for a in _split(row.get("artists"))],
+                "isrcs": _split(row.get("isrcs")),
+            }
+        yield kind, obj
+
+
+def _chain(first: str, stream: TextIO) -> Iterator[str]:
+    yield first
+    yield from stream
+
+
+# ----------------------------- building -----------------------------
+
+class IndexBuilder:
+    """Writes entities into an index in batches of batch_size rows per table."""
+
+    def __init__(self, conn: sqlite3.Connection, batch_size: int = 20_000):
+        self.conn = conn
+        self.batch_size = batch_size
+        self.counts: Dict[str, int] = {"artist": 0, "recording": 0, "skipped": 0}
+        self._rows: Dict[str, List[Tuple[Any, ...]]] = {t: [] for t in ("artist", "artist_name", "recording", "credit", "isrc")}
+
+    def add(self, kind: str, obj: Dict[str, Any]) -> None:
+        mbid = _mbid(obj.get("id"))
+        if mbid is None:
+            self.counts["skipped"] += 1
+            return
+        rows = self._rows
+        if kind == "artist":
+            country = obj.get("country")
+            rows["artist"].append((mbid, country.strip() if isinstance(country, str) and country.strip() else None))
+            names = {obj.get("name"), obj.get("sort-name")}
+            names.update(a.get(f) for a in obj.get("aliases") or () for f in ("name", "sort-name"))
+            rows["artist_name"].extend((k, mbid) for k in {name_key(n) for n in names if n} if k)
+        else:
+            title = name_key(obj.get("title") or "")
+            if title:
+                rows["recording"].append((title, mbid))
+            for pos, ac in enumerate(obj.get("artist-credit") or ()):
+                art = ac.get("artist") or {}
+                amb = _mbid(art.get("id"))
+                if amb is None:
+                    continue
+                rows["credit"].append((mbid, pos, amb))
+                # Credited names resolve too, even without the artist dump.
+                rows["artist_name"].extend(
+                    (k, amb) for k in {name_key(n) for n in (ac.get("name"), art.get("name")) if n} if k
+                )
+            rows["isrc"].extend((k, mbid) for k in {isrc_key(i) for i in obj.get("isrcs") or ()} if k)
+        self.counts[kind] += 1
+        if max(len(r) for r in rows.values()) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        for table, rows in self._rows.items():
+            if not rows:
+                continue
+            marks = ",".join("?" * len(rows[0]))
+            # artist rows replace (a later dump wins); the rest are sets.
+            verb = "INSERT OR REPLACE" if table == "artist" else "INSERT OR IGNORE"
+            self.conn.executemany(f"{verb} INTO {table} VALUES ({marks})", rows)
+            rows.clear()
+        self.conn.commit()
+
+
+def build_index(
+    path: Path,
+    dumps: Iterable[Path],
+    kind: Optional[str] = None,
+    append: bool = False,
+    progress_every: int = 100_000,
+) -> Dict[str, int]:
+    """
+    Ingest dumps into the index at path and return the entity counts. A new index is
+    built next to path and moved over it when complete; append adds to it in place.
+    """
+    dumps = list(dumps)
+    target = path
+    if not append:
+        path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        path.unlink(missing_ok=True)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        conn = sqlite3.connect(path)
+        try:
+            if not append:
+                # A scratch file until it is moved into place: no need for crash safety.
+                conn.execute("PRAGMA journal_mode=OFF")
+                conn.execute("PRAGMA synchronous=OFF")
+            conn.executescript(_SCHEMA)
+            version = conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+            if version is not None and int(version[0]) != INDEX_VERSION:
+                raise SystemExit(f"{target}: index version {version[0]}, expected {INDEX_VERSION}; rebuild without --append")
+            builder = IndexBuilder(conn)
+            start = time.time()
+            seen = 0
+            for dump in dumps:
+                for name, stream in dump_streams(dump):
+                    for k, obj in iter_entities(stream, kind or _kind_of_name(name)):
+                        builder.add(k, obj)
+                        seen += 1
+                        if progress_every and seen % progress_every == 0:
+                            print(f"[{seen}] entities ({name}, {time.time() - start:.0f}s)", file=sys.stderr, flush=True)
+            builder.flush()
+            sources = [p.name for p in dumps]
+            old = conn.execute("SELECT value FROM meta WHERE key = 'sources'").fetchone() if append else None
+            meta = {
+                "version": str(INDEX_VERSION),
+                "built": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+                "sources": json.dumps((json.loads(old[0]) if old else []) + sources),
+            }
+            conn.executemany("INSERT OR REPLACE INTO meta VALUES (?, ?)", meta.items())
+            conn.commit()
+        finally:
+            conn.close()
+    except BaseException:
+        # A fresh build's scratch file can be dump-sized; the next run would not reuse it.
+        if not append:
+            path.unlink(missing_ok=True)
+        raise
+    if not append:
+        path.replace(target)
+    return builder.counts
+
+
+# ----------------------------- lookups -----------------------------
+
+class MBIndex:
+    """Read-only lookups against an index built by build_index()."""
+
+    def __init__(self, path: Path):
+        if not path.exists():
+            raise FileNotFoundError(f"No MusicBrainz index at {path}; build one with mb_index.py")
+        self.path = path
+        self.conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+        meta = dict(self.conn.execute("SELECT key, value FROM meta"))
+        if meta.get("version") != str(INDEX_VERSION):
+            raise ValueError(f"{path}: index version {meta.get('version')}, expected {INDEX_VERSION}; rebuild it")
+        # Identifies the index contents, e.g. for journal fingerprints.
+        self.stamp = f"{meta['version']}:{meta.get('built', '')}"
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def artists_named(self, name: str) -> List[str]:
+        """MBIDs of the artists with this (normalized) name."""
+        rows = self.conn.execute("SELECT mbid FROM artist_name WHERE name = ?", (name_key(name),))
+        return [_mbid_str(m) for (m,) in rows]
+
+    def country(self, mbid: str) -> Optional[str]:
+        b = _mbid(mbid)
+        row = self.conn.execute("SELECT country FROM artist WHERE mbid = ?", (b,)).fetchone() if b else None
+        return row[0] if row else None
+
+    def recording_artists(self, recording: str) -> List[str]:
+        b = _mbid(recording)
+        if b is None:
+            return []
+        rows = self.conn.execute("SELECT artist FROM credit WHERE recording = ? ORDER BY position", (b,))
+        return [_mbid_str(m) for (m,) in rows]
+
+    def find_recording(self, artist: str, title: str) -> Optional[str]:
+        """A recording with this title credited to an artist of this name (the lowest MBID of several)."""
+        row = self.conn.execute(
+            "SELECT r.mbid FROM recording r"
+            " JOIN credit c ON c.recording = r.mbid"
+            " JOIN artist_name n ON n.mbid = c.artist AND n.name = ?"
+            " WHERE r.title = ? ORDER BY r.mbid LIMIT 1",
+            (name_key(artist), name_key(title)),
+        ).fetchone()
+        return _mbid_str(row[0]) if row else None
+
+    def recordings_with_isrc(self, isrc: str) -> List[str]:
+        rows = self.conn.execute("SELECT recording FROM isrc WHERE isrc = ? ORDER BY recording", (isrc_key(isrc),))
+        return [_mbid_str(m) for (m,) in rows]
+
+
+# ----------------------------- main ------------------------------------
+
+def main(argv: Optional[List[str]] = None) -> None:
+    ap = argparse.ArgumentParser(description="Build a local MusicBrainz index from dump files")
+    ap.add_argument("dumps", nargs="+", type=Path, help="JSON-lines or TSV dump files, plain, compressed or .tar archives")
+    ap.add_argument("-o", "--output", type=Path, default=DEFAULT_INDEX, help=f"Index file (default {DEFAULT_INDEX.name})")
+    ap.add_argument("--kind", choices=KINDS, help="Entity kind of every input (default: from file or member names)")
+    ap.add_argument("--append", action="store_true", help="Add to an existing index instead of rebuilding it")
+    ap.add_argument("--progress-every", type=int, default=100_000, help="Progress every N entities (0 disables)")
+    args = ap.parse_args(argv)
+
+    start = time.time()
+    counts = build_index(args.output, args.dumps, args.kind, args.append, args.progress_every)
+    size = args.output.stat().st_size / (1 << 20)
+    print(
+        f"done: {counts['artist']} artists, {counts['recording']} recordings ({counts['skipped']} skipped) "
+        f"-> {args.output} ({size:.1f} MiB) in {time.time() - start:.1f}s",
+        file=sys.stderr,
+    )
+
+
+if __name__ == "__main__":
+    main()
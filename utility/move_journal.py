@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Durable journal of the moves yt-reorder-playlist.py plans and applies, so a run cut short
+(quota exhausted, network error, Ctrl-C) resumes at the next move instead of scanning the
+playlist and planning again.
+
+One append-only file per playlist, <dir>/<playlistId>.jsonl:
+    {"version": 1, "request": "<hash>", "plan": "<hash>",
+     "items": [[playlistItemId, videoId], ...], "moves": [[item, from, to], ...]}
+    {"plan": "<hash>", "done": k}       appended (and fsynced) after each applied move
+
+items is the playlist as it was scanned, moves index into it. The request hash covers what
+was asked for (mode, anchor, desired videoIds); the plan hash also covers the snapshot and
+the moves. A run resumes a journal only for the same request, and only progress lines
+carrying the plan hash count. The file is removed once every move is applied.
+"""
+
+from __future__ import annotations
+
+import os
+import re
+from pathlib import Path
+from typing import Any, List, Optional, Sequence, Tuple
+
+from enrich_journal import fingerprint
+from json_codec import dumps, loads
+from reorder_plan import OrderTree, PlItem, new_playlist_table
+
+JOURNAL_VERSION = 1
+DEFAULT_JOURNAL_DIR = Path(__file__).resolve().parent / ".yt-reorder-journal"
+
+
+class MoveJournal:
+    """Moves planned for one playlist and how many were applied. With directory=None nothing is read or written."""
+
+    def __init__(self, directory: Optional[Path], playlist_id: str, request: Any):
+        safe = re.sub(r"[^A-Za-z0-9_-]", "_", playlist_id)
+        self.path = directory / f"{safe}.jsonl" if directory is not None else None
+        self.request = fingerprint(request)
+        self.plan_hash = ""
+        self.items: Optional[Sequence[PlItem]] = None
+        self.moves: List[Tuple[int, int, int]] = []
+        self.done = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.path is not None
+
+    def load(self) -> bool:
+        """Read the journal; True if it holds an unfinished plan for this request."""
+        if self.path is None:
+            return False
+        try:
+            lines = self.path.read_bytes().splitlines()
+        except OSError:
+            return False
+        try:
+            head = loads(lines[0]) if lines else None
+        except ValueError:
+            return False
+        if not isinstance(head, dict) or head.get("version") != JOURNAL_VERSION or head.get("request") != self.request:
+            return False
+        items = new_playlist_table()
+        try:
+            for i, (pid, vid) in enumerate(head["items"]):
+                items.append(pid, vid, i)
+            moves = [(int(n), int(f), int(t)) for n, f, t in head["moves"]]
+            plan_hash = str(head["plan"])
+        except (KeyError, TypeError, ValueError):
+            return False
+        self.items, self.moves, self.plan_hash = items, moves, plan_hash
+        self.done = 0
+        for raw in lines[1:]:
+            try:
+                rec = loads(raw)
+            except ValueError:
+                break  # a torn last line from a crash mid-write
+            if isinstance(rec, dict) and rec.get("plan") == self.plan_hash:
+                self.done = max(self.done, int(rec.get("done", 0)))
+        self.done = min(self.done, len(self.moves))
+        return self.done < len(self.moves)
+
+    def start(self, current: Sequence[PlItem], plan: List[Tuple[PlItem, int, int]]) -> None:
+        """Record a new plan over the scanned playlist current, replacing any older one."""
+        self.items = current
+        items = [[it.playlist_item_id, it.video_id] for it in current]
+        self.moves = [(it.index, f, t) for it, f, t in plan]
+        head = {"version": JOURNAL_VERSION, "request": self.request, "items": items, "moves": self.moves}
+        self.plan_hash = fingerprint(head)
+        head["plan"] = self.plan_hash
+        self.done = 0
+        if self.path is None:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(f".{self.path.name}.{os.getpid()}.tmp")
+        tmp.write_text(dumps(head) + "\n", encoding="utf-8")
+        tmp.replace(self.path)
+
+    def record(self, done: int) -> None:
+        """Note that the first done moves are applied; durable before this returns."""
+        self.done = done
+        if self.path is None:
+            return
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(dumps({"plan": self.plan_hash, "done": done}) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def finish(self) -> None:
+        if self.path is not None:
+            try:
+                self.path.unlink()
+            except FileNotFoundError:
+                pass
+
+    def pending(self) -> List[Tuple[PlItem, int, int]]:
+        """The moves not applied yet, as (item, from, to) for apply_plan."""
+        items = self.items
+        return [(items[n], f, t) for n, f, t in self.moves[self.done :]]
+
+    def replay(self, done: int) -> OrderTree:
+        """The expected playlist after the first done moves (nodes are snapshot indices)."""
+        tree = OrderTree(len(self.items))
+        for _, f, t in self.moves[:done]:
+            tree.move(f, t)
+        return tree
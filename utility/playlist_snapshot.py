@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Local snapshots of YouTube playlists for yt-reorder-playlist.py.
+
+A snapshot keeps every playlistItems.list page as it was fetched (page token, ETag, the
+items' ids, videoIds and positions). fetch() re-requests each page with If-None-Match and
+reuses the stored page on 304 Not Modified, and asks only for the fields the planner reads
+(a partial-response field mask): rescanning an unchanged playlist downloads no items, and
+a changed page carries ids and positions instead of full snippets. --offline plans straight from the snapshot without any API call
+(or importing the Google client libraries).
+
+Snapshot file, <dir>/<playlistId>.json:
+    {"version": 1, "playlist": "<id>", "fetched": "<UTC ISO time>",
+     "pages": [{"token": <pageToken or null>, "etag": "<etag>", "next": <nextPageToken or null>,
+                "items": [[playlistItemId, videoId, position], ...]}, ...]}
+"""
+
+from __future__ import annotations
+
+import os
+import re
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from json_codec import dumps, load_path
+from reorder_plan import new_playlist_table
+from track_table import TrackTable
+
+SNAPSHOT_VERSION = 1
+DEFAULT_SNAPSHOT_DIR = Path(__file__).resolve().parent / ".yt-playlist-snapshots"
+
+# Partial responses: only what the planner and the ETag revalidation need.
+LIST_FIELDS = "etag,nextPageToken,pageInfo/totalResults,items(id,snippet(position,resourceId/videoId))"
+PAGE_SIZE = 50
+
+
+class PlaylistSnapshot:
+    """The stored pages of one playlist. With directory=None nothing is read or written."""
+
+    def __init__(self, directory: Optional[Path], playlist_id: str):
+        safe = re.sub(r"[^A-Za-z0-9_-]", "_", playlist_id)
+        self.path = directory / f"{safe}.json" if directory is not None else None
+        self.playlist_id = playlist_id
+        self.fetched = ""
+        self.pages: List[Dict[str, Any]] = []
+        # Last fetch(): pages answered 304 / with a full body.
+        self.not_modified = 0
+        self.downloaded = 0
+
+    def load(self) -> bool:
+        """Read the stored snapshot; False if there is none (or it is unreadable)."""
+        if self.path is None:
+            return False
+        try:
+            doc = load_path(self.path)
+        except (OSError, ValueError):
+            return False
+        if not isinstance(doc, dict) or doc.get("version") != SNAPSHOT_VERSION or doc.get("playlist") != self.playlist_id:
+            return False
+        pages = doc.get("pages")
+        if not isinstance(pages, list):
+            return False
+        self.pages = pages
+        self.fetched = str(doc.get("fetched", ""))
+        return True
+
+    def save(self) -> None:
+        if self.path is None:
+            return
+        doc = {"version": SNAPSHOT_VERSION, "playlist": self.playlist_id, "fetched": self.fetched, "pages": self.pages}
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(f".{self.path.name}.{os.getpid()}.tmp")
+        tmp.write_text(dumps(doc), encoding="utf-8")
+        tmp.replace(self.path)
+
+    def table(self) -> TrackTable:
+        """The stored items as a playlist table, sorted by position."""
+        items = new_playlist_table()
+        for page in self.pages:
+            for pid, vid, pos in page["items"]:
+                items.append(pid, vid, int(pos))
+        positions = items.column("position")
+        return items.take(sorted(range(len(items)), key=positions.__getitem__))
+
+    def fetch(self, youtube) -> TrackTable:
+        """
+        Scan the playlist, revalidating stored pages by ETag, store the result and return
+        it as a table. A page whose token matches the stored one at the same offset is sent
+        with If-None-Match; on 304 its stored items are reused.
+        """
+        from googleapiclient.errors import HttpError
+
+        old = self.pages
+        pages: List[Dict[str, Any]] = []
+        self.not_modified = self.downloaded = 0
+        token: Optional[str] = None
+        while True:
+            k = len(pages)
+            cached = old[k] if k < len(old) and old[k].get("token") == token and old[k].get("etag") else None
+            req = youtube.playlistItems().list(
+                part="snippet",
+                playlistId=self.playlist_id,
+                maxResults=PAGE_SIZE,
+                pageToken=token,
+                fields=LIST_FIELDS,
+            )
+            if cached is not None:
+                req.headers["If-None-Match"] = cached["etag"]
+            try:
+                resp = req.execute()
+            except HttpError as e:
+                if cached is None or getattr(e.resp, "status", None) != 304:
+                    raise
+                page = cached
+                self.not_modified += 1
+            else:
+                page = {
+                    "token": token,
+                    "etag": resp.get("etag", ""),
+                    "next": resp.get("nextPageToken"),
+                    "items": [
+                        [it["id"], it["snippet"]["resourceId"]["videoId"], int(it["snippet"]["position"])]
+                        for it in resp.get("items", [])
+                    ],
+                }
+                self.downloaded += 1
+            pages.append(page)
+            token = page.get("next")
+            if not token:
+                break
+        self.pages = pages
+        self.fetched = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+        self.save()
+        return self.table()
+
+    def apply(self, moves: Iterable[Tuple[int, int]]) -> None:
+        """
+        Replay applied (from, to) moves onto the stored order, so --offline sees them, and
+        drop the ETags of the pages they touched: a move only shifts positions between from
+        and to, so the next scan downloads those pages again and revalidates the rest.
+        """
+        moves = list(moves)
+        if not moves or not self.pages:
+            return
+        rows = sorted((row for page in self.pages for row in page["items"]), key=lambda r: int(r[2]))
+        for from_idx, to_idx in moves:
+            rows.insert(to_idx, rows.pop(from_idx))
+        spans = [(min(f, t), max(f, t)) for f, t in moves]
+        start = 0
+        for page in self.pages:
+            end = start + len(page["items"])
+            page["items"] = [[pid, vid, pos] for pos, (pid, vid, _) in enumerate(rows[start:end], start)]
+            if any(lo < end and hi >= start for lo, hi in spans):
+                page["etag"] = ""
+            start = end
+        self.save()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+YouTube Data API quota accounting for yt-reorder-playlist.py.
+
+The API grants a daily budget of units (10,000 by default) that resets at midnight Pacific
+time; playlistItems.list costs 1 unit per call, playlistItems.update 50. The ledger
+records what this tool spent in the current quota day, so a run can size its work to the
+remaining budget and estimate how many quota windows a plan still needs. Units spent by
+other tools on the same Cloud project are not seen; lower --daily-quota to leave room.
+
+Ledger file:
+    {"version": 1, "day": "<YYYY-MM-DD, Pacific>", "used": <units>}
+"""
+
+from __future__ import annotations
+
+import datetime as dt
+import math
+import os
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from json_codec import dumps, load_path
+
+try:
+    from zoneinfo import ZoneInfo
+
+    PACIFIC: dt.tzinfo = ZoneInfo("America/Los_Angeles")
+except Exception:  # no tz database: standard time is close enough for an estimate
+    PACIFIC = dt.timezone(dt.timedelta(hours=-8), "PST")
+
+LEDGER_VERSION = 1
+DEFAULT_LEDGER = Path(__file__).resolve().parent / ".yt-quota.json"
+DEFAULT_DAILY_QUOTA = 10_000
+
+# Units per call.
+COSTS: Dict[str, int] = {"list": 1, "update": 50}
+
+
+def quota_day(now: Optional[dt.datetime] = None) -> str:
+    return (now or dt.datetime.now(PACIFIC)).astimezone(PACIFIC).date().isoformat()
+
+
+def next_reset(now: Optional[dt.datetime] = None) -> dt.datetime:
+    """The next midnight Pacific time, when the daily quota starts over."""
+    local = (now or dt.datetime.now(PACIFIC)).astimezone(PACIFIC)
+    day = local.date() + dt.timedelta(days=1)
+    return dt.datetime(day.year, day.month, day.day, tzinfo=PACIFIC)
+
+
+class QuotaLedger:
+    """Units spent today against daily_quota. With path=None spending is counted but not saved."""
+
+    def __init__(self, path: Optional[Path], daily_quota: int = DEFAULT_DAILY_QUOTA):
+        self.path = path
+        self.daily_quota = daily_quota
+        self.day = quota_day()
+        self.used = 0
+        if path is not None:
+            try:
+                doc = load_path(path)
+            except (OSError, ValueError):
+                doc = None
+            if isinstance(doc, dict) and doc.get("version") == LEDGER_VERSION and doc.get("day") == self.day:
+                self.used = int(doc.get("used", 0))
+
+    def remaining(self) -> int:
+        return max(0, self.daily_quota - self.used)
+
+    def affordable(self, kind: str) -> int:
+        """How many more calls of this kind today's budget covers."""
+        return self.remaining() // COSTS[kind]
+
+    def charge(self, kind: str, calls: int = 1) -> None:
+        day = quota_day()
+        if day != self.day:  # ran past midnight Pacific
+            self.day, self.used = day, 0
+        self.used += COSTS[kind] * calls
+        self.save()
+
+    def save(self) -> None:
+        if self.path is None:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(f".{self.path.name}.{os.getpid()}.tmp")
+        tmp.write_text(dumps({"version": LEDGER_VERSION, "day": self.day, "used": self.used}), encoding="utf-8")
+        tmp.replace(self.path)
+
+    def schedule(self, updates: int, overhead: int = 0) -> Tuple[int, int, Optional[dt.datetime]]:
+        """
+        Split `updates` over quota windows: (updates that fit today, further windows needed,
+        start of the last window or None if today suffices). Each later window first spends
+        `overhead` units (a resumed run's verification calls).
+        """
+        today = min(updates, self.affordable("update"))
+        left = updates - today
+        if not left:
+            return today, 0, None
+        per_window = (self.daily_quota - overhead) // COSTS["update"]
+        if per_window <= 0:
+            raise ValueError(f"daily quota {self.daily_quota} cannot cover a single update")
+        windows = math.ceil(left / per_window)
+        return today, windows, next_reset() + dt.timedelta(days=windows - 1)
@@ -0,0 +1,345 @@
+#!/usr/bin/env python3
+"""
+Move planning for yt-reorder-playlist.py, kept free of the Google client libraries so it
+can be imported (and benchmarked) on its own.
+
+- plan_moves_minimal(): which videos to move and where (LIS over desired positions).
+- simulate_and_render_plan(): replays those moves on a local copy of the playlist to get
+  the concrete (item, from, to) indices each playlistItems.update will see. The copy is
+  an OrderTree, so each move costs O(log n) instead of a scan plus list shifting.
+- plan_full(): --mode=full, a plan that puts every item of the playlist in its place with
+  the fewest possible updates.
+"""
+
+from __future__ import annotations
+
+import bisect
+import random
+from collections import deque
+from typing import Deque, Dict, List, Sequence, Tuple
+
+from track_table import TrackRow, TrackTable
+
+
+class PlItem(TrackRow):
+    """A row of a playlist table: playlist_item_id, video_id, position."""
+
+    __slots__ = ()
+
+
+ANCHORS = ("end", "start", "auto")
+
+
+def new_playlist_table() -> TrackTable:
+    return TrackTable(("playlist_item_id", "video_id"), ("position",), row_base=PlItem)
+
+
+class OrderTree:
+    """
+    A sequence of node ids 0..n-1 with O(log n) expected index lookup and move: an implicit
+    treap (keyed by position, heap-ordered by random priority) with parent links, so the
+    current index of any node can be read by walking up to the root.
+    """
+
+    def __init__(self, n: int, seed: int = 0):
+        rng = random.Random(seed)
+        self._left = [-1] * n
+        self._right = [-1] * n
+        self._parent = [-1] * n
+        self._size = [1] * n
+        self._prio = [rng.random() for _ in range(n)]
+        self._root = self._build(n)
+
+    def _build(self, n: int) -> int:
+        """Treap over nodes 0..n-1 in order (a Cartesian tree on priority, built with a stack)."""
+        left, right, parent, prio = self._left, self._right, self._parent, self._prio
+        stack: List[int] = []
+        for node in range(n):
+            last = -1
+            while stack and prio[stack[-1]] < prio[node]:
+                last = stack.pop()
+            left[node] = last
+            if last >= 0:
+                parent[last] = node
+            if stack:
+                right[stack[-1]] = node
+                parent[node] = stack[-1]
+            stack.append(node)
+        # Children have lower priorities than their parents, so this sizes them first.
+        for node in sorted(range(n), key=prio.__getitem__):
+            self._update(node)
+        return stack[0] if stack else -1
+
+    def __len__(self) -> int:
+        return self._size[self._root] if self._root >= 0 else 0
+
+    def _update(self, node: int) -> None:
+        size = self._size
+        left, right = self._left[node], self._right[node]
+        size[node] = 1 + (size[left] if left >= 0 else 0) + (size[right] if right >= 0 else 0)
+
+    def index(self, node: int) -> int:
+        """Current 0-based position of node."""
+        left, parent, size = self._left, self._parent, self._size
+        idx = size[left[node]] if left[node] >= 0 else 0
+        while parent[node] >= 0:
+            up = parent[node]
+            if self._right[up] == node:
+                idx += 1 + (size[left[up]] if left[up] >= 0 else 0)
+            node = up
+        return idx
+
+    def at(self, idx: int) -> int:
+        """The node currently at 0-based position idx."""
+        left, right, size = self._left, self._right, self._size
+        node = self._root
+        while True:
+            left_size = size[left[node]] if left[node] >= 0 else 0
+            if idx < left_size:
+                node = left[node]
+            elif idx == left_size:
+                return node
+            else:
+                idx -= left_size + 1
+                node = right[node]
+
+    def _split(self, node: int, k: int) -> Tuple[int, int]:
+        """Split the subtree at node into its first k nodes and the rest (both detached)."""
+        if node < 0:
+            return -1, -1
+        left = self._left[node]
+        left_size = self._size[left] if left >= 0 else 0
+        if k <= left_size:
+            a, b = self._split(left, k)
+            self._left[node] = b
+            if b >= 0:
+                self._parent[b] = node
+            self._update(node)
+            self._parent[node] = -1
+            if a >= 0:
+                self._parent[a] = -1
+            return a, node
+        a, b = self._split(self._right[node], k - left_size - 1)
+        self._right[node] = a
+        if a >= 0:
+            self._parent[a] = node
+        self._update(node)
+        self._parent[node] = -1
+        if b >= 0:
+            self._parent[b] = -1
+        return node, b
+
+    def _merge(self, a: int, b: int) -> int:
+        """Concatenate two detached subtrees (all of a before all of b)."""
+        if a < 0:
+            return b
+        if b < 0:
+            return a
+        if self._prio[a] > self._prio[b]:
+            child = self._merge(self._right[a], b)
+            self._right[a] = child
+            self._parent[child] = a
+            self._update(a)
+            return a
+        child = self._merge(a, self._left[b])
+        self._left[b] = child
+        self._parent[child] = b
+        self._update(b)
+        return b
+
+    def move(self, from_idx: int, to_idx: int) -> None:
+        """list.insert(to_idx, list.pop(from_idx))."""
+        head, rest = self._split(self._root, from_idx)
+        node, tail = self._split(rest, 1)
+        rest = self._merge(head, tail)
+        head, tail = self._split(rest, to_idx)
+        self._root = self._merge(self._merge(head, node), tail)
+        self._parent[self._root] = -1
+
+
+def lis_indices(seq: List[int]) -> List[int]:
+    """
+    Returns indices of a Longest Increasing Subsequence (strict).
+    Standard O(n log n) patience algorithm, reconstructing indices.
+    """
+    if not seq:
+        return []
+    # tails[k] = value of smallest tail of increasing subseq of length k+1
+    tails: List[int] = []
+    # tails_idx[k] = index in seq of that tail
+    tails_idx: List[int] = []
+    # prev[i] = previous index in seq for reconstruction
+    prev: List[int] = [-1] * len(seq)
+
+    for i, x in enumerate(seq):
+        j = bisect.bisect_left(tails, x)
+        if j == len(tails):
+            tails.append(x)
+            tails_idx.append(i)
+        else:
+            tails[j] = x
+            tails_idx[j] = i
+        if j > 0:
+            prev[i] = tails_idx[j - 1]
+
+    # Reconstruct
+    k = tails_idx[-1]
+    out: List[int] = []
+    while k != -1:
+        out.append(k)
+        k = prev[k]
+    out.reverse()
+    return out
+
+
+def plan_moves_minimal(current: Sequence[PlItem], desired_videoids: List[str]) -> List[Tuple[str, int]]:
+    """
+    Compute a minimal-ish set of moves (videoId -> desiredPosition) by:
+      - considering only videos present in both current and desired
+      - keeping a LIS of desired positions in current order fixed
+      - moving the rest into place
+
+    Returns moves as a list of (videoId, target_index_in_filtered_order).
+    """
+    current_vids = [it.video_id for it in current]
+    # Filter desired to videos that are actually present, preserving desired order.
+    present = set(current_vids)
+    desired_f = [v for v in desired_videoids if v in present]
+
+    desired_pos: Dict[str, int] = {v: i for i, v in enumerate(desired_f)}
+
+    # Sequence of desired positions as they appear in current order
+    seq = [desired_pos[v] for v in current_vids if v in desired_pos]
+
+    keep_seq_idx = set(lis_indices(seq))  # indices within seq list
+    # Map seq index back to videoId in current order
+    current_common_vids = [v for v in current_vids if v in desired_pos]
+    keep_vids = set(current_common_vids[i] for i in keep_seq_idx)
+
+    # Items to move: all desired_f vids not in keep_vids
+    moves = [(v, desired_pos[v]) for v in desired_f if v not in keep_vids]
+    # Apply in increasing target order (important for stable simulation)
+    moves.sort(key=lambda t: t[1])
+    return moves
+
+
+def simulate_and_render_plan(current: Sequence[PlItem], moves: List[Tuple[str, int]]) -> List[Tuple[PlItem, int, int]]:
+    """
+    Simulate the effect of moving each item to target index and return a concrete plan:
+      (item, from_pos, to_pos) in terms of indices in the *current list* during simulation.
+
+    We simulate list behavior locally so we don't need extra API calls.
+    """
+    items = list(current)
+    order = OrderTree(len(items))
+    # videoId -> its nodes (one per occurrence); a move takes the first one in current order.
+    nodes: Dict[str, List[int]] = {}
+    for node, it in enumerate(items):
+        nodes.setdefault(it.video_id, []).append(node)
+
+    plan: List[Tuple[PlItem, int, int]] = []
+    for vid, target in moves:
+        occurrences = nodes.get(vid)
+        if not occurrences:
+            continue
+        if len(occurrences) == 1:
+            node = occurrences[0]
+            from_idx = order.index(node)
+        else:
+            from_idx, node = min((order.index(n), n) for n in occurrences)
+        to_idx = max(0, min(target, len(items) - 1))
+        if from_idx == to_idx:
+            continue
+        order.move(from_idx, to_idx)
+        plan.append((items[node], from_idx, to_idx))
+    return plan
+
+
+def full_order(current: Sequence[PlItem], desired_videoids: List[str], anchor: str = "end") -> List[int]:
+    """
+    The final playlist for --mode=full, as indices into current: the desired videos in
+    desired order, then (anchor="end") or before them (anchor="start") every other item in
+    its current relative order. The k-th occurrence of a videoId in the desired list claims
+    the k-th occurrence in the playlist; desired videos not in the playlist are skipped.
+    """
+    pending: Dict[str, Deque[int]] = {}
+    for i, it in enumerate(current):
+        pending.setdefault(it.video_id, deque()).append(i)
+    targeted: List[int] = []
+    for v in desired_videoids:
+        queue = pending.get(v)
+        if queue:
+            targeted.append(queue.popleft())
+    claimed = set(targeted)
+    rest = [i for i in range(len(current)) if i not in claimed]
+    return rest + targeted if anchor == "start" else targeted + rest
+
+
+def _full_keep(order: List[int]) -> List[int]:
+    """Items (indices into current) on a LIS of final ranks read in current order."""
+    rank = [0] * len(order)
+    for r, i in enumerate(order):
+        rank[i] = r
+    return lis_indices(rank)
+
+
+def plan_full(
+    current: Sequence[PlItem], desired_videoids: List[str], anchor: str = "end"
+) -> List[Tuple[PlItem, int, int]]:
+    """
+    Concrete (item, from, to) updates that turn current into full_order(). anchor="auto"
+    picks whichever of "end" and "start" needs fewer updates ("end" on a tie).
+
+    The plan has n - L updates, where L is the length of a longest increasing subsequence
+    of final ranks in current order, and no plan can have fewer: an update changes the
+    position of one item only, so the items never updated keep their current relative
+    order and must already be in final order, i.e. form an increasing subsequence.
+
+    The LIS items stay put and are "placed"; every other item is moved once and then placed
+    too. Placed items are always in final order among themselves, so each move only has to
+    put an item between its nearest placed neighbours in final order. The moves are ordered
+    to fix the top of the playlist first (a run cut short by quota leaves the most visible
+    part right): at the first position p that holds the wrong item, either that item is not
+    placed yet, and moves down to just before its placed successor, or the item that
+    belongs at p is not placed yet, and moves to p. Indices are YouTube's: to_idx is the
+    position after the item is taken out of the list.
+    """
+    if anchor == "auto":
+        candidates = [full_order(current, desired_videoids, a) for a in ("end", "start")]
+        keeps = [_full_keep(o) for o in candidates]
+        best = 0 if len(keeps[0]) >= len(keeps[1]) else 1
+        order, keep = candidates[best], keeps[best]
+    else:
+        order = full_order(current, desired_videoids, anchor)
+        keep = _full_keep(order)
+
+    n = len(order)
+    rank = [0] * n
+    for r, node in enumerate(order):
+        rank[node] = r
+    placed = bytearray(n)
+    for node in keep:
+        placed[node] = 1
+    placed_ranks = sorted(rank[node] for node in keep)
+
+    tree = OrderTree(n)
+    plan: List[Tuple[PlItem, int, int]] = []
+    p = 0
+    while p < n:
+        node = tree.at(p)
+        if node == order[p]:
+            p += 1
+            continue
+        if not placed[node]:
+            from_idx = p
+            j = bisect.bisect_right(placed_ranks, rank[node])
+            to_idx = tree.index(order[placed_ranks[j]]) - 1 if j < len(placed_ranks) else n - 1
+        else:
+            node = order[p]
+            from_idx, to_idx = tree.index(node), p
+        if from_idx != to_idx:
+            tree.move(from_idx, to_idx)
+            plan.append((current[node], from_idx, to_idx))
+        placed[node] = 1
+        bisect.insort(placed_ranks, rank[node])
+    return plan
@@ -0,0 +1,365 @@
+#!/usr/bin/env python3
+"""
+Resolve the items enrich_spotify_ids.py left "unmatched" through Spotify /v1/search.
+
+Each item title is parsed into artist / track and turned into a field-filtered search
+query. Queries run on a small thread pool over pooled keep-alive connections, share one
+rate limiter (a 429 pauses every worker) and are cached per normalized query, so a re-run
+only asks for what is still unknown. The cache is checkpointed as answers arrive: an
+interrupted or rate-limited run resumes where it stopped.
+
+--api-base and --access-token let the whole run target a local stub server.
+"""
+
+import argparse
+import json
+import re
+import secrets
+import sys
+import threading
+import time
+import urllib.parse
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from enrich_spotify_isrc import (
+    SPOTIFY_API_BASE,
+    RateLimitWaitTooLong,
+    TokenStore,
+    _find_spotify_client_id,
+    _is_spotify_track_id,
+    _iter_items_lists,
+    _pkce_authorize_and_exchange,
+    _write_output,
+)
+from json_codec import load_path, loads
+from json_stream import dumps_pretty
+from spotify_http import PooledHttpClient, RateLimiter
+
+
+_KEY_RE = re.compile(r"[\W_]+")
+_SEPARATORS = (" - ", " – ", " — ", " -- ")
+# Video-title decorations that are never part of the Spotify track name.
+_DECORATION_RE = re.compile(
+    r"\s*[\(\[][^\)\]]*\b(official|video|audio|lyrics?|visuali[sz]er|hd|hq|4k|mv)\b[^\)\]]*[\)\]]",
+    re.IGNORECASE,
+)
+
+
+def _key(s: str) -> str:
+    """Case-folded letters/digits of any script; the unit of comparison and caching."""
+    return _KEY_RE.sub("", (s or "").casefold())
+
+
+def parse_title(title: str) -> Optional[Tuple[str, str]]:
+    """'Artist;Feat - Track (Official Video)' -> ('Artist', 'Track'); None if there is no separator."""
+    s = _DECORATION_RE.sub("", title or "").strip()
+    for sep in _SEPARATORS:
+        if sep in s:
+            artist, track = s.split(sep, 1)
+            artist = artist.split(";", 1)[0].strip()
+            track = track.strip()
+            if artist and track:
+                return artist, track
+            return None
+    return None
+
+
+def build_query(artist: str, track: str) -> str:
+    clean = lambda s: s.replace('"', " ").strip()  # noqa: E731
+    return f'track:"{clean(track)}" artist:"{clean(artist)}"'
+
+
+def pick_track(artist: str, track: str, candidates: List[Any]) -> Optional[Dict[str, Any]]:
+    """First result (in Spotify's relevance order) whose artists include the artist and whose
+    name contains the track name or vice versa."""
+    want_artist, want_track = _key(artist), _key(track)
+    if not want_artist or not want_track:
+        return None
+    for c in candidates:
+        if not isinstance(c, dict) or not _is_spotify_track_id(str(c.get("id") or "")):
+            continue
+        names = [_key(a.get("name", "")) for a in c.get("artists") or [] if isinstance(a, dict)]
+        if want_artist not in names:
+            continue
+        name = _key(c.get("name", ""))
+        if name and (want_track in name or name in want_track):
+            return c
+    return None
+
+
+def _load_cache(path: Path) -> Dict[str, Dict[str, Any]]:
+    if not path.exists():
+        return {}
+    try:
+        obj = load_path(path)
+    except Exception:
+        return {}
+    return {k: v for k, v in obj.items() if isinstance(k, str) and isinstance(v, dict)} if isinstance(obj, dict) else {}
+
+
+def _save_cache(path: Path, cache: Dict[str, Dict[str, Any]]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    tmp.write_text(dumps_pretty(cache) + "\n", encoding="utf-8")
+    tmp.replace(path)
+
+
+class SearchClient:
+    """Thread-safe /v1/search caller: shared pool, shared limiter, 401 refresh, 429/5xx retry."""
+
+    def __init__(self, args: argparse.Namespace):
+        self.args = args
+        self.api_base = args.api_base.rstrip("/")
+        self.http = PooledHttpClient()
+        self.limiter = RateLimiter(args.throttle_ms / 1000.0)
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._token_store: Optional[TokenStore] = None
+        self._static_token = args.access_token or ""
+
+    def _access_token(self, *, force_refresh: bool = False) -> str:
+        if self._static_token:
+            return self._static_token
+        with self._lock:
+            if self._token_store is None:
+                args = self.args
+                client_id = _find_spotify_client_id(args.env_file or None, args.client_id or None)
+                store = TokenStore(Path(args.token).expanduser(), client_id)
+                if store.load() is None:
+                    _pkce_authorize_and_exchange(
+                        client_id=client_id,
+                        redirect_uri=args.redirect_uri,
+                        token_store=store,
+                        open_browser=bool(args.open_browser),
+                        copy_auth_url=bool(args.copy_auth_url),
+                    )
+                self._token_store = store
+            store = self._token_store
+            tok = store.ensure_valid()
+            if force_refresh:
+                tok = store.refresh(tok)
+                store.save(tok)
+            return tok.access_token
+
+    def search(self, query: str) -> List[Any]:
+        params = {"q": query, "type": "track", "limit": str(self.args.limit)}
+        if self.args.market:
+            params["market"] = self.args.market
+        url = f"{self.api_base}/v1/search?" + urllib.parse.urlencode(params)
+        max_retries = int(self.args.max_retries)
+        refreshed = False
+        for attempt in range(max_retries + 1):
+            self.limiter.wait()
+            headers = {"Authorization": f"Bearer {self._access_token()}", "Accept": "application/json"}
+            try:
+                status, resp_headers, raw = self.http.request("GET", url, headers=headers)
+            except OSError as e:
+                if attempt >= max_retries:
+                    raise
+                delay = min(60.0, 2**attempt * (0.25 + secrets.randbelow(1000) / 1333.0))
+                print(f"Request error; retrying in {delay:.1f}s... ({e})", file=sys.stderr)
+                time.sleep(delay)
+                continue
+            with self._lock:
+                self.requests += 1
+
+            if status == 200:
+                payload = loads(raw.decode("utf-8")) if raw else {}
+                items = (payload.get("tracks") or {}).get("items")
+                return items if isinstance(items, list) else []
+            if status == 401 and not refreshed and not self._static_token:
+                refreshed = True
+                self._access_token(force_refresh=True)
+                continue
+            if status in (429, 500, 502, 503, 504) and attempt < max_retries:
+                delay = min(120.0, 2**attempt * (0.25 + secrets.randbelow(1000) / 1333.0))
+                retry_after = resp_headers.get("Retry-After")
+                if retry_after:
+                    try:
+                        delay = max(delay, float(retry_after))
+                    except ValueError:
+                        pass
+                if status == 429:
+                    if delay > float(self.args.max_wait_seconds):
+                        raise RateLimitWaitTooLong(delay)
+                    # Everyone waits, not just the worker that got the 429.
+                    self.limiter.pause(delay)
+                else:
+                    time.sleep(delay)
+                continue
+            raise RuntimeError(f"HTTP {status} from Spotify search: {raw[:200].decode('utf-8', errors='replace')}")
+        raise RuntimeError("Spotify search: retries exhausted")
+
+
+def resolve_query(client: SearchClient, artist: str, track: str) -> Dict[str, Any]:
+    candidates = client.search(build_query(artist, track))
+    hit = pick_track(artist, track, candidates)
+    if hit is None:
+        return {"id": None, "candidates": len(candidates)}
+    return {
+        "id": hit["id"],
+        "name": hit.get("name", ""),
+        "artists": [a.get("name", "") for a in hit.get("artists") or [] if isinstance(a, dict)],
+        "candidates": len(candidates),
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    p = argparse.ArgumentParser(
+        description=(
+            "Fill spotifyId for items still marked unmatched by searching Spotify (/v1/search) for the "
+            "artist/track parsed from their title. Streams the JSON to stdout (or --output / --in-place); "
+            "stats go to stderr."
+        )
+    )
+    p.add_argument("--json", dest="json_path", required=True, help="Input JSON file path")
+    p.add_argument(
+        "--json-path",
+        dest="json_path_expr",
+        default="",
+        help="Dotted path to the items list (default: root 'items' and every '<playlist>.items').",
+    )
+    p.add_argument("--unmatched-value", default="unmatched", help="spotifyId value marking items to resolve")
+    p.add_argument("--concurrency", type=int, default=4, help="Parallel search requests (default 4)")
+    p.add_argument("--throttle-ms", type=int, default=100, help="Minimum spacing between request starts, all workers")
+    p.add_argument("--limit", type=int, default=5, help="Search results per query (default 5)")
+    p.add_argument("--market", default="", help="Optional market (ISO country code) for the search")
+    p.add_argument("--max-retries", type=int, default=6)
+    p.add_argument(
+        "--max-wait-seconds",
+        type=float,
+        default=600.0,
+        help="If Spotify asks to wait longer than this, stop, keep the cache and write partial output (exit 2).",
+    )
+    p.add_argument(
+        "--cache",
+        default=str(Path(__file__).resolve().parent / ".spotify-search-cache.json"),
+        help="Per-query answer cache / checkpoint (default: utility/.spotify-search-cache.json)",
+    )
+    p.add_argument("--api-base", default=SPOTIFY_API_BASE, help="Web API base URL (point at a stub for tests)")
+    p.add_argument("--access-token", default="", help="Use this bearer token as-is (skips OAuth; for stubs)")
+    p.add_argument("--client-id", default="", help="Spotify app client ID (overrides .spotify.env)")
+    p.add_argument("--env-file", default="", help="Path to .spotify.env (optional)")
+    p.add_argument("--redirect-uri", default="http://127.0.0.1:8000/")
+    p.add_argument("--open-browser", action=argparse.BooleanOptionalAction, default=True)
+    p.add_argument("--copy-auth-url", action=argparse.BooleanOptionalAction, default=False)
+    p.add_argument(
+        "--token",
+        default=str(Path(__file__).resolve().parent / ".spotify-oauth-token.json"),
+        help="Path to token cache (default: utility/.spotify-oauth-token.json)",
+    )
+    p.add_argument("--output", default="-", help="Where to write the JSON: a file path, or '-' for stdout (default).")
+    p.add_argument("--in-place", action="store_true", help="Write back to the --json file (atomically).")
+    args = p.parse_args(argv)
+    if args.in_place and args.output != "-":
+        p.error("--in-place cannot be combined with --output")
+
+    json_path = Path(args.json_path)
+    data = load_path(json_path)
+    items_lists = _iter_items_lists(data, args.json_path_expr)
+
+    cache_path = Path(args.cache).expanduser()
+    cache = _load_cache(cache_path)
+    market = args.market.upper()
+
+    stats = {"items_total": 0, "unmatched_items": 0, "unparsable_titles": 0}
+    # Normalized query key -> (artist, track), in first-appearance order.
+    queries: Dict[str, Tuple[str, str]] = {}
+    item_keys: Dict[int, str] = {}
+    for _, items in items_lists:
+        for it in items:
+            stats["items_total"] += 1
+            if not isinstance(it, dict) or it.get("spotifyId") != args.unmatched_value:
+                continue
+            stats["unmatched_items"] += 1
+            parsed = parse_title(it.get("userTitle") or it.get("title") or "")
+            if parsed is None:
+                stats["unparsable_titles"] += 1
+                continue
+            key = f"{_key(parsed[0])}|{_key(parsed[1])}|{market}"
+            queries.setdefault(key, parsed)
+            item_keys[id(it)] = key
+
+    todo = [k for k in queries if k not in cache]
+    client = SearchClient(args)
+    rate_limited_wait: Optional[float] = None
+    errors = 0
+    if todo:
+        stop = threading.Event()
+
+        def run(key: str) -> Dict[str, Any]:
+            if stop.is_set():
+                raise RateLimitWaitTooLong(rate_limited_wait or 0.0)
+            return resolve_query(client, *queries[key])
+
+        with ThreadPoolExecutor(max_workers=max(1, args.concurrency)) as pool:
+            # Bounded submission: never more than 2x concurrency queries in flight.
+            backlog = iter(todo)
+            running: Dict[Future, str] = {}
+            done_since_save = 0
+            while True:
+                while not stop.is_set() and len(running) < 2 * max(1, args.concurrency):
+                    key = next(backlog, None)
+                    if key is None:
+                        break
+                    running[pool.submit(run, key)] = key
+                if not running:
+                    break
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for fut in finished:
+                    key = running.pop(fut)
+                    try:
+                        cache[key] = fut.result()
+                        done_since_save += 1
+                    except RateLimitWaitTooLong as e:
+                        rate_limited_wait = max(rate_limited_wait or 0.0, e.wait_seconds)
+                        stop.set()
+                    except Exception as e:
+                        errors += 1
+                        print(f"search failed for {queries[key]}: {e}", file=sys.stderr)
+                if done_since_save >= 25:
+                    _save_cache(cache_path, cache)
+                    done_since_save = 0
+        _save_cache(cache_path, cache)
+
+    resolved = 0
+    no_match = 0
+
+    def apply(parent: list, item: Any) -> None:
+        nonlocal resolved, no_match
+        key = item_keys.get(id(item))
+        if key is None or key not in cache:
+            return
+        sid = cache[key].get("id")
+        if isinstance(sid, str) and sid:
+            item["spotifyId"] = sid
+            resolved += 1
+        else:
+            no_match += 1
+
+    _write_output(data, args, json_path, before_item=apply)
+
+    print(
+        json.dumps(
+            {
+                **stats,
+                "queries": len(queries),
+                "queries_cached": len(queries) - len(todo),
+                "requests": client.requests,
+                "resolved": resolved,
+                "no_match": no_match,
+                "errors": errors,
+                "incomplete": bool(rate_limited_wait),
+                "rate_limited_wait_seconds": rate_limited_wait,
+            },
+            indent=2,
+        ),
+        file=sys.stderr,
+    )
+    return 2 if rate_limited_wait else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
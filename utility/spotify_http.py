@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Shared HTTP plumbing for the Spotify utilities: keep-alive connection pooling and a
+process-wide rate limiter that several worker threads can share.
+
+stdlib-only. Callers get (status, headers, body) back and decide how to raise.
+"""
+
+from __future__ import annotations
+
+import http.client
+import threading
+import time
+import urllib.parse
+from typing import Dict, Optional, Tuple
+
+
+class ResponseLostError(ConnectionError):
+    """The connection dropped after a non-GET request was sent; the server may have applied it."""
+
+
+class RateLimiter:
+    """Spaces request starts at least min_interval apart across all threads.
+
+    pause() pushes the next allowed start out (e.g. for a 429 Retry-After), so one
+    throttled worker slows every worker down instead of each finding out separately.
+    """
+
+    def __init__(self, min_interval_seconds: float):
+        self.min_interval = max(0.0, float(min_interval_seconds))
+        self._lock = threading.Lock()
+        self._next_at = 0.0
+
+    def wait(self, min_interval_seconds: Optional[float] = None) -> None:
+        interval = self.min_interval if min_interval_seconds is None else max(0.0, float(min_interval_seconds))
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_at)
+            self._next_at = start + interval
+        delay = start - now
+        if delay > 0:
+            time.sleep(delay)
+
+    def pause(self, seconds: float) -> None:
+        with self._lock:
+            self._next_at = max(self._next_at, time.monotonic() + max(0.0, float(seconds)))
+
+
+class PooledHttpClient:
+    """One persistent HTTP(S) connection per (thread, scheme, host, port)."""
+
+    def __init__(self, timeout: float = 30.0):
+        self._timeout = timeout
+        self._local = threading.local()
+
+    def _connections(self) -> Dict[Tuple[str, str, int], http.client.HTTPConnection]:
+        conns = getattr(self._local, "conns", None)
+        if conns is None:
+            conns = {}
+            self._local.conns = conns
+        return conns
+
+    def _connect(self, scheme: str, host: str, port: int) -> http.client.HTTPConnection:
+        if scheme == "https":
+            return http.client.HTTPSConnection(host, port, timeout=self._timeout)
+        return http.client.HTTPConnection(host, port, timeout=self._timeout)
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        *,
+        headers: Optional[Dict[str, str]] = None,
+        body: Optional[bytes] = None,
+    ) -> Tuple[int, http.client.HTTPMessage, bytes]:
+        parsed = urllib.parse.urlsplit(url)
+        scheme = parsed.scheme or "https"
+        host = parsed.hostname or ""
+        port = parsed.port or (443 if scheme == "https" else 80)
+        target = parsed.path or "/"
+        if parsed.query:
+            target += "?" + parsed.query
+
+        key = (scheme, host, port)
+        conns = self._connections()
+        for attempt in range(2):
+            conn = conns.get(key)
+            reused = conn is not None
+            if conn is None:
+                conn = self._connect(scheme, host, port)
+                conns[key] = conn
+            sent = False
+            try:
+                conn.request(method, target, body=body, headers=headers or {})
+                sent = True
+                resp = conn.getresponse()
+                raw = resp.read()
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError, http.client.BadStatusLine) as e:
+                conn.close()
+                conns.pop(key, None)
+                # The server may drop idle keep-alive sockets; retry once on a fresh one. Once
+                # the request is out it may already have been handled, so only a GET is re-sent.
+                idempotent = not sent or method.upper() == "GET"
+                if reused and attempt == 0 and idempotent:
+                    continue
+                if not idempotent:
+                    raise ResponseLostError(f"{method} {url}: connection lost after the request was sent") from e
+                raise
+            except Exception:
+                conn.close()
+                conns.pop(key, None)
+                raise
+            if resp.will_close:
+                conn.close()
+                conns.pop(key, None)
+            return resp.status, resp.msg, raw
+        raise RuntimeError("unreachable")
+
+    def close(self) -> None:
+        for conn in self._connections().values():
+            conn.close()
+        self._connections().clear()
+
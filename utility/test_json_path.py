@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+"""Regression tests for json_path.py streaming (python3 -m unittest test_json_path)."""
+
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from json_path import compile_path
+
+
+class StreamedNumbersTest(unittest.TestCase):
+    DOC = {"meta": {"v": 12.5}, "items": [1.5, 2.25, 3e5, -0.125, 7, 1e-3, 6.02e23, {"a": 12.75}, 10]}
+
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name) / "doc.json"
+        self.path.write_text(json.dumps(self.DOC), encoding="utf-8")
+
+    def tearDown(self) -> None:
+        self.tmp.cleanup()
+
+    def test_numbers_cut_at_any_chunk_boundary(self) -> None:
+        # A chunk ending right after '1' of '1.5' or '3' of '3e5' must not yield the integer part.
+        for chunk_size in range(1, 64):
+            with self.subTest(chunk_size=chunk_size):
+                self.assertEqual(list(compile_path("items[]").iter_file(self.path, chunk_size)), self.DOC["items"])
+                self.assertEqual(list(compile_path("meta.v").iter_file(self.path, chunk_size)), [12.5])
+
+    def test_top_level_number(self) -> None:
+        self.path.write_text("12.5e1", encoding="utf-8")
+        for chunk_size in range(1, 8):
+            with self.subTest(chunk_size=chunk_size):
+                self.assertEqual(list(compile_path("").iter_file(self.path, chunk_size)), [125.0])
+
+
+if __name__ == "__main__":
+    unittest.main()
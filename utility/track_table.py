@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+Columnar track tables shared by the playlist utilities.
+
+A TrackTable stores rows column by column instead of as one dict or dataclass per row:
+string columns are uint32 arrays of ids into a StringPool (every distinct string is held
+once, so repeated artists, albums and dates cost four bytes a row), integer columns are
+int64 arrays. Indexing a table gives a light row view whose attributes read the columns;
+hot loops can take whole columns with column() instead.
+
+Tables can be saved as a csv_index string table and opened again memory-mapped; an
+opened table is read-only.
+"""
+
+from __future__ import annotations
+
+import sys
+from array import array
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Union
+
+from csv_index import StringTableFile, open_table, write_columns
+
+
+class StringPool:
+    """Interned strings: each distinct string is stored once and referred to by its id."""
+
+    __slots__ = ("strings", "_ids")
+
+    def __init__(self) -> None:
+        self.strings: List[str] = []
+        self._ids: Dict[str, int] = {}
+
+    def intern(self, s: str) -> int:
+        sid = self._ids.get(s)
+        if sid is None:
+            sid = len(self.strings)
+            self._ids[s] = sid
+            self.strings.append(s)
+        return sid
+
+    def __len__(self) -> int:
+        return len(self.strings)
+
+    def __getitem__(self, sid: int) -> str:
+        return self.strings[sid]
+
+
+class TrackRow:
+    """
+    View of one table row. Each table derives a subclass with a property per column whose
+    name is an identifier; other columns are read with row[name]. Subclass this to add
+    derived attributes and pass it as the table's row_base.
+    """
+
+    __slots__ = ("_table", "_i")
+
+    def __init__(self, table: "TrackTable", i: int):
+        self._table = table
+        self._i = i
+
+    @property
+    def index(self) -> int:
+        return self._i
+
+    def __getitem__(self, column: str) -> Union[str, int]:
+        return self._table.cell(column, self._i)
+
+    def as_dict(self) -> Dict[str, Union[str, int]]:
+        t = self._table
+        return {c: t.cell(c, self._i) for c in t.columns + t.int_columns}
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, TrackRow) and other._table is self._table and other._i == self._i
+
+    def __hash__(self) -> int:
+        return hash((id(self._table), self._i))
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.as_dict()!r})"
+
+
+class TrackTable(Sequence[TrackRow]):
+    """Rows stored column-wise; table[i] is a row view, len(table) the row count."""
+
+    def __init__(
+        self,
+        columns: Sequence[str],
+        int_columns: Sequence[str] = (),
+        *,
+        row_base: type = TrackRow,
+        pool: Optional[StringPool] = None,
+        meta: Optional[Dict[str, Any]] = None,
+    ):
+        self.columns: List[str] = list(columns)
+        self.int_columns: List[str] = list(int_columns)
+        self.meta: Dict[str, Any] = dict(meta or {})
+        self.pool = pool if pool is not None else StringPool()
+        self._string: Callable[[int], str] = self.pool.strings.__getitem__
+        self._ids: Dict[str, Any] = {c: array("I") for c in self.columns}
+        self._ints: Dict[str, Any] = {c: array("q") for c in self.int_columns}
+        self._file: Optional[StringTableFile] = None
+        self._len = 0
+        self._row_base = row_base
+        self._row_type = self._make_row_type()
+
+    # -- rows -------------------------------------------------------------------------
+
+    def _make_row_type(self) -> type:
+        attrs: Dict[str, Any] = {"__slots__": ()}
+        string = self._string
+        strings = self.pool.strings
+        for name, ids in self._ids.items():
+            if not name.isidentifier() or hasattr(self._row_base, name):
+                continue
+            if self._file is None:
+                # Index the pool's list directly: one call less per access than string().
+                attrs[name] = property(lambda row, ids=ids: strings[ids[row._i]])
+            else:
+                attrs[name] = property(lambda row, ids=ids: string(ids[row._i]))
+        for name, values in self._ints.items():
+            if name.isidentifier() and not hasattr(self._row_base, name):
+                attrs[name] = property(lambda row, values=values: values[row._i])
+        return type(self._row_base.__name__, (self._row_base,), attrs)
+
+    def __len__(self) -> int:
+        return self._len
+
+    def __getitem__(self, i):  # type: ignore[override]
+        if isinstance(i, slice):
+            return [self._row_type(self, j) for j in range(*i.indices(self._len))]
+        if i < 0:
+            i += self._len
+        if not 0 <= i < self._len:
+            raise IndexError("row index out of range")
+        return self._row_type(self, i)
+
+    def __iter__(self) -> Iterator[TrackRow]:
+        row_type = self._row_type
+        for i in range(self._len):
+            yield row_type(self, i)
+
+    def cell(self, column: str, i: int) -> Union[str, int]:
+        ids = self._ids.get(column)
+        if ids is not None:
+            return self._string(ids[i])
+        return self._ints[column][i]
+
+    def column(self, name: str) -> List[Any]:
+        """All values of one column as a list (strings are shared with the pool, not copied)."""
+        ids = self._ids.get(name)
+        if ids is None:
+            return list(self._ints[name])
+        return list(map(self._string, ids))
+
+    # -- building ---------------------------------------------------------------------
+
+    def _check_writable(self) -> None:
+        if self._file is not None:
+            raise TypeError("table is memory-mapped and read-only")
+
+    def append(self, *values: Union[str, int]) -> int:
+        """Append one row: string columns then integer columns, in declaration order."""
+        self._check_writable()
+        n_str = len(self.columns)
+        if len(values) != n_str + len(self.int_columns):
+            raise ValueError(f"expected {n_str + len(self.int_columns)} values, got {len(values)}")
+        pool = self.pool
+        known = pool._ids
+        for ids, v in zip(self._ids.values(), values):
+            sid = known.get(v)
+            ids.append(pool.intern(v) if sid is None else sid)
+        for col, v in zip(self._ints.values(), values[n_str:]):
+            col.append(v)
+        self._len += 1
+        return self._len - 1
+
+    def append_dict(self, values: Dict[str, Any]) -> int:
+        """Append one row from a mapping; missing string columns are "", missing integers 0."""
+        return self.append(
+            *[values.get(c) or "" for c in self.columns], *[values.get(c) or 0 for c in self.int_columns]
+        )
+
+    def add_column(self, name: str, default: str = "") -> None:
+        """Add a string column, filled with default for the rows already present."""
+        self._check_writable()
+        if name in self._ids or name in self._ints:
+            raise ValueError(f"column exists: {name}")
+        self.columns.append(name)
+        self._ids[name] = array("I", [self.pool.intern(default)]) * self._len
+        self._row_type = self._make_row_type()
+
+    def take(self, indices: Sequence[int]) -> "TrackTable":
+        """A new in-memory table with the given rows, in that order (sharing this pool)."""
+        self._check_writable()
+        out = TrackTable(self.columns, self.int_columns, row_base=self._row_base, pool=self.pool, meta=self.meta)
+        for name, ids in self._ids.items():
+            out._ids[name] = array("I", [ids[i] for i in indices])
+        for name, values in self._ints.items():
+            out._ints[name] = array("q", [values[i] for i in indices])
+        out._len = len(indices)
+        out._row_type = out._make_row_type()
+        return out
+
+    def nbytes(self) -> int:
+        """Approximate memory held by the columns and the interned strings."""
+        if self._file is not None:
+            return 0
+        total = sum(a.itemsize * len(a) for a in self._ids.values())
+        total += sum(a.itemsize * len(a) for a in self._ints.values())
+        total += sys.getsizeof(self.pool.strings) + sum(sys.getsizeof(s) for s in self.pool.strings)
+        return total
+
+    # -- persistence ------------------------------------------------------------------
+
+    def save(self, path: Path, meta: Optional[Dict[str, Any]] = None) -> None:
+        """Write the table (and meta, default self.meta) as a csv_index string table."""
+        self._check_writable()
+        write_columns(path, self.pool.strings, self._ids, self._ints, self.meta if meta is None else meta)
+
+    @classmethod
+    def open(
+        cls, path: Path, expect_meta: Optional[Dict[str, Any]] = None, *, row_base: type = TrackRow
+    ) -> Optional["TrackTable"]:
+        """Open a saved table memory-mapped, or None if missing, unreadable or stale (see open_table)."""
+        f = open_table(path, expect_meta)
+        if f is None:
+            return None
+        table = cls.__new__(cls)
+        table.columns = list(f.columns)
+        table.int_columns = list(f.int_columns)
+        table.meta = f.meta
+        table.pool = StringPool()
+        table._string = f.string
+        table._ids = {c: f.string_ids(c) for c in f.columns}
+        table._ints = {c: f.int_column(c) for c in f.int_columns}
+        table._file = f
+        table._len = f.rows
+        table._row_base = row_base
+        table._row_type = table._make_row_type()
+        return table
@@ -13,6 +13,12 @@ Features:
   - Nearly-sorted optimization: computes a minimal set of moves using LIS
   - Applies only moves (typically small if playlist is mostly sorted)
   - No extra API calls during the move phase (only one initial playlistItems.list scan)
+  - Journaled: planned and applied moves are saved per playlist (--journal-dir), so a run
+    stopped by quota or errors resumes at the next move after a 2-unit spot check instead
+    of a full scan; if the playlist was edited meanwhile it is re-scanned and re-planned
+  - Quota-aware: units spent per day are counted (list = 1, update = 50) and a run only
+    applies the moves --daily-quota still covers, top of the playlist first; the rest
+    waits in the journal and the expected completion day is reported
 
 Auth:
   Uses OAuth (installed app flow). You need a Google Cloud OAuth Client (Desktop app)
@@ -29,42 +35,51 @@ Usage examples:
   # Actually apply changes
   ./yt_reorder_playlist.py --playlist-id PLxxxx --tsv desired.tsv
 
+  # Order the whole playlist: desired videos first, everything else after them
+  ./yt_reorder_playlist.py --playlist-id PLxxxx --tsv desired.tsv --mode full --anchor end
+
 Notes:
   - Duplicates in a playlist: this script moves the *first* matching occurrence.
   - VideoIds in desired order but not currently in playlist are skipped.
   - Items in playlist but not in desired list keep their relative order and remain in place
     after the reordered subset (unless you choose --mode=full to force full ordering).
+  - --mode=full plans over the whole playlist: the desired videos in desired order, the
+    other items in their current relative order before (--anchor start) or after
+    (--anchor end) them, or wherever needs fewer updates (--anchor auto). The plan uses
+    the minimum number of playlistItems.update calls (50 quota units each); see
+    reorder_plan.plan_full.
 """
 
 from __future__ import annotations
 
 import argparse
 import csv
-import json
 import os
 import sys
-from dataclasses import dataclass
-from typing import Any, Dict, List, Optional, Tuple
-
-# Google API deps:
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+
+from json_path import compile_path
+from move_journal import DEFAULT_JOURNAL_DIR, MoveJournal
+from playlist_snapshot import DEFAULT_SNAPSHOT_DIR, PlaylistSnapshot
+from quota_ledger import COSTS, DEFAULT_DAILY_QUOTA, DEFAULT_LEDGER, QuotaLedger, next_reset
+from reorder_plan import (
+    ANCHORS,
+    PlItem,
+    plan_full,
+    plan_moves_minimal,
+    simulate_and_render_plan,
+)
+
+# Google API deps, imported where they are used so --offline runs never load them:
 #   pip install --upgrade google-api-python-client google-auth-httplib2 google-auth-oauthlib
-from googleapiclient.discovery import build
-from googleapiclient.errors import HttpError
-from google_auth_oauthlib.flow import InstalledAppFlow
-from google.oauth2.credentials import Credentials
-from google.auth.transport.requests import Request
+if TYPE_CHECKING:
+    from google.oauth2.credentials import Credentials
 
 
 SCOPES = ["https://www.googleapis.com/auth/youtube"]
 
 
-@dataclass
-class PlItem:
-    playlist_item_id: str
-    video_id: str
-    position: int
-
-
 def eprint(*a: Any) -> None:
     print(*a, file=sys.stderr)
 
@@ -91,69 +106,20 @@ def load_videoids_from_tsv(path: str, no_header: bool) -> List[str]:
     return out
 
 
-def parse_json_path(path: str) -> List[Tuple[str, bool]]:
-    """
-    Supports a dotted path where each segment may end in [] to denote array expansion.
-    Example: 'a.b[].c' -> [('a', False), ('b', True), ('c', False)]
-    Keys may contain ':' etc; only '.' splits segments.
-    """
-    if not path or path.strip() == "":
-        raise ValueError("json-path is empty")
-    segs: List[Tuple[str, bool]] = []
-    for raw in path.split("."):
-        raw = raw.strip()
-        if not raw:
-            continue
-        is_arr = raw.endswith("[]")
-        key = raw[:-2] if is_arr else raw
-        if key == "":
-            raise ValueError(f"Invalid json-path segment: '{raw}'")
-        segs.append((key, is_arr))
-    if not segs:
-        raise ValueError("json-path did not contain any usable segments")
-    return segs
-
-
-def extract_json_path(data: Any, path: str) -> List[Any]:
-    """
-    Returns a list of values (even if single), expanding arrays when [] is used.
-    """
-    segs = parse_json_path(path)
-    cur: List[Any] = [data]
-    for key, is_arr in segs:
-        nxt: List[Any] = []
-        for obj in cur:
-            if isinstance(obj, dict):
-                if key not in obj:
-                    continue
-                val = obj[key]
-            else:
-                continue
-
-            if is_arr:
-                if isinstance(val, list):
-                    nxt.extend(val)
-                else:
-                    # If not a list, treat as empty expansion
-                    continue
-            else:
-                nxt.append(val)
-        cur = nxt
-    return cur
-
-
 def load_videoids_from_json(path: str, json_path: str) -> List[str]:
-    with open(path, "r", encoding="utf-8") as f:
-        data = json.load(f)
-    vals = extract_json_path(data, json_path)
+    """Stream the values at json_path out of the file; the document is never loaded whole."""
     out: List[str] = []
-    for v in vals:
+    for v in compile_path(json_path).iter_file(Path(path)):
         if isinstance(v, str) and v.strip():
             out.append(v.strip())
     return out
 
 
-def load_credentials(client_secrets: Optional[str], token_path: str) -> Credentials:
+def load_credentials(client_secrets: Optional[str], token_path: str) -> "Credentials":
+    from google.auth.transport.requests import Request
+    from google.oauth2.credentials import Credentials
+    from google_auth_oauthlib.flow import InstalledAppFlow
+
     creds: Optional[Credentials] = None
 
     if os.path.exists(token_path):
@@ -199,143 +165,85 @@ def load_credentials(client_secrets: Optional[str], token_path: str) -> Credenti
 
 
 
-def fetch_playlist_items(youtube, playlist_id: str) -> List[PlItem]:
-    items: List[PlItem] = []
-    page_token: Optional[str] = None
-    while True:
-        resp = (
-            youtube.playlistItems()
-            .list(
-                part="snippet",
-                playlistId=playlist_id,
-                maxResults=50,
-                pageToken=page_token,
-            )
-            .execute()
-        )
-        for it in resp.get("items", []):
-            pid = it["id"]
-            sn = it["snippet"]
-            vid = sn["resourceId"]["videoId"]
-            pos = int(sn["position"])
-            items.append(PlItem(pid, vid, pos))
-        page_token = resp.get("nextPageToken")
-        if not page_token:
-            break
-    # Ensure sorted by position
-    items.sort(key=lambda x: x.position)
-    return items
+def connect(client_secrets: Optional[str], token_path: str):
+    from googleapiclient.discovery import build
 
+    creds = load_credentials(client_secrets, token_path)
+    return build("youtube", "v3", credentials=creds)
 
-def lis_indices(seq: List[int]) -> List[int]:
-    """
-    Returns indices of a Longest Increasing Subsequence (strict).
-    Standard O(n log n) patience algorithm, reconstructing indices.
-    """
-    if not seq:
-        return []
-    # tails[k] = value of smallest tail of increasing subseq of length k+1
-    tails: List[int] = []
-    # tails_idx[k] = index in seq of that tail
-    tails_idx: List[int] = []
-    # prev[i] = previous index in seq for reconstruction
-    prev: List[int] = [-1] * len(seq)
-
-    import bisect
-
-    for i, x in enumerate(seq):
-        j = bisect.bisect_left(tails, x)
-        if j == len(tails):
-            tails.append(x)
-            tails_idx.append(i)
-        else:
-            tails[j] = x
-            tails_idx[j] = i
-        if j > 0:
-            prev[i] = tails_idx[j - 1]
-
-    # Reconstruct
-    k = tails_idx[-1]
-    out: List[int] = []
-    while k != -1:
-        out.append(k)
-        k = prev[k]
-    out.reverse()
-    return out
 
+_VERIFY_FIELDS = "pageInfo/totalResults,items(id,snippet/position)"
+_VERIFY_CALLS = 2
 
-def plan_moves_minimal(current: List[PlItem], desired_videoids: List[str]) -> List[Tuple[str, int]]:
-    """
-    Compute a minimal-ish set of moves (videoId -> desiredPosition) by:
-      - considering only videos present in both current and desired
-      - keeping a LIS of desired positions in current order fixed
-      - moving the rest into place
 
-    Returns moves as a list of (videoId, target_index_in_filtered_order).
+def verify_progress(youtube, playlist_id: str, journal: MoveJournal) -> Optional[int]:
     """
-    current_vids = [it.video_id for it in current]
-    # Filter desired to videos that are actually present, preserving desired order.
-    present = set(current_vids)
-    desired_f = [v for v in desired_videoids if v in present]
-
-    desired_pos: Dict[str, int] = {v: i for i, v in enumerate(desired_f)}
-
-    # Sequence of desired positions as they appear in current order
-    seq = [desired_pos[v] for v in current_vids if v in desired_pos]
-
-    keep_seq_idx = set(lis_indices(seq))  # indices within seq list
-    # Map seq index back to videoId in current order
-    current_common_vids = [v for v in current_vids if v in desired_pos]
-    keep_vids = set(current_common_vids[i] for i in keep_seq_idx)
-
-    # Items to move: all desired_f vids not in keep_vids
-    moves = [(v, desired_pos[v]) for v in desired_f if v not in keep_vids]
-    # Apply in increasing target order (important for stable simulation)
-    moves.sort(key=lambda t: t[1])
-    return moves
-
-
-def simulate_and_render_plan(current: List[PlItem], moves: List[Tuple[str, int]]) -> List[Tuple[PlItem, int, int]]:
+    Check a resumed journal against the live playlist with two list calls (2 quota units)
+    instead of a full scan: the item count and first item, plus the positions of the items
+    the last applied move and the next ones touch. Returns how many moves are applied
+    (one more than recorded if the last update went through but was never journaled), or
+    None if the playlist no longer looks like the journal says (edited elsewhere).
     """
-    Simulate the effect of moving each item to target index and return a concrete plan:
-      (item, from_pos, to_pos) in terms of indices in the *current list* during simulation.
-
-    We simulate list behavior locally so we don't need extra API calls.
-    """
-    # Work on a list of PlItem references
-    work: List[PlItem] = list(current)
-
-    # index helper for duplicates: videoId -> list of indices (first match used)
-    def find_index(video_id: str) -> int:
-        for i, it in enumerate(work):
-            if it.video_id == video_id:
-                return i
-        return -1
-
-    plan: List[Tuple[PlItem, int, int]] = []
-    for vid, target in moves:
-        from_idx = find_index(vid)
-        if from_idx < 0:
-            continue
-        to_idx = max(0, min(target, len(work) - 1))
-        if from_idx == to_idx:
-            continue
-        it = work.pop(from_idx)
-        work.insert(to_idx, it)
-        plan.append((it, from_idx, to_idx))
-    return plan
-
-
-def apply_plan(youtube, playlist_id: str, plan: List[Tuple[PlItem, int, int]], dry_run: bool) -> None:
+    items = journal.items
+    node_of = {it.playlist_item_id: it.index for it in items}
+    done = journal.done
+    nodes = [n for n, _, _ in journal.moves[max(0, done - 1) : done + 49]]
+    ids = list(dict.fromkeys(items[n].playlist_item_id for n in nodes))
+
+    head = (
+        youtube.playlistItems()
+        .list(part="snippet", playlistId=playlist_id, maxResults=1, fields=_VERIFY_FIELDS)
+        .execute()
+    )
+    if int(head.get("pageInfo", {}).get("totalResults", -1)) != len(items):
+        return None
+    seen = list(head.get("items", []))
+    if ids:
+        seen += (
+            youtube.playlistItems()
+            .list(part="snippet", id=",".join(ids), maxResults=50, fields=_VERIFY_FIELDS)
+            .execute()
+            .get("items", [])
+        )
+    observed: Dict[str, int] = {it["id"]: int(it["snippet"]["position"]) for it in seen}
+    if any(pid not in node_of for pid in observed) or any(pid not in observed for pid in ids):
+        return None
+
+    tree = journal.replay(done)
+    for candidate in (done, done + 1):
+        if all(tree.index(node_of[pid]) == pos for pid, pos in observed.items()):
+            return candidate
+        if candidate == len(journal.moves):
+            break
+        _, f, t = journal.moves[candidate]
+        tree.move(f, t)
+    return None
+
+
+def apply_plan(
+    youtube,
+    playlist_id: str,
+    plan: List[Tuple[PlItem, int, int]],
+    dry_run: bool,
+    journal: Optional[MoveJournal] = None,
+    ledger: Optional[QuotaLedger] = None,
+) -> bool:
     """
     Execute playlistItems.update for each move.
     IMPORTANT: YouTube uses 0-based position within playlist.
+
+    Each later move's indices assume the earlier ones happened, so this stops at the first
+    failed update and returns False; with a journal the next run resumes at that move.
     """
-    for it, from_idx, to_idx in plan:
-        if dry_run:
+    if dry_run:
+        for it, from_idx, to_idx in plan:
             print(f"DRY  move videoId={it.video_id} playlistItemId={it.playlist_item_id} {from_idx} -> {to_idx}")
-            continue
+        return True
+
+    from googleapiclient.errors import HttpError
 
+    done = journal.done if journal is not None else 0
+    for it, from_idx, to_idx in plan:
         body = {
             "id": it.playlist_item_id,
             "snippet": {
@@ -346,11 +254,16 @@ def apply_plan(youtube, playlist_id: str, plan: List[Tuple[PlItem, int, int]], d
         }
         try:
             youtube.playlistItems().update(part="snippet", body=body).execute()
-            print(f"OK   move videoId={it.video_id} {from_idx} -> {to_idx}")
         except HttpError as e:
             eprint(f"ERR  move videoId={it.video_id} {from_idx}->{to_idx}: {e}")
-            # Continue so you can resume later; you can re-run dry-run to see remaining drift.
-            continue
+            return False
+        done += 1
+        if ledger is not None:
+            ledger.charge("update")
+        if journal is not None:
+            journal.record(done)
+        print(f"OK   move videoId={it.video_id} {from_idx} -> {to_idx}")
+    return True
 
 
 def main() -> int:
@@ -366,11 +279,58 @@ def main() -> int:
     ap.add_argument("--json-path", help="Dotted path with [] expansions to extract videoIds (required with --json)")
 
     ap.add_argument("--no-header", action="store_true", help="TSV has no header row (default: header allowed)")
+    ap.add_argument(
+        "--mode",
+        choices=("subset", "full"),
+        default="subset",
+        help="subset: reorder the desired videos among themselves; full: order the whole playlist",
+    )
+    ap.add_argument(
+        "--anchor",
+        choices=ANCHORS,
+        default="end",
+        help="--mode=full: put the videos missing from the desired list at the end, the start, "
+        "or wherever needs fewer moves (auto)",
+    )
+    ap.add_argument(
+        "--journal-dir",
+        default=str(DEFAULT_JOURNAL_DIR),
+        help=f"Where planned and applied moves are journaled, so an interrupted run resumes "
+        f"(default: utility/{DEFAULT_JOURNAL_DIR.name})",
+    )
+    ap.add_argument("--no-journal", action="store_true", help="Always scan and plan from scratch; keep no journal")
+    ap.add_argument(
+        "--snapshot-dir",
+        default=str(DEFAULT_SNAPSHOT_DIR),
+        help=f"Where scanned playlists are cached and revalidated by ETag (default: utility/{DEFAULT_SNAPSHOT_DIR.name})",
+    )
+    ap.add_argument("--no-snapshot", action="store_true", help="Do not read or write playlist snapshots")
+    ap.add_argument(
+        "--offline",
+        action="store_true",
+        help="Plan from the stored snapshot without any API call or login (implies --dry-run)",
+    )
+    ap.add_argument(
+        "--daily-quota",
+        type=int,
+        default=DEFAULT_DAILY_QUOTA,
+        help=f"API units this tool may spend per day (resets at midnight Pacific; default {DEFAULT_DAILY_QUOTA}). "
+        "Moves beyond it are left in the journal for the next day",
+    )
+    ap.add_argument(
+        "--quota-ledger",
+        default=str(DEFAULT_LEDGER),
+        help=f"Where units spent today are counted (default: utility/{DEFAULT_LEDGER.name})",
+    )
 
     args = ap.parse_args()
 
     if args.json and not args.json_path:
         ap.error("--json-path is required when using --json")
+    if args.offline and args.no_snapshot:
+        ap.error("--offline plans from the snapshot; drop --no-snapshot")
+    if args.offline:
+        args.dry_run = True
 
     if args.tsv:
         desired = load_videoids_from_tsv(args.tsv, no_header=args.no_header)
@@ -382,31 +342,95 @@ def main() -> int:
         eprint("No videoIds found in input.")
         return 2
 
-    creds = load_credentials(args.client_secrets, args.token)
-    youtube = build("youtube", "v3", credentials=creds)
+    snapshot = PlaylistSnapshot(None if args.no_snapshot else Path(args.snapshot_dir).expanduser(), args.playlist_id)
+    request = {"mode": args.mode, "anchor": args.anchor if args.mode == "full" else None, "desired": desired}
+    journal = MoveJournal(None if args.no_journal else Path(args.journal_dir).expanduser(), args.playlist_id, request)
+    ledger = QuotaLedger(Path(args.quota_ledger).expanduser(), args.daily_quota)
+    if not args.dry_run and not ledger.affordable("update"):
+        eprint(f"Quota: today's {ledger.daily_quota} units are spent; run again after {next_reset():%Y-%m-%d %H:%M %Z}.")
+        return 2
+    youtube = None if args.offline else connect(args.client_secrets, args.token)
+    snapshot.load()
+
+    plan: Optional[List[Tuple[PlItem, int, int]]] = None
+    if youtube is not None and journal.load():
+        eprint(f"Journal: plan {journal.plan_hash} has {journal.done}/{len(journal.moves)} moves applied; verifying...")
+        done = verify_progress(youtube, args.playlist_id, journal)
+        ledger.charge("list", _VERIFY_CALLS)
+        if done is None:
+            eprint("Journal: the playlist was edited outside this plan; re-planning from its current order")
+        else:
+            if done != journal.done and not args.dry_run:
+                # The last update went through but was never recorded.
+                snapshot.apply(m[1:] for m in journal.moves[journal.done : done])
+                journal.record(done)
+            journal.done = done
+            plan = journal.pending()
+            eprint(f"Journal: resuming at move {done + 1}")
+
+    if plan is None:
+        if youtube is None:
+            if not snapshot.pages:
+                eprint(f"No snapshot of {args.playlist_id} yet; run once without --offline.")
+                return 2
+            current = snapshot.table()
+            eprint(f"Playlist items from snapshot ({snapshot.fetched}): {len(current)}")
+        else:
+            eprint("Fetching playlist items...")
+            current = snapshot.fetch(youtube)
+            ledger.charge("list", snapshot.not_modified + snapshot.downloaded)
+            eprint(
+                f"Playlist items fetched: {len(current)} "
+                f"({snapshot.not_modified} pages unchanged, {snapshot.downloaded} downloaded)"
+            )
 
-    eprint("Fetching playlist items...")
-    current = fetch_playlist_items(youtube, args.playlist_id)
-    eprint(f"Playlist items fetched: {len(current)}")
+        if args.mode == "full":
+            plan = plan_full(current, desired, anchor=args.anchor)
+            eprint(f"Planned moves (full order, minimal): {len(plan)}")
+        else:
+            # Plan minimal moves
+            moves = plan_moves_minimal(current, desired)
+            eprint(f"Planned moves (LIS-minimized): {len(moves)}")
 
-    # Plan minimal moves
-    moves = plan_moves_minimal(current, desired)
-    eprint(f"Planned moves (LIS-minimized): {len(moves)}")
+            plan = simulate_and_render_plan(current, moves)
 
-    plan = simulate_and_render_plan(current, moves)
+        if plan and not args.dry_run:
+            journal.start(current, plan)
 
     # Summary
     if not plan:
         print("No moves required (playlist already matches desired relative order for present items).")
+        if not args.dry_run:
+            journal.finish()
         return 0
 
-    print(f"Moves to apply: {len(plan)}")
+    print(f"Moves to apply: {len(plan)} (~{len(plan) * COSTS['update']} quota units)")
     for it, from_idx, to_idx in plan[:50]:
         print(f"{'DRY ' if args.dry_run else 'PLAN'} move {from_idx:4d}->{to_idx:4d}  {it.video_id}  ({it.playlist_item_id})")
     if len(plan) > 50:
         print(f"... ({len(plan)-50} more moves)")
 
-    apply_plan(youtube, args.playlist_id, plan, dry_run=args.dry_run)
+    today, windows, eta = ledger.schedule(len(plan), overhead=_VERIFY_CALLS * COSTS["list"])
+    eprint(f"Quota: {ledger.used}/{ledger.daily_quota} units used today; {today} of {len(plan)} moves fit")
+    if windows:
+        eprint(
+            f"Quota: {len(plan) - today} moves need {windows} more day(s) after the reset at "
+            f"{next_reset():%Y-%m-%d %H:%M %Z}; estimated completion on {eta:%Y-%m-%d} (Pacific)"
+        )
+        if not journal.enabled and not args.dry_run:
+            eprint("Quota: --no-journal, so the next run scans and plans again")
+
+    done_before = journal.done
+    batch = plan if args.dry_run else plan[:today]
+    ok = apply_plan(youtube, args.playlist_id, batch, dry_run=args.dry_run, journal=journal, ledger=ledger)
+    if not args.dry_run:
+        snapshot.apply((f, t) for _, f, t in plan[: journal.done - done_before])
+    if args.dry_run:
+        return 0
+    if not ok or windows:
+        eprint(f"Stopped after {journal.done}/{len(journal.moves)} moves; re-run the same command to resume.")
+        return 2
+    journal.finish()
     return 0
 
 